@@ -0,0 +1,185 @@
+"""
+Pre-warmed per-category background pool.
+
+When the image provider misses the per-item deadline (slow, down, or
+erroring) a post takes a ready-made background for its category from this
+pool instead of the single static fallback.jpeg, so render latency stays
+bounded and a bad run still looks varied and on-theme.
+
+The pool lives on disk (one directory per category) because every
+scheduled slot is a fresh process; `refill` is meant to run in the idle
+time after a slot has been sent.
+"""
+import os
+import time
+import uuid
+import random
+import logging
+import threading
+from typing import Iterable, List, Optional
+
+from app import metrics
+from app.config import BG_POOL_DIR, BG_POOL_SIZE, BG_POOL_MAX_AGE_H, BG_POOL_REFILL_BUDGET_S
+from app.custom_bg import BG_SIZE, build_bg_prompt, image_type
+from app.providers import get_image_provider
+
+DEFAULT_CATEGORY = "default"
+# THEMES categories that have a different name in CATEGORY_STYLES
+CATEGORY_ALIASES = {DEFAULT_CATEGORY: "general"}
+
+
+class BackgroundPool:
+    """
+    Up to `size` background images per category.
+
+    `take` serves the least-recently-served entry and consumes it, except
+    the last one, which is kept (and rotated) so a category is never left
+    empty. `refill` tops every category back up to `size` and replaces
+    entries older than `max_age_s`.
+    """
+
+    def __init__(self, directory: str, size: int = 3, max_age_s: float = 72 * 3600):
+        self.directory = directory
+        self.size = size
+        self.max_age_s = max_age_s
+        self._lock = threading.Lock()
+
+    def _dir(self, category: str) -> str:
+        return os.path.join(self.directory, category)
+
+    def _entries(self, category: str) -> List[str]:
+        """Entry paths, least recently served first."""
+        try:
+            with os.scandir(self._dir(category)) as it:
+                entries = [(e.stat().st_mtime, e.path) for e in it if e.is_file() and not e.name.endswith(".tmp")]
+        except FileNotFoundError:
+            return []
+        return [path for _, path in sorted(entries)]
+
+    def count(self, category: str) -> int:
+        return len(self._entries(category))
+
+    def take(self, category: str) -> Optional[bytes]:
+        """A background for `category` (or the default category), or None if both are empty."""
+        for cat in dict.fromkeys((category or DEFAULT_CATEGORY, DEFAULT_CATEGORY)):
+            with self._lock:
+                entries = self._entries(cat)
+                for path in entries:
+                    try:
+                        with open(path, "rb") as f:
+                            data = f.read()
+                        if len(entries) > 1:
+                            os.remove(path)
+                        else:
+                            os.utime(path, None)  # last one: keep it, mark as served
+                    except OSError as e:
+                        logging.warning(f"⚠️ bg_pool: could not use {path}: {e}")
+                        continue
+                    metrics.incr("bg_pool.hit", category=category)
+                    return data
+        metrics.incr("bg_pool.miss", category=category)
+        return None
+
+    def put(self, category: str, data: bytes) -> str:
+        directory = self._dir(category)
+        os.makedirs(directory, exist_ok=True)
+        _, ext = image_type(data)
+        path = os.path.join(directory, f"{int(time.time())}_{uuid.uuid4().hex[:8]}.{ext}")
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(data)
+        # Fresh entries go to the front of the queue: backdate to "never served"
+        os.utime(tmp, (0, 0))
+        os.replace(tmp, path)
+        return path
+
+    def _stale(self, category: str) -> List[str]:
+        cutoff = time.time() - self.max_age_s
+        stale = []
+        for path in self._entries(category):
+            try:
+                born = float(os.path.basename(path).split("_", 1)[0])
+            except ValueError:
+                born = 0.0
+            if born < cutoff:
+                stale.append(path)
+        return stale
+
+    def refill(self, categories: Iterable[str], budget_s: float = 120.0, provider_name: Optional[str] = None) -> int:
+        """
+        Generate backgrounds until every category holds `size` fresh entries
+        or `budget_s` runs out. Emptiest categories go first. Returns the
+        number of images added.
+        """
+        if self.size <= 0:
+            return 0
+        deadline = time.monotonic() + budget_s
+        provider = get_image_provider(provider_name)
+
+        plan = {}
+        for cat in dict.fromkeys(categories):
+            stale = self._stale(cat)
+            missing = self.size - (self.count(cat) - len(stale))
+            if missing > 0:
+                plan[cat] = (missing, stale)
+        # Round-robin, emptiest first, so a short budget is shared across categories
+        order = sorted(plan, key=lambda c: -plan[c][0])
+        rounds = max((missing for missing, _ in plan.values()), default=0)
+        jobs = [cat for n in range(rounds) for cat in order if plan[cat][0] > n]
+
+        added = 0
+        failed = set()
+        for cat in jobs:
+            if time.monotonic() >= deadline:
+                break
+            if cat in failed:
+                continue
+            prompt = build_bg_prompt("", CATEGORY_ALIASES.get(cat, cat))
+            try:
+                data = provider.generate(prompt, size=BG_SIZE, seed=random.randint(1, 1_000_000))
+            except Exception as e:
+                metrics.incr("bg_pool.refill_errors")
+                logging.warning(f"⚠️ bg_pool: refill for {cat} failed: {e}")
+                failed.add(cat)
+                continue
+            stale = plan[cat][1]
+            with self._lock:
+                self.put(cat, data)
+                if stale:
+                    try:
+                        os.remove(stale.pop(0))
+                    except OSError:
+                        pass
+            added += 1
+            metrics.incr("bg_pool.refilled", category=cat)
+        return added
+
+_pool: Optional[BackgroundPool] = None
+_pool_lock = threading.Lock()
+
+
+def get_background_pool() -> Optional[BackgroundPool]:
+    """Process-wide pool, or None when BG_POOL_SIZE is 0."""
+    global _pool
+    if BG_POOL_SIZE <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            _pool = BackgroundPool(BG_POOL_DIR, size=BG_POOL_SIZE, max_age_s=BG_POOL_MAX_AGE_H * 3600)
+        return _pool
+
+
+def refill_background_pool(categories: Iterable[str], budget_s: float = BG_POOL_REFILL_BUDGET_S) -> int:
+    """Top up the pool for `categories` within `budget_s`; never raises."""
+    pool = get_background_pool()
+    if pool is None:
+        return 0
+    started = time.monotonic()
+    try:
+        added = pool.refill(categories, budget_s=budget_s)
+    except Exception as e:
+        logging.warning(f"⚠️ bg_pool: refill aborted: {e}")
+        return 0
+    if added:
+        logging.info(f"🧺 Background pool: added {added} images in {time.monotonic() - started:.1f}s")
+    return added
@@ -10,6 +10,12 @@ logging.basicConfig(
 # --- Perplexity Configuration ---
 PERPLEXITY_MODEL = os.getenv("PERPLEXITY_MODEL", "pplx-7b-online")
 PPLX_API_KEY = os.getenv("PERPLEXITY_API_KEY")
+PERPLEXITY_URL = os.getenv("PERPLEXITY_URL", "https://api.perplexity.ai/chat/completions")
+PERPLEXITY_TIMEOUT_S = float(os.getenv("PERPLEXITY_TIMEOUT_S", 60))     # per attempt
+PERPLEXITY_DEADLINE_S = float(os.getenv("PERPLEXITY_DEADLINE_S", 150))  # whole call incl. retries
+PERPLEXITY_MAX_ATTEMPTS = int(os.getenv("PERPLEXITY_MAX_ATTEMPTS", 4))
+PERPLEXITY_BREAKER_THRESHOLD = int(os.getenv("PERPLEXITY_BREAKER_THRESHOLD", 5))   # consecutive 5xx
+PERPLEXITY_BREAKER_COOLDOWN_S = float(os.getenv("PERPLEXITY_BREAKER_COOLDOWN_S", 120))
 PROMPT = """You are the content creator for "theaipoint," an AI-powered Indian social media news page.
 
 TODAY’S DATE: {today_date}
@@ -49,6 +55,69 @@ CONSTRAINTS:
 - Output strictly in the format above with no extra commentary.
 """
 
+# --- Provider Configuration ---
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "openai")      # openai | fake
+IMAGE_PROVIDER = os.getenv("IMAGE_PROVIDER", "nebius")  # nebius | gemini | fake
+# Fake (offline) backends, for load tests: "fixed:ms" | "uniform:lo,hi" | "lognormal:median_ms,sigma"
+FAKE_CHAT_LATENCY = os.getenv("FAKE_CHAT_LATENCY", "lognormal:1500,0.3")
+FAKE_IMAGE_LATENCY = os.getenv("FAKE_IMAGE_LATENCY", "lognormal:4000,0.4")
+FAKE_ERROR_RATE = float(os.getenv("FAKE_ERROR_RATE", 0.0))
+FAKE_SEED = int(os.getenv("FAKE_SEED", 42))
+
+# Hedged image generation: if the primary is slower than its recent p<N>, also ask this provider
+IMAGE_HEDGE_PROVIDER = os.getenv("IMAGE_HEDGE_PROVIDER", "")               # e.g. gemini; empty disables
+IMAGE_HEDGE_PERCENTILE = float(os.getenv("IMAGE_HEDGE_PERCENTILE", 90))
+IMAGE_HEDGE_DELAY_S = float(os.getenv("IMAGE_HEDGE_DELAY_S", 8))          # until enough samples
+IMAGE_HEDGE_MIN_DELAY_S = float(os.getenv("IMAGE_HEDGE_MIN_DELAY_S", 1.5))
+IMAGE_HEDGE_MIN_SAMPLES = int(os.getenv("IMAGE_HEDGE_MIN_SAMPLES", 5))
+
+# --- Image Configuration ---
+# Background source: ai (image provider) | gradient (theme gradient, offline and instant)
+# | article (publisher's og:image, AI for items without a usable one)
+BG_MODE = os.getenv("BG_MODE", "ai").lower()
+ARTICLE_IMAGE_MAX_BYTES = int(os.getenv("ARTICLE_IMAGE_MAX_BYTES", 8 * 1024 * 1024))
+ARTICLE_IMAGE_TIMEOUT_S = float(os.getenv("ARTICLE_IMAGE_TIMEOUT_S", 10))
+ARTICLE_IMAGE_MIN_SIDE = int(os.getenv("ARTICLE_IMAGE_MIN_SIDE", 600))  # reject thumbnails/logos
+# How long a post waits on a background that was started during LLM streaming
+BG_PREFETCH_TIMEOUT_S = float(os.getenv("BG_PREFETCH_TIMEOUT_S", 90))
+BG_MAX_CONCURRENCY = int(os.getenv("BG_MAX_CONCURRENCY", 4))          # provider calls in flight per batch
+BG_REQUEST_TIMEOUT_S = float(os.getenv("BG_REQUEST_TIMEOUT_S", 60))   # per background
+# Prompt-keyed background cache (also makes seeds deterministic)
+BG_CACHE_ENABLED = os.getenv("BG_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+BG_CACHE_DIR = os.getenv("BG_CACHE_DIR", os.path.join(os.path.dirname(__file__), "cache", "backgrounds"))
+BG_CACHE_MAX_MB = float(os.getenv("BG_CACHE_MAX_MB", 500))
+BG_FALLBACK_VARIANTS = int(os.getenv("BG_FALLBACK_VARIANTS", 3))  # cached looks per category fallback
+# Backgrounds stay in memory; set a directory only to keep copies on disk (debugging)
+BG_SAVE_DIR = os.getenv("BG_SAVE_DIR", "")
+# Per-item deadline: past it a post takes a pre-warmed background for its category
+BG_ITEM_DEADLINE_S = float(os.getenv("BG_ITEM_DEADLINE_S", 25))
+BG_POOL_SIZE = int(os.getenv("BG_POOL_SIZE", 3))                     # per category; 0 disables the pool
+BG_POOL_DIR = os.getenv("BG_POOL_DIR", os.path.join(os.path.dirname(__file__), "cache", "bg_pool"))
+BG_POOL_MAX_AGE_H = float(os.getenv("BG_POOL_MAX_AGE_H", 72))       # older entries are replaced on refill
+BG_POOL_REFILL_BUDGET_S = float(os.getenv("BG_POOL_REFILL_BUDGET_S", 120))  # time cap per refill pass
+
+# --- Render Configuration ---
+RENDER_PAGES = int(os.getenv("RENDER_PAGES", 2))                  # warm Chromium pages
+RENDER_RECYCLE_AFTER = int(os.getenv("RENDER_RECYCLE_AFTER", 25))  # renders before a page is replaced
+RENDER_TIMEOUT_S = float(os.getenv("RENDER_TIMEOUT_S", 60))        # per post
+RENDER_ENGINE = os.getenv("RENDER_ENGINE", "chromium").lower()      # chromium | pillow
+RENDER_PROFILE = os.getenv("RENDER_PROFILE", "social")             # preview | social | print (see render_profiles.py)
+# Render farm: worker processes, each driving its own Chromium (0 = render in this process)
+RENDER_WORKERS = int(os.getenv("RENDER_WORKERS", 0))
+RENDER_WORKER_HEARTBEAT_S = float(os.getenv("RENDER_WORKER_HEARTBEAT_S", 5))  # silent longer than 3x = restarted
+# Long-lived render server (python -m app.render_server); runs use it while it is reachable
+RENDER_SERVER_URL = os.getenv("RENDER_SERVER_URL", "")  # e.g. http://127.0.0.1:8765; empty = always in-process
+RENDER_SERVER_HOST = os.getenv("RENDER_SERVER_HOST", "127.0.0.1")
+RENDER_SERVER_PORT = int(os.getenv("RENDER_SERVER_PORT", 8765))
+# Placements rendered per post (one page load each): feed (4:5), story (9:16), square (1:1)
+POST_ASPECTS = [a.strip() for a in os.getenv("POST_ASPECTS", "feed").split(",") if a.strip()]
+# Compiled Jinja template bytecode, shared across runs; empty disables it
+TEMPLATE_CACHE_DIR = os.getenv("TEMPLATE_CACHE_DIR", os.path.join(os.path.dirname(__file__), "cache", "jinja"))
+# Finished post images keyed by content (template, fields, background); a hit skips rendering
+RENDER_CACHE_ENABLED = os.getenv("RENDER_CACHE_ENABLED", "true").lower() in ("1", "true", "yes")
+RENDER_CACHE_DIR = os.getenv("RENDER_CACHE_DIR", os.path.join(os.path.dirname(__file__), "cache", "renders"))
+RENDER_CACHE_MAX_MB = float(os.getenv("RENDER_CACHE_MAX_MB", 300))
+
 # --- Email Configuration ---
 EMAIL_HOST = os.getenv("EMAIL_HOST", "smtp.gmail.com")
 EMAIL_PORT = int(os.getenv("EMAIL_PORT", 465))
@@ -57,3 +126,9 @@ EMAIL_PASSWORD = os.getenv("EMAIL_PASSWORD") # For Gmail, use an App Password
 EMAIL_FROM = os.getenv("EMAIL_FROM", EMAIL_USERNAME)
 EMAIL_TO = [e.strip() for e in os.getenv("EMAIL_TO", "").split(",") if e.strip()]
 EMAIL_SUBJECT = os.getenv("EMAIL_SUBJECT", "theaipoint — Viral Digest")
+EMAIL_MAX_RETRIES = int(os.getenv("EMAIL_MAX_RETRIES", 3))
+EMAIL_RETRY_DELAY_S = float(os.getenv("EMAIL_RETRY_DELAY_S", 5))
+# The MIME message is spooled in memory up to this size, then to a temp file
+EMAIL_SPOOL_MAX_MB = float(os.getenv("EMAIL_SPOOL_MAX_MB", 4))
+# Per-message size limit (Gmail rejects over 25 MB); attachments are shrunk, then split across messages
+EMAIL_MAX_MB = float(os.getenv("EMAIL_MAX_MB", 24))
@@ -1,28 +1,131 @@
-import base64
 import os
+import re
 import time
 import uuid
 import random
-from io import BytesIO
-from pathlib import Path
-from PIL import Image
-from typing import Optional
+import asyncio
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Tuple
 
-# Google Gemini
-try:
-    from google import genai
-except ImportError:
-    genai = None
+from app.config import (
+    BG_MAX_CONCURRENCY, BG_REQUEST_TIMEOUT_S,
+    BG_CACHE_ENABLED, BG_CACHE_DIR, BG_CACHE_MAX_MB, BG_FALLBACK_VARIANTS
+)
+from app.disk_cache import DiskLRUCache, cache_key
+from app.providers import ImageProvider, get_image_provider
 
-# Nebius Studio (OpenAI-compatible)
-from openai import OpenAI
+BG_SIZE = (1080, 1350)
 
-# Configure clients once
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-NEBIUS_API_KEY = os.getenv("NEBIUS_API_KEY")
+# Category fallback styles (used when the LLM gave no Flux prompt)
+CATEGORY_STYLES = {
+    "politics": "parliament building silhouette, democratic symbols, authoritative blue and gold",
+    "cricket": "cricket stadium lights, sports energy, vibrant blue and green",
+    "bollywood": "cinema spotlight, glamorous purple and gold, entertainment flair",
+    "economy": "financial charts abstract, rupee symbol glow, green and red",
+    "tech": "futuristic circuit patterns, neon cyan and purple, digital innovation",
+    "breaking": "urgent red glow, dramatic speed lines, breaking news energy",
+    "education": "graduation cap, books, hopeful yellow and blue",
+    "disaster": "somber clouds with hope light, soft amber, respectful tone",
+    "positive": "sunrise celebration, uplifting orange and yellow, victory",
+    "general": "professional modern abstract, teal and gold, balanced"
+}
 
-genai_client = genai.Client(api_key=GOOGLE_API_KEY) if GOOGLE_API_KEY and genai else None
-nebius_client = OpenAI(base_url="https://api.studio.nebius.com/v1/", api_key=NEBIUS_API_KEY)
+
+def build_bg_prompt(headline: str, category: str = "general", flux_prompt: Optional[str] = None) -> str:
+    """Final Flux Schnell prompt: the LLM's prompt + quality rules, or a category fallback."""
+    if flux_prompt:
+        # Use AI-generated prompt + add quality rules
+        final_prompt = f"""{flux_prompt}
+
+Quality: 4K UHD, ultra-detailed, photorealistic, sharp focus, professional depth of field, cinematic lighting, HDR color grading, editorial magazine quality, dark vignette edges, clean negative space for text overlay
+
+Restrictions: NO faces, NO text, NO logos, NO brands, NO watermarks
+
+Aspect Ratio: 9:16 portrait (1080x1350px)
+Output: Award-winning photojournalism, Reuters/AFP/BBC quality"""
+    else:
+        # Fallback: Simple category-based prompt. With the cache on, the
+        # headline is left out so each category reuses a few cached looks.
+        style = CATEGORY_STYLES.get(category, CATEGORY_STYLES["general"])
+        subject = "" if BG_CACHE_ENABLED or not headline else f"\n\nSubject inspired by: {headline[:100]}"
+
+        final_prompt = f"""News background visual: {style}{subject}
+
+Quality: 4K UHD, photorealistic, cinematic, editorial magazine quality, 9:16 portrait
+Restrictions: NO faces, NO text, NO logos
+Output: Professional news agency photography"""
+
+    # Ensure prompt is under Flux Schnell's 2000 char limit
+    return final_prompt.strip()[:1950]
+
+
+_bg_cache: Optional[DiskLRUCache] = None
+_bg_cache_lock = threading.Lock()
+
+
+def _get_bg_cache() -> Optional[DiskLRUCache]:
+    global _bg_cache
+    if not BG_CACHE_ENABLED:
+        return None
+    with _bg_cache_lock:
+        if _bg_cache is None:
+            _bg_cache = DiskLRUCache(BG_CACHE_DIR, int(BG_CACHE_MAX_MB * 1024 * 1024), name="bg_cache", suffix=".img")
+        return _bg_cache
+
+
+def _normalize_prompt(prompt: str) -> str:
+    return re.sub(r"\s+", " ", prompt).strip().lower()
+
+
+def _plan_background(headline: str, category: str, flux_prompt: Optional[str], provider: ImageProvider) -> Tuple[str, int, Optional[str]]:
+    """
+    (prompt, seed, cache key) for one background.
+
+    With the cache on, seeds are derived from the prompt so the same prompt
+    always maps to the same image (and cache entry). Category fallbacks get
+    one of BG_FALLBACK_VARIANTS fixed seeds, picked by headline, so a run
+    full of fallbacks still varies but the set is tiny and stays cached.
+    """
+    prompt = build_bg_prompt(headline, category, flux_prompt)
+    if not BG_CACHE_ENABLED:
+        return prompt, random.randint(1, 1_000_000), None
+
+    normalized = _normalize_prompt(prompt)
+    if flux_prompt:
+        seed = int(cache_key(normalized)[:8], 16) % 1_000_000 + 1
+    else:
+        seed = int(cache_key(headline or "")[:8], 16) % max(1, BG_FALLBACK_VARIANTS) + 1
+    return prompt, seed, cache_key(provider.name, str(seed), normalized)
+
+
+def _provider_name(is_nano_banana: bool) -> Optional[str]:
+    # Gemini (Nano Banana) when asked for, otherwise the configured provider (Nebius Flux Schnell by default)
+    return "gemini" if is_nano_banana else None
+
+
+def generate_bg_bytes(
+    headline: str,
+    pov: str = "",
+    is_nano_banana: bool = False,
+    category: str = "general",
+    flux_prompt: Optional[str] = None
+) -> bytes:
+    """Generate one background and return the provider's encoded image bytes (cache first)."""
+    provider = get_image_provider(_provider_name(is_nano_banana))
+    final_prompt, seed, key = _plan_background(headline, category, flux_prompt, provider)
+    cache = _get_bg_cache()
+    if cache and key:
+        cached = cache.get(key)
+        if cached:
+            logging.info("♻️ Background cache hit")
+            return cached
+
+    image_bytes = provider.generate(final_prompt, size=BG_SIZE, seed=seed)
+    if cache and key:
+        cache.put(key, image_bytes)
+    return image_bytes
 
 
 def generate_custom_bg(
@@ -48,85 +151,114 @@ def generate_custom_bg(
         out_dir: Output directory
         is_nano_banana: Use Gemini (True) or Nebius Flux Schnell (False)
         category: News category (for fallback only)
-        article_image_url: Optional URL to article's featured image (for future use)
+        article_image_url: Unused here; article images are used via BG_MODE=article
+            (see generate_image.article_background)
         flux_prompt: AI-generated Flux Schnell optimized prompt from ChatGPT
 
     Returns:
-        Path to generated PNG image
+        Path to the generated image file (provider bytes as-is, no re-encode)
+
+    Rendering does not need a file: use generate_bg_bytes for the in-memory
+    path. This function is for when a file on disk is explicitly wanted.
     """
+    image_bytes = generate_bg_bytes(
+        headline, pov,
+        is_nano_banana=is_nano_banana,
+        category=category,
+        flux_prompt=flux_prompt
+    )
+    return save_image_bytes(image_bytes, out_dir)
+
+
+def image_type(data: bytes) -> Tuple[str, str]:
+    """(mime type, file extension) sniffed from magic bytes; JPEG if unknown."""
+    if data[:8] == b"\x89PNG\r\n\x1a\n":
+        return "image/png", "png"
+    if data[:4] == b"RIFF" and data[8:12] == b"WEBP":
+        return "image/webp", "webp"
+    return "image/jpeg", "jpg"
+
+
+def save_image_bytes(image_bytes: bytes, out_dir: str = "app/output") -> str:
+    """Write encoded image bytes unchanged to `out_dir`; returns the path."""
     os.makedirs(out_dir, exist_ok=True)
+    _, ext = image_type(image_bytes)
+    out_path = os.path.join(out_dir, f"news_{int(time.time())}_{uuid.uuid4().hex[:6]}.{ext}")
+    with open(out_path, "wb") as f:
+        f.write(image_bytes)
+    return out_path
 
-    # Build final Flux Schnell prompt
-    if flux_prompt:
-        # Use AI-generated prompt + add quality rules
-        final_prompt = f"""{flux_prompt}
 
-Quality: 4K UHD, ultra-detailed, photorealistic, sharp focus, professional depth of field, cinematic lighting, HDR color grading, editorial magazine quality, dark vignette edges, clean negative space for text overlay
+@dataclass
+class BgResult:
+    """Outcome of one background in a batch: image bytes or an error message."""
+    image: Optional[bytes] = None
+    error: Optional[str] = None
+    seconds: float = 0.0
+    cached: bool = False
 
-Restrictions: NO faces, NO text, NO logos, NO brands, NO watermarks
+    @property
+    def ok(self) -> bool:
+        return self.image is not None
 
-Aspect Ratio: 9:16 portrait (1080x1350px)
-Output: Award-winning photojournalism, Reuters/AFP/BBC quality"""
-    else:
-        # Fallback: Simple category-based prompt
-        category_styles = {
-            "politics": "parliament building silhouette, democratic symbols, authoritative blue and gold",
-            "cricket": "cricket stadium lights, sports energy, vibrant blue and green",
-            "bollywood": "cinema spotlight, glamorous purple and gold, entertainment flair",
-            "economy": "financial charts abstract, rupee symbol glow, green and red",
-            "tech": "futuristic circuit patterns, neon cyan and purple, digital innovation",
-            "breaking": "urgent red glow, dramatic speed lines, breaking news energy",
-            "education": "graduation cap, books, hopeful yellow and blue",
-            "disaster": "somber clouds with hope light, soft amber, respectful tone",
-            "positive": "sunrise celebration, uplifting orange and yellow, victory",
-            "general": "professional modern abstract, teal and gold, balanced"
-        }
-
-        style = category_styles.get(category, category_styles["general"])
-
-        final_prompt = f"""News background visual: {style}
-
-Subject inspired by: {headline[:100]}
 
-Quality: 4K UHD, photorealistic, cinematic, editorial magazine quality, 9:16 portrait
-Restrictions: NO faces, NO text, NO logos
-Output: Professional news agency photography"""
+async def agenerate_custom_bg_batch(
+    requests: List[Dict[str, Any]],
+    is_nano_banana: bool = False,
+    max_concurrency: int = BG_MAX_CONCURRENCY,
+    timeout_s: float = BG_REQUEST_TIMEOUT_S
+) -> List[BgResult]:
+    """Async core of generate_custom_bg_batch."""
+    provider = get_image_provider(_provider_name(is_nano_banana))
+    semaphore = asyncio.Semaphore(max(1, max_concurrency))
 
-    # Ensure prompt is under Flux Schnell's 2000 char limit
-    final_prompt = final_prompt.strip()[:1950]
-
-    seed = random.randint(1, 1_000_000)
-    filename = f"news_{int(time.time())}_{uuid.uuid4().hex[:6]}.png"
-    out_path = os.path.join(out_dir, filename)
-
-    if is_nano_banana:
-        # Use Google Gemini (Nano Banana)
-        if not genai_client:
-            raise RuntimeError("Google GenAI not configured. Set GOOGLE_API_KEY.")
-        response = genai_client.models.generate_content(
-            model="gemini-2.5-flash-image-preview",
-            contents=final_prompt,
-            config={"seed": seed},
-        )
-        for part in response.candidates[0].content.parts:
-            if getattr(part, "inline_data", None):
-                img = Image.open(BytesIO(part.inline_data.data))
-                img.save(out_path, format="PNG")
-                return out_path
-        raise RuntimeError("❌ No image returned from Gemini.")
-    else:
-        # Use Nebius Flux Schnell (default, per user preference)
-        if not NEBIUS_API_KEY:
-            raise RuntimeError("Nebius Studio not configured. Set NEBIUS_API_KEY.")
-
-        response = nebius_client.images.generate(
-            model="black-forest-labs/flux-schnell",
-            prompt=final_prompt,
-            response_format="b64_json",
-            size="1080x1350"
-        )
-
-        b64_image = response.data[0].b64_json
-        img = Image.open(BytesIO(base64.b64decode(b64_image)))
-        img.save(out_path, format="PNG")
-        return out_path
+    cache = _get_bg_cache()
+
+    async def one(req: Dict[str, Any]) -> BgResult:
+        prompt, seed, key = _plan_background(req.get("headline", ""), req.get("category") or "general", req.get("flux_prompt"), provider)
+        if cache and key:
+            cached = cache.get(key)
+            if cached:
+                return BgResult(image=cached, cached=True)
+        async with semaphore:
+            started = time.monotonic()
+            try:
+                image = await asyncio.wait_for(
+                    provider.agenerate(prompt, size=BG_SIZE, seed=seed),
+                    timeout=timeout_s
+                )
+                if cache and key:
+                    cache.put(key, image)
+                return BgResult(image=image, seconds=time.monotonic() - started)
+            except asyncio.TimeoutError:
+                return BgResult(error=f"timed out after {timeout_s:.0f}s", seconds=time.monotonic() - started)
+            except Exception as e:
+                return BgResult(error=f"{type(e).__name__}: {e}", seconds=time.monotonic() - started)
+
+    return await asyncio.gather(*(one(r) for r in requests))
+
+
+def generate_custom_bg_batch(
+    requests: List[Dict[str, Any]],
+    is_nano_banana: bool = False,
+    max_concurrency: int = BG_MAX_CONCURRENCY,
+    timeout_s: float = BG_REQUEST_TIMEOUT_S
+) -> List[BgResult]:
+    """
+    Generate many backgrounds concurrently.
+
+    Each request is a dict with `headline`, `category` and `flux_prompt`
+    (same meaning as generate_custom_bg). At most `max_concurrency`
+    provider calls are in flight and each is cut off after `timeout_s`.
+    Returns one BgResult per request, in input order; failures never raise.
+    """
+    if not requests:
+        return []
+    started = time.monotonic()
+    results = asyncio.run(agenerate_custom_bg_batch(
+        requests, is_nano_banana=is_nano_banana, max_concurrency=max_concurrency, timeout_s=timeout_s
+    ))
+    ok = sum(1 for r in results if r.ok)
+    hits = sum(1 for r in results if r.cached)
+    logging.info(f"🎨 Generated {ok}/{len(results)} backgrounds ({hits} from cache) in {time.monotonic() - started:.1f}s (concurrency={max_concurrency})")
+    return results
@@ -0,0 +1,124 @@
+import os
+import uuid
+import hashlib
+import logging
+import threading
+from typing import Optional
+
+from app import metrics
+
+
+def cache_key(*parts: str) -> str:
+    """Stable hex key from string parts."""
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+
+class DiskLRUCache:
+    """
+    Byte-blob cache on local disk with a size budget and LRU eviction.
+
+    One file per entry; recency is tracked through the file mtime (bumped on
+    every hit) so the cache survives restarts and is shared by every process
+    pointing at the same directory. Writes are atomic (tmp file + rename).
+    """
+
+    def __init__(self, directory: str, max_bytes: int, name: str = "cache", suffix: str = ".bin"):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.name = name
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._size: Optional[int] = None  # computed lazily on first write
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + self.suffix)
+
+    def get(self, key: str) -> Optional[bytes]:
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            metrics.incr(f"{self.name}.miss")
+            return None
+        except OSError as e:
+            logging.warning(f"⚠️ {self.name}: could not read {path}: {e}")
+            metrics.incr(f"{self.name}.miss")
+            return None
+        try:
+            os.utime(path, None)  # LRU bump
+        except OSError:
+            pass
+        metrics.incr(f"{self.name}.hit")
+        return data
+
+    def contains(self, key: str) -> bool:
+        return os.path.exists(self._path(key))
+
+    def put(self, key: str, data: bytes) -> None:
+        if len(data) > self.max_bytes:
+            return
+        path = self._path(key)
+        tmp = f"{path}.{uuid.uuid4().hex[:8]}.tmp"
+        try:
+            old_size = os.path.getsize(path) if os.path.exists(path) else 0
+            with open(tmp, "wb") as f:
+                f.write(data)
+            os.replace(tmp, path)
+        except OSError as e:
+            logging.warning(f"⚠️ {self.name}: could not write {path}: {e}")
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+            return
+
+        with self._lock:
+            if self._size is None:
+                self._size = self._scan_size()
+            else:
+                self._size += len(data) - old_size
+            if self._size > self.max_bytes:
+                self._evict()
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(self.suffix):
+                    st = entry.stat()
+                    entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def _scan_size(self) -> int:
+        return sum(size for _, size, _ in self._entries())
+
+    def _evict(self) -> None:
+        """Drop least-recently-used entries until under 90% of the budget."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        target = int(self.max_bytes * 0.9)
+        evicted = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+                total -= size
+                evicted += 1
+            except OSError:
+                pass
+        self._size = total
+        if evicted:
+            metrics.incr(f"{self.name}.evicted", evicted)
+            logging.info(f"🧹 {self.name}: evicted {evicted} entries, {total / 1e6:.1f}MB in use")
+
+    def clear(self) -> None:
+        with self._lock:
+            for _, _, path in self._entries():
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._size = 0
@@ -0,0 +1,198 @@
+"""
+Vendored web fonts for post rendering.
+
+Posts use Montserrat, Inter and Bebas Neue (SIL Open Font License 1.1).
+Instead of fetching them from fonts.googleapis.com on every render, they
+are committed to app/assets/fonts as WOFF2 (one static instance per family
+and weight, subset to FONT_UNICODES) and injected into the post HTML as
+inline @font-face rules, so rendering needs no network and always uses the
+same glyphs.
+
+To regenerate the files (needs fontTools and brotli, see requirements.txt),
+from Google Fonts:
+
+    python -m app.fonts
+
+or, offline, from the family TTFs of https://github.com/google/fonts
+(static or variable, e.g. Montserrat[wght].ttf):
+
+    python -m app.fonts path/to/ttf-dir
+
+If app/assets/fonts is missing, post_font_css() falls back to the Google
+Fonts stylesheet.
+"""
+import io
+import os
+import re
+import sys
+import base64
+import logging
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+
+FONTS_DIR = os.path.join(os.path.dirname(__file__), "assets", "fonts")
+
+# family -> weights used by the post template
+FONT_FAMILIES: Dict[str, List[int]] = {
+    "Montserrat": [700, 800, 900],
+    "Inter": [500, 600, 700, 800, 900],
+    "Bebas Neue": [400],
+}
+GOOGLE_FONTS_LINK = (
+    '<link href="https://fonts.googleapis.com/css2?family=Montserrat:wght@700;800;900'
+    '&family=Inter:wght@500;600;700;800;900&family=Bebas+Neue&display=swap" rel="stylesheet">'
+)
+
+# Basic Latin + Latin-1, typographic punctuation, ₹/€, ™, arrows, minus.
+# Emoji and other scripts come from the system fonts.
+FONT_UNICODES = (
+    "U+0000-00FF,U+0131,U+0152-0153,U+02BB-02BC,U+02C6,U+02DA,U+02DC,"
+    "U+2000-206F,U+20AC,U+20B9,U+2122,U+2190-2193,U+2212,U+2215"
+)
+
+_FILE_RE = re.compile(r"^(?P<family>[A-Za-z]+)-(?P<weight>\d{3})\.woff2$")
+
+
+def _file_name(family: str, weight: int) -> str:
+    return f"{family.replace(' ', '')}-{weight}.woff2"
+
+
+def _family_names() -> Dict[str, str]:
+    """File-name stem -> CSS family name."""
+    return {family.replace(" ", ""): family for family in FONT_FAMILIES}
+
+
+def vendored_fonts(fonts_dir: str = FONTS_DIR) -> List[Tuple[str, int, str]]:
+    """(family, weight, path) for every vendored font file."""
+    names = _family_names()
+    found = []
+    try:
+        entries = sorted(os.listdir(fonts_dir))
+    except FileNotFoundError:
+        return []
+    for entry in entries:
+        m = _FILE_RE.match(entry)
+        if m and m.group("family") in names:
+            found.append((names[m.group("family")], int(m.group("weight")), os.path.join(fonts_dir, entry)))
+    return found
+
+
+@lru_cache(maxsize=4)
+def post_font_css(fonts_dir: str = FONTS_DIR) -> str:
+    """
+    Markup for the post <head>: inline @font-face rules for the vendored
+    fonts, or the Google Fonts <link> if none are vendored. Built once per
+    process.
+    """
+    fonts = vendored_fonts(fonts_dir)
+    if not fonts:
+        logging.warning("⚠️ No vendored fonts in app/assets/fonts (run `python -m app.fonts`); using Google Fonts")
+        return GOOGLE_FONTS_LINK
+
+    rules = []
+    for family, weight, path in fonts:
+        with open(path, "rb") as f:
+            data = base64.b64encode(f.read()).decode("ascii")
+        # font-display: block, so document.fonts.ready means the real glyphs are in use
+        rules.append(
+            f"@font-face {{ font-family: '{family}'; font-style: normal; font-weight: {weight}; "
+            f"font-display: block; unicode-range: {FONT_UNICODES}; "
+            f"src: url(data:font/woff2;base64,{data}) format('woff2'); }}"
+        )
+    return "<style>\n" + "\n".join(rules) + "\n</style>"
+
+
+def _latin_woff2_url(css: str) -> str:
+    """The woff2 URL of the `/* latin */` block in a Google Fonts css2 response."""
+    m = re.search(r"/\* latin \*/\s*@font-face\s*{[^}]*?src:\s*url\(([^)]+\.woff2)\)", css)
+    if not m:
+        raise ValueError("no latin woff2 in Google Fonts response")
+    return m.group(1)
+
+
+def _subset(data: bytes, weight: Optional[int] = None) -> bytes:
+    """
+    Subset to FONT_UNICODES as WOFF2, first pinning a variable font to
+    `weight` (other axes at their defaults). Raises if fontTools or brotli is
+    missing rather than writing unsubset files.
+    """
+    try:
+        import brotli  # noqa: F401  (WOFF2 compression)
+        from fontTools import subset
+        from fontTools.ttLib import TTFont
+        from fontTools.varLib import instancer
+    except ImportError as e:
+        raise RuntimeError(f"Vendoring fonts needs fontTools and brotli (pip install -r requirements.txt): {e}")
+    options = subset.Options()
+    options.flavor = "woff2"
+    options.layout_features = ["kern", "liga", "calt", "tnum"]
+    font = TTFont(io.BytesIO(data))
+    if "fvar" in font:
+        axes = {axis.axisTag: (weight if axis.axisTag == "wght" else None) for axis in font["fvar"].axes}
+        font = instancer.instantiateVariableFont(font, axes, updateFontNames=True)
+    subsetter = subset.Subsetter(options)
+    subsetter.populate(unicodes=subset.parse_unicodes(FONT_UNICODES))
+    subsetter.subset(font)
+    out = io.BytesIO()
+    font.flavor = "woff2"
+    font.save(out)
+    return out.getvalue()
+
+
+def _local_source(source_dir: str, family: str) -> str:
+    """The upright TTF of `family` in `source_dir` (e.g. Montserrat[wght].ttf, BebasNeue-Regular.ttf)."""
+    stem = family.replace(" ", "")
+    for entry in sorted(os.listdir(source_dir)):
+        if entry.startswith(stem) and entry.lower().endswith(".ttf") and "italic" not in entry.lower():
+            return os.path.join(source_dir, entry)
+    raise FileNotFoundError(f"No {stem}*.ttf in {source_dir}")
+
+
+def _download(family: str, weight: int) -> bytes:
+    """The latin WOFF2 of one family/weight from Google Fonts."""
+    import requests
+
+    # A modern UA gets woff2 with per-script unicode-range blocks
+    headers = {"User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/126.0 Safari/537.36"}
+    css_url = f"https://fonts.googleapis.com/css2?family={family.replace(' ', '+')}:wght@{weight}&display=block"
+    css = requests.get(css_url, headers=headers, timeout=30)
+    css.raise_for_status()
+    font = requests.get(_latin_woff2_url(css.text), headers=headers, timeout=30)
+    font.raise_for_status()
+    return font.content
+
+
+def vendor_fonts(fonts_dir: str = FONTS_DIR, source_dir: Optional[str] = None) -> List[str]:
+    """Write every family/weight, subset, into `fonts_dir`: from `source_dir` TTFs if given, else Google Fonts."""
+    os.makedirs(fonts_dir, exist_ok=True)
+    written = []
+    for family, weights in FONT_FAMILIES.items():
+        for weight in weights:
+            if source_dir:
+                with open(_local_source(source_dir, family), "rb") as f:
+                    data = _subset(f.read(), weight)
+            else:
+                data = _subset(_download(family, weight), weight)
+            path = os.path.join(fonts_dir, _file_name(family, weight))
+            with open(path, "wb") as f:
+                f.write(data)
+            written.append(path)
+            print(f"  {family} {weight}: {len(data) / 1024:.1f} KB -> {path}")
+    return written
+
+
+@lru_cache(maxsize=16)
+def sfnt_bytes(path: str) -> bytes:
+    """A vendored WOFF2 decompressed to TrueType, for FreeType builds without WOFF2 support."""
+    from fontTools.ttLib import woff2
+
+    out = io.BytesIO()
+    with open(path, "rb") as f:
+        woff2.decompress(f, out)
+    return out.getvalue()
+
+
+if __name__ == "__main__":
+    source = sys.argv[1] if len(sys.argv) > 1 else None
+    print(f"Vendoring post fonts into {FONTS_DIR}" + (f" from {source}" if source else ""))
+    vendor_fonts(source_dir=source)
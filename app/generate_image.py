@@ -1,12 +1,27 @@
-import os, io, re, asyncio, logging, base64, textwrap, pathlib, requests
+import os, io, re, time, random, logging, textwrap, pathlib, requests
+import numpy as np
 from datetime import datetime
+from functools import lru_cache
 from dateutil import tz
-from typing import Optional, List, Dict, Any
-from jinja2 import Environment, FileSystemLoader, select_autoescape
-from playwright.async_api import async_playwright
+from typing import Optional, List, Dict, Any, Tuple
+from concurrent.futures import Future, ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from jinja2 import Environment, FileSystemBytecodeCache, FileSystemLoader, Template, select_autoescape
 from PIL import Image, ImageDraw, ImageFilter, ImageEnhance
 import json
-from .custom_bg import generate_custom_bg
+from .custom_bg import generate_custom_bg_batch, image_type, save_image_bytes
+from .config import (
+    BG_MODE, BG_MAX_CONCURRENCY, BG_PREFETCH_TIMEOUT_S, BG_SAVE_DIR, BG_ITEM_DEADLINE_S,
+    ARTICLE_IMAGE_MAX_BYTES, ARTICLE_IMAGE_TIMEOUT_S, ARTICLE_IMAGE_MIN_SIDE, RENDER_PAGES,
+    RENDER_ENGINE, TEMPLATE_CACHE_DIR
+)
+from .bg_pool import get_background_pool, refill_background_pool
+from .render_service import asset_url, get_render_service
+from .render_client import get_render_client
+from .render_profiles import ASPECTS, DEFAULT_ASPECT, Aspect, RenderProfile, get_aspects, get_profile, save_image
+from .fonts import post_font_css
+from . import pillow_render
+from . import metrics
+from . import render_cache
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -86,88 +101,79 @@ def _hex_to_rgb(hex_color: str) -> tuple:
     hex_color = hex_color.lstrip('#')
     return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
 
-def _create_enhanced_gradient(colors: List[str], size: tuple = (1080, 1350)) -> bytes:
-    """Create a sophisticated gradient with noise and effects"""
+def _gradient_rows(color_stops: List[tuple], h: int) -> np.ndarray:
+    """(h, 3) uint8: one colour per row, color[0] -> color[1] -> color[2]"""
+    first = color_stops[0]
+    mid = color_stops[1] if len(color_stops) > 1 else color_stops[0]
+    last = color_stops[2] if len(color_stops) > 2 else color_stops[-1]
+
+    pos = np.arange(h, dtype=np.float64)[:, None] / h
+    upper = pos <= 0.5
+    t = np.where(upper, pos * 2, (pos - 0.5) * 2)
+    start = np.where(upper, np.array(first, dtype=np.float64), np.array(mid, dtype=np.float64))
+    end = np.where(upper, np.array(mid, dtype=np.float64), np.array(last, dtype=np.float64))
+    return (start + (end - start) * t).astype(np.uint8)  # truncates like int()
+
+@lru_cache(maxsize=4)
+def _noise_overlay(size: tuple) -> Image.Image:
+    """Sparse white noise (fixed seed, so it only depends on size)"""
+    w, h = size
+    rng = random.Random(42)  # Consistent noise pattern
+    noise = np.zeros((h, w, 4), dtype=np.uint8)
+    noise[..., :3] = 255
+    # Points are drawn in order, so a later point on the same pixel wins
+    for _ in range(w * h // 100):
+        x = rng.randint(0, w - 1)
+        y = rng.randint(0, h - 1)
+        noise[y, x, 3] = rng.randint(5, 15)
+    noise[noise[..., 3] == 0] = 0
+    return Image.fromarray(noise, "RGBA")
+
+@lru_cache(maxsize=4)
+def _vignette_overlay(size: tuple) -> Image.Image:
+    """Radial black vignette in 4x4 blocks (max alpha 60)"""
     w, h = size
-    
-    # Create base gradient
-    img = Image.new("RGB", (w, h))
-    draw = ImageDraw.Draw(img)
-    
-    # Multi-stop gradient
-    color_stops = [_hex_to_rgb(c) for c in colors]
-    
-    for y in range(h):
-        # Calculate position in gradient (0 to 1)
-        pos = y / h
-        
-        # Determine which colors to interpolate between
-        if pos <= 0.5:
-            # First half: color[0] to color[1]
-            t = pos * 2
-            start_color = color_stops[0]
-            end_color = color_stops[1] if len(color_stops) > 1 else color_stops[0]
-        else:
-            # Second half: color[1] to color[2]
-            t = (pos - 0.5) * 2
-            start_color = color_stops[1] if len(color_stops) > 1 else color_stops[0]
-            end_color = color_stops[2] if len(color_stops) > 2 else color_stops[-1]
-        
-        # Interpolate colors
-        r = int(start_color[0] + (end_color[0] - start_color[0]) * t)
-        g = int(start_color[1] + (end_color[1] - start_color[1]) * t)
-        b = int(start_color[2] + (end_color[2] - start_color[2]) * t)
-        
-        draw.line([(0, y), (w, y)], fill=(r, g, b))
-    
-    # Add subtle noise texture
-    noise_overlay = Image.new("RGBA", (w, h), (0, 0, 0, 0))
-    noise_draw = ImageDraw.Draw(noise_overlay)
-    
-    import random
-    random.seed(42)  # Consistent noise pattern
-    for _ in range(w * h // 100):  # Sparse noise
-        x = random.randint(0, w-1)
-        y = random.randint(0, h-1)
-        alpha = random.randint(5, 15)
-        noise_draw.point((x, y), fill=(255, 255, 255, alpha))
-    
-    # Combine base gradient with noise
-    img = Image.alpha_composite(img.convert("RGBA"), noise_overlay)
-    
-    # Add radial vignette
-    vignette = Image.new("RGBA", (w, h), (0, 0, 0, 0))
-    vignette_draw = ImageDraw.Draw(vignette)
-    
-    # Create radial vignette effect
     center_x, center_y = w // 2, h // 2
-    max_distance = ((w/2)**2 + (h/2)**2)**0.5
-    
-    for y in range(0, h, 4):  # Skip pixels for performance
-        for x in range(0, w, 4):
-            distance = ((x - center_x)**2 + (y - center_y)**2)**0.5
-            vignette_strength = min(1.0, (distance / max_distance) * 0.8)
-            alpha = int(vignette_strength * 60)  # Max 60 alpha
-            vignette_draw.rectangle([x, y, x+3, y+3], fill=(0, 0, 0, alpha))
-    
-    # Apply vignette
-    img = Image.alpha_composite(img, vignette)
-    
-    # Convert back to RGB and save
-    img = img.convert("RGB")
-    
-    # Enhance contrast slightly
-    enhancer = ImageEnhance.Contrast(img)
-    img = enhancer.enhance(1.1)
-    
-    # Save to bytes
+    max_distance = ((w / 2) ** 2 + (h / 2) ** 2) ** 0.5
+
+    ys = np.arange(0, h, 4, dtype=np.float64)[:, None]
+    xs = np.arange(0, w, 4, dtype=np.float64)[None, :]
+    distance = np.sqrt((xs - center_x) ** 2 + (ys - center_y) ** 2)
+    alpha = (np.minimum(1.0, (distance / max_distance) * 0.8) * 60).astype(np.uint8)
+
+    vignette = np.zeros((h, w, 4), dtype=np.uint8)
+    vignette[..., 3] = np.repeat(np.repeat(alpha, 4, axis=0), 4, axis=1)[:h, :w]
+    return Image.fromarray(vignette, "RGBA")
+
+@lru_cache(maxsize=32)
+def _create_enhanced_gradient(colors: tuple, size: tuple = (1080, 1350)) -> bytes:
+    """
+    Create a sophisticated gradient with noise and effects (JPEG bytes).
+
+    Vectorized with NumPy; the noise and vignette layers depend only on size
+    and are shared, and the result is memoized per (colors, size), so each
+    theme's gradient is computed once per process. `colors` must be hashable
+    (use gradient_background() for lists).
+    """
+    w, h = size
+    rows = _gradient_rows([_hex_to_rgb(c) for c in colors], h)
+    img = Image.fromarray(np.ascontiguousarray(np.broadcast_to(rows[:, None, :], (h, w, 3))), "RGB")
+
+    # Noise, then radial vignette
+    img = Image.alpha_composite(img.convert("RGBA"), _noise_overlay(size))
+    img = Image.alpha_composite(img, _vignette_overlay(size))
+
+    # Convert back to RGB and enhance contrast slightly
+    img = ImageEnhance.Contrast(img.convert("RGB")).enhance(1.1)
+
     output = io.BytesIO()
     img.save(output, format="JPEG", quality=92)
     return output.getvalue()
 
-def _image_to_data_uri(img_bytes: bytes) -> str:
-    """Convert image bytes to data URI"""
-    return "data:image/jpeg;base64," + base64.b64encode(img_bytes).decode("ascii")
+def gradient_background(category: str, size: tuple = (1080, 1350)) -> bytes:
+    """Theme gradient for a category: instant, offline, no provider involved"""
+    theme = THEMES.get(category, THEMES["default"])
+    return _create_enhanced_gradient(tuple(theme["gradient"]), size)
 
 def _cover_resize(img: Image.Image, size: tuple = (1080, 1350)) -> Image.Image:
     """Resize image to cover the given size maintaining aspect ratio"""
@@ -194,14 +200,35 @@ def _cover_resize(img: Image.Image, size: tuple = (1080, 1350)) -> Image.Image:
     
     return img.crop((left, top, right, bottom))
 
-def _download_photo_bytes(url: str) -> Optional[bytes]:
-    """Download image from URL with better error handling"""
+def _fetch_image(url: str, headers: Dict[str, str], max_bytes: int, timeout: float) -> Optional[bytes]:
+    """Stream an image response, rejecting non-image content types and bodies over max_bytes"""
+    with requests.get(url, headers=headers, timeout=timeout, stream=True) as response:
+        content_type = response.headers.get("content-type", "").split(";")[0].strip().lower()
+        if not response.ok or not content_type.startswith("image/") or content_type == "image/svg+xml":
+            logging.info(f"Skipping {url}: HTTP {response.status_code}, content-type {content_type or '?'}")
+            return None
+        declared = response.headers.get("content-length")
+        if declared and declared.isdigit() and int(declared) > max_bytes:
+            logging.info(f"Skipping {url}: {int(declared)} bytes exceeds {max_bytes}")
+            return None
+
+        chunks, total = [], 0
+        for chunk in response.iter_content(chunk_size=64 * 1024):
+            total += len(chunk)
+            if total > max_bytes:
+                logging.info(f"Skipping {url}: body exceeds {max_bytes} bytes")
+                return None
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+def _download_photo_bytes(url: str, max_bytes: int = ARTICLE_IMAGE_MAX_BYTES, timeout: float = ARTICLE_IMAGE_TIMEOUT_S) -> Optional[bytes]:
+    """Download image from URL (streamed, capped at max_bytes, image/* only)"""
     if not url or not url.startswith(('http://', 'https://')):
         return None
     
     headers = {
         "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 theaipoint/2.0",
-        "Accept": "image/webp,image/apng,image/svg+xml,image/*,*/*;q=0.8",
+        "Accept": "image/webp,image/apng,image/*,*/*;q=0.8",
         "Accept-Language": "en-US,en;q=0.9",
         "Cache-Control": "no-cache"
     }
@@ -211,62 +238,197 @@ def _download_photo_bytes(url: str) -> Optional[bytes]:
         if "unsplash.com/photos/" in url:
             download_url = url.rstrip("/") + "/download?force=true&w=1080"
             logging.info(f"Downloading Unsplash image: {download_url}")
-            response = requests.get(download_url, headers=headers, timeout=15, stream=True)
-            if response.ok and response.headers.get("content-type", "").startswith("image/"):
-                return response.content
+            return _fetch_image(download_url, headers, max_bytes, timeout)
         
         # Handle Pexels URLs
         elif "pexels.com/photo/" in url:
             logging.info(f"Processing Pexels URL: {url}")
-            page_response = requests.get(url, headers=headers, timeout=15)
+            page_response = requests.get(url, headers=headers, timeout=timeout)
             if page_response.ok:
                 # Extract high-res image URL from page
-                import re
                 og_image_match = re.search(r'<meta property="og:image" content="([^"]+)"', page_response.text)
                 if og_image_match:
-                    img_url = og_image_match.group(1)
-                    img_response = requests.get(img_url, headers=headers, timeout=15)
-                    if img_response.ok and img_response.headers.get("content-type", "").startswith("image/"):
-                        return img_response.content
+                    return _fetch_image(og_image_match.group(1), headers, max_bytes, timeout)
         
         # Handle direct image URLs
         else:
             logging.info(f"Downloading direct image: {url}")
-            response = requests.get(url, headers=headers, timeout=15, stream=True)
-            if response.ok and response.headers.get("content-type", "").startswith("image/"):
-                return response.content
+            return _fetch_image(url, headers, max_bytes, timeout)
                 
     except Exception as e:
         logging.warning(f"Failed to download image from {url}: {e}")
     
     return None
 
-def _process_background_image(title: str, pov: str, image_urls: List[str], theme: Dict[str, Any], is_nano_banana: bool = False, category: str = "general", article_image_url: Optional[str] = None, flux_prompt: Optional[str] = None) -> str:
-    """Generate background image using AI-generated Flux prompt. Returns data URI."""
-
-    # 1) Generate using ChatGPT-optimized Flux Schnell prompt
-    ai_path = generate_custom_bg(
-        title,
-        pov,
-        is_nano_banana=is_nano_banana,
-        category=category,
-        article_image_url=article_image_url,
-        flux_prompt=flux_prompt
-    )
-    if ai_path and os.path.exists(ai_path):
-        with open(ai_path, "rb") as f:
-            logging.info(f"✅ Generated post image ({'Nano Banana' if is_nano_banana else 'Flux Schnell'}) with AI-optimized prompt")
-            return _image_to_data_uri(f.read())
+def _decode_cover(data: bytes, size: tuple = (1080, 1350), min_side: int = ARTICLE_IMAGE_MIN_SIDE) -> Optional[Image.Image]:
+    """
+    Decode and cover-crop to `size`. JPEGs are decoded in draft mode at the
+    smallest DCT scale that still covers the target, which skips most of the
+    decode work for large photos. Images whose short side is under
+    `min_side` (thumbnails, logos) are rejected.
+    """
+    img = Image.open(io.BytesIO(data))
+    source_width, source_height = img.size
+    if min(source_width, source_height) < min_side:
+        logging.info(f"Skipping article image: {source_width}x{source_height} is too small")
+        return None
+    if img.format == "JPEG":
+        scale = max(size[0] / source_width, size[1] / source_height)
+        img.draft("RGB", (int(source_width * scale) + 1, int(source_height * scale) + 1))
+    return _cover_resize(img.convert("RGB"), size)
+
+def article_background(url: str, size: tuple = (1080, 1350)) -> Optional[bytes]:
+    """Publisher's article image as a ready-to-render background (JPEG bytes), or None"""
+    data = _download_photo_bytes(url)
+    if not data:
+        return None
+    try:
+        img = _decode_cover(data, size)
+    except Exception as e:
+        logging.warning(f"⚠️ Could not decode article image {url}: {e}")
+        return None
+    if img is None:
+        return None
+    output = io.BytesIO()
+    img.save(output, format="JPEG", quality=90)
+    return output.getvalue()
 
-    # 2) Fallback: static fallback.jpeg
+def _load_fallback_bytes() -> Optional[bytes]:
+    """Static assets/fallback.jpeg"""
     fallback_path = os.path.join(os.path.dirname(__file__), "assets", "fallback.jpeg")
     try:
         with open(fallback_path, "rb") as f:
-            logging.info("🖼️ Using static fallback.jpeg")
-            return _image_to_data_uri(f.read())
+            return f.read()
     except Exception as e:
         logging.error(f"❌ Could not load fallback.jpeg: {e}")
-        return ""
+        return None
+
+def _fallback_background(category: str) -> Optional[bytes]:
+    """Pre-warmed pool background for the category, else static fallback.jpeg."""
+    pool = get_background_pool()
+    if pool is not None:
+        pooled = pool.take(category if category in THEMES else "default")
+        if pooled:
+            return pooled
+    return _load_fallback_bytes()
+
+def refill_backgrounds(budget_s: Optional[float] = None) -> int:
+    """Top up the per-category background pool (run between scheduled slots)."""
+    if BG_MODE == "gradient":
+        return 0
+    if budget_s is None:
+        return refill_background_pool(THEMES)
+    return refill_background_pool(THEMES, budget_s=budget_s)
+
+def prepare_backgrounds(news_items: List[Dict[str, Any]], is_nano_banana: bool = False, deadline_s: float = BG_ITEM_DEADLINE_S) -> List[Optional[bytes]]:
+    """
+    Resolve the background for every item before rendering.
+
+    In BG_MODE=article the publisher's image is used where available.
+    Backgrounds prefetched during LLM streaming (`bg_future`) are awaited;
+    everything else is generated concurrently via generate_custom_bg_batch.
+    Nothing waits on the provider longer than `deadline_s`: an item that
+    misses it (or fails) gets a pooled background for its category, or
+    fallback.jpeg if the pool is empty. Returns image bytes per item, in
+    input order.
+    """
+    if BG_MODE == "gradient":
+        return [gradient_background(item.get("category") or "default") for item in news_items]
+
+    backgrounds: List[Optional[bytes]] = [None] * len(news_items)
+    if BG_MODE == "article":
+        # Publisher images first; only items without a usable one go to the provider
+        with ThreadPoolExecutor(max_workers=BG_MAX_CONCURRENCY, thread_name_prefix="article-bg") as pool:
+            backgrounds = list(pool.map(lambda item: article_background(item.get("article_image_url") or ""), news_items))
+        logging.info(f"📰 Using {sum(1 for b in backgrounds if b)}/{len(news_items)} article images as backgrounds")
+
+    late = []
+    pending = []
+    # Prefetches have been running since the LLM stage; they share one deadline
+    prefetch_deadline = time.monotonic() + min(deadline_s, BG_PREFETCH_TIMEOUT_S)
+    for idx, item in enumerate(news_items):
+        if backgrounds[idx] is not None:
+            continue
+        bg_future = item.get("bg_future")
+        if bg_future is not None:
+            try:
+                backgrounds[idx] = bg_future.result(timeout=max(0.0, prefetch_deadline - time.monotonic()))
+                continue
+            except FutureTimeoutError:
+                logging.warning(f"⚠️ Prefetched background for item {idx + 1} missed the {deadline_s:.0f}s deadline")
+                late.append(idx)
+                continue
+            except Exception as e:
+                logging.warning(f"⚠️ Prefetched background for item {idx + 1} unavailable ({e}); regenerating")
+        pending.append(idx)
+
+    results = generate_custom_bg_batch(
+        [
+            {
+                "headline": news_items[idx].get("title") or "",
+                "category": news_items[idx].get("category") or "general",
+                "flux_prompt": news_items[idx].get("image_generation_prompt") or None,
+            }
+            for idx in pending
+        ],
+        is_nano_banana=is_nano_banana,
+        timeout_s=deadline_s
+    )
+    for idx, result in zip(pending, results):
+        if result.ok:
+            backgrounds[idx] = result.image
+        else:
+            logging.warning(f"⚠️ Background for item {idx + 1} failed ({result.error}); using pooled fallback")
+            late.append(idx)
+    for idx in sorted(late):
+        backgrounds[idx] = _fallback_background(news_items[idx].get("category") or "default")
+    metrics.log_summary("image.")
+    if late:
+        metrics.log_summary("bg_pool.")
+    return backgrounds
+
+def _process_background_image(title: str, pov: str, image_urls: List[str], theme: Dict[str, Any], is_nano_banana: bool = False, category: str = "general", article_image_url: Optional[str] = None, flux_prompt: Optional[str] = None, bg_future: Optional[Future] = None, background_image: Optional[bytes] = None) -> Optional[bytes]:
+    """Generate background image using AI-generated Flux prompt. Returns the image bytes (None if nothing worked)."""
+
+    # 0) Background already generated (batch) or started while the LLM was streaming this item
+    if background_image is None and bg_future is not None:
+        try:
+            background_image = bg_future.result(timeout=min(BG_PREFETCH_TIMEOUT_S, BG_ITEM_DEADLINE_S))
+            logging.info("⚡ Using background prefetched during LLM streaming")
+        except Exception as e:
+            logging.warning(f"⚠️ Prefetched background unavailable ({e}); generating now")
+    if not background_image and BG_MODE == "gradient":
+        background_image = _create_enhanced_gradient(tuple(theme["gradient"]))
+    if not background_image and BG_MODE == "article" and article_image_url:
+        background_image = article_background(article_image_url)
+        if background_image:
+            logging.info("📰 Using article image as background")
+
+    # 1) Generate using ChatGPT-optimized Flux Schnell prompt (in memory, no file)
+    # (bounded by the per-item deadline, like prepare_backgrounds)
+    if not background_image:
+        result = generate_custom_bg_batch(
+            [{"headline": title, "category": category, "flux_prompt": flux_prompt}],
+            is_nano_banana=is_nano_banana,
+            timeout_s=BG_ITEM_DEADLINE_S
+        )[0]
+        if result.ok:
+            background_image = result.image
+            logging.info(f"✅ Generated post image ({'Nano Banana' if is_nano_banana else 'Flux Schnell'}) with AI-optimized prompt")
+        else:
+            logging.warning(f"⚠️ Background generation failed ({result.error})")
+
+    if background_image:
+        if BG_SAVE_DIR:
+            logging.info(f"💾 Saved background: {save_image_bytes(background_image, BG_SAVE_DIR)}")
+        return background_image
+
+    # 2) Fallback: pooled background for the category, else static fallback.jpeg
+    fallback = _fallback_background(category)
+    if fallback:
+        logging.info("🖼️ Using fallback background")
+        return fallback
+    return None
 
 def _generate_smart_cta(category: str, title: str) -> str:
     """Generate contextually relevant CTA text"""
@@ -344,46 +506,53 @@ def _determine_headline_size(title: str) -> str:
     else:
         return "h-sm"
 
-async def _render_html_to_image(html_content: str, output_path: pathlib.Path) -> None:
-    """Render HTML to 4K image using Playwright with optimized settings"""
-    async with async_playwright() as playwright:
-        browser = await playwright.chromium.launch(
-            headless=True,
-            args=[
-                '--no-sandbox',
-                '--disable-dev-shm-usage',
-                '--font-render-hinting=none',  # Better font rendering
-                '--force-color-profile=srgb',  # Better color accuracy
-            ]
-        )
+# Post layout: app/templates/post_template.html, compiled once per process
+# (bytecode cached on disk across processes). The Pillow engine in
+# pillow_render.py draws the same layout.
+if TEMPLATE_CACHE_DIR:
+    os.makedirs(TEMPLATE_CACHE_DIR, exist_ok=True)
+TEMPLATE_ENV = Environment(
+    loader=FileSystemLoader(str(TEMPLATES_DIR)),
+    autoescape=select_autoescape(["html"]),
+    bytecode_cache=FileSystemBytecodeCache(TEMPLATE_CACHE_DIR) if TEMPLATE_CACHE_DIR else None,
+    auto_reload=False,  # templates ship with the code; skip the per-render mtime check
+)
+POST_TEMPLATE_NAME = "post_template.html"
+
+@lru_cache(maxsize=1)
+def get_post_template() -> Template:
+    """The compiled post template"""
+    return TEMPLATE_ENV.get_template(POST_TEMPLATE_NAME)
+
+@lru_cache(maxsize=None)
+def theme_css(category: str) -> str:
+    """The theme's CSS custom properties for :root, rendered once per category"""
+    theme = THEMES.get(category, THEMES["default"])
+    return (
+        f"--brand: {theme['brand']}; --accent: {theme['accent']};\n"
+        f"      --brandDark: {theme['brandDark']}; --accentDark: {theme['accentDark']};"
+    )
 
-        try:
-            # 4K rendering: deviceScaleFactor=3 for ultra-sharp text
-            page = await browser.new_page(
-                viewport={"width": 1080, "height": 1350, "deviceScaleFactor": 3}
-            )
-
-            # Set content and wait for everything to load
-            await page.set_content(html_content, wait_until="networkidle")
-
-            # Wait for fonts and images to fully load
-            await page.wait_for_timeout(800)
-
-            # Take 4K screenshot with highest quality
-            await page.screenshot(
-                path=str(output_path),
-                type="jpeg",
-                quality=95,  # Higher quality for 4K
-                full_page=False,
-                omit_background=False
-            )
-            
-            logging.info(f"Successfully rendered image: {output_path}")
-            
-        finally:
-            await browser.close()
-
-def make_post_image(
+def render_post_html(context: Dict[str, Any]) -> str:
+    """
+    Post HTML for a build_post_context() context. The background is only
+    referenced by URL; render it together with post_assets(context).
+    """
+    return get_post_template().render(font_css=post_font_css(), theme_css=theme_css(context["category"]), **context)
+
+
+def post_assets(context: Dict[str, Any]) -> Dict[str, bytes]:
+    """URL -> bytes for the resources render_post_html(context) refers to"""
+    if not context.get("background_image"):
+        return {}
+    return {context["background_url"]: context["background_image"]}
+
+def _render_html_to_image(html_content: str, output_path: pathlib.Path, assets: Optional[Dict[str, bytes]] = None, profile: Optional[RenderProfile] = None) -> None:
+    """Render HTML to an image on the persistent Chromium (see render_service)"""
+    get_render_service().render(html_content, output_path, assets, profile)
+    logging.info(f"Successfully rendered image: {output_path}")
+
+def build_post_context(
     title: str,
     pov: str,
     image_urls: List[str] = None,
@@ -394,10 +563,12 @@ def make_post_image(
     output_filename: Optional[str] = None,
     is_nano_banana: bool = False,
     article_image_url: Optional[str] = None,
-    flux_prompt: Optional[str] = None
-) -> str:
+    flux_prompt: Optional[str] = None,
+    bg_future: Optional[Future] = None,
+    background_image: Optional[bytes] = None
+) -> Tuple[Dict[str, Any], pathlib.Path]:
     """
-    Generate a professional social media post image
+    Resolve everything a post needs to be rendered (by either engine)
     
     Args:
         title: Main headline text
@@ -408,9 +579,13 @@ def make_post_image(
         category: Override category detection
         cta_text: Custom CTA text
         output_filename: Custom output filename
+        bg_future: Background already being generated (Future of image
+            bytes), e.g. started while the LLM was still streaming this item
+        background_image: Background image bytes already generated (see
+            prepare_backgrounds); skips generation entirely
     
     Returns:
-        Path to the generated image file
+        (template context, output path for the image)
     """
     
     try:
@@ -426,12 +601,14 @@ def make_post_image(
         pov_clean = re.sub(r"\[\w+\]", "", pov_clean)
 
         # Get background using AI-generated Flux Schnell prompt
-        background_data_uri = _process_background_image(
+        background = _process_background_image(
             title, pov, image_urls or [], theme,
             is_nano_banana=is_nano_banana,
             category=detected_category,
             article_image_url=article_image_url,
-            flux_prompt=flux_prompt
+            flux_prompt=flux_prompt,
+            bg_future=bg_future,
+            background_image=background_image
         )
         
         # Generate smart CTA
@@ -452,296 +629,11 @@ def make_post_image(
         
         output_path = OUTPUT_DIR / output_filename
         
-        # Generate HTML
-        html_template = """
-<!DOCTYPE html>
-<html lang="en">
-<head>
-  <meta charset="utf-8" />
-  <meta name="viewport" content="width=device-width, initial-scale=1" />
-  <title>theaipoint - Social Post</title>
-  <!-- VIRAL TYPOGRAPHY: Bold, Thick, High-Contrast for Social Media -->
-  <link href="https://fonts.googleapis.com/css2?family=Montserrat:wght@700;800;900&family=Inter:wght@500;600;700;800;900&family=Bebas+Neue&display=swap" rel="stylesheet">
-  <style>
-    :root {
-      --w: 1080px; --h: 1350px; --pad: 48px;
-      --brand: {{ theme.brand }}; --accent: {{ theme.accent }};
-      --brandDark: {{ theme.brandDark }}; --accentDark: {{ theme.accentDark }};
-      --fg: #ffffff; --fgMuted: #d1d5db; --fgSecondary: #9ca3af;
-    }
-
-    * { box-sizing: border-box; margin: 0; padding: 0; }
-
-    html, body {
-      width: var(--w); height: var(--h);
-      font-family: 'Inter', -apple-system, BlinkMacSystemFont, sans-serif;
-      color: var(--fg); background: #000; overflow: hidden;
-      -webkit-font-smoothing: antialiased;
-      -moz-osx-font-smoothing: grayscale;
-      text-rendering: optimizeLegibility;
-      image-rendering: -webkit-optimize-contrast;
-    }
-
-    .bg-container { position: absolute; inset: 0; overflow: hidden; }
-    .bg-image {
-      position: absolute; inset: 0;
-      background: url("{{ background_data_uri }}") center/cover no-repeat;
-      filter: brightness(0.75) contrast(1.1);
-    }
-    .overlay {
-      position: absolute; inset: 0;
-      background: linear-gradient(180deg,
-        rgba(0,0,0,0.5) 0%,
-        rgba(0,0,0,0.25) 30%,
-        rgba(0,0,0,0.4) 70%,
-        rgba(0,0,0,0.85) 100%);
-    }
-
-    .container {
-      position: relative; width: 100%; height: 100%; padding: var(--pad);
-      display: flex; flex-direction: column; z-index: 10;
-    }
-
-    /* Branding - Enhanced */
-    .header {
-      display: flex; justify-content: space-between; align-items: center; margin-bottom: 32px;
-    }
-    .brand {
-      display: flex; flex-direction: column; gap: 4px;
-    }
-    .brand-text {
-      font-family: 'Montserrat', sans-serif;
-      font-weight: 900;
-      font-size: 42px;
-      color: #ffffff;
-      letter-spacing: -1px;
-      text-shadow: 0 4px 12px rgba(0,0,0,0.95), 0 2px 4px rgba(0,0,0,0.8);
-    }
-    .tagline {
-      font-family: 'Inter', sans-serif;
-      font-size: 11px;
-      color: var(--brand);
-      font-weight: 800;
-      text-transform: uppercase;
-      letter-spacing: 3px;
-    }
-
-    /* Breaking Badge - NEW */
-    .breaking-badge {
-      background: linear-gradient(135deg, #ff0000, #ff4444);
-      color: #fff; padding: 10px 18px; border-radius: 8px;
-      font-weight: 800; font-family: 'DM Sans', sans-serif; font-size: 14px;
-      text-transform: uppercase; letter-spacing: 1.5px;
-      box-shadow: 0 0 20px rgba(255,0,0,0.5), 0 4px 12px rgba(0,0,0,0.6);
-      animation: pulse 2s ease-in-out infinite;
-    }
-
-    @keyframes pulse {
-      0%, 100% { transform: scale(1); }
-      50% { transform: scale(1.05); }
-    }
-
-    /* Category Pill - Enhanced */
-    .category-pill {
-      display: inline-flex; align-items: center; gap: 8px;
-      background: linear-gradient(135deg, var(--brand), var(--accent));
-      padding: 10px 18px; border-radius: 20px;
-      font-weight: 700; font-size: 14px; font-family: 'DM Sans', sans-serif;
-      text-transform: uppercase; letter-spacing: 0.5px;
-      box-shadow: 0 4px 12px rgba(0,0,0,0.4);
-    }
-    .category-icon { font-size: 18px; }
-
-    /* Headline - VIRAL OPTIMIZED: Bold, Thick, Punchy */
-    .headline {
-      font-family: 'Montserrat', sans-serif;
-      font-weight: 900;
-      line-height: 1.05;
-      color: #ffffff;
-      letter-spacing: -1.5px;
-      margin-bottom: 32px;
-      text-shadow: 0 4px 8px rgba(0,0,0,1),
-                   0 8px 24px rgba(0,0,0,0.8),
-                   0 2px 4px rgba(0,0,0,0.9);
-      word-wrap: break-word;
-      text-transform: none;
-    }
-    .h-xl { font-size: 82px; line-height: 1.0; }
-    .h-lg { font-size: 72px; line-height: 1.05; }
-    .h-md { font-size: 62px; line-height: 1.08; }
-    .h-sm { font-size: 52px; line-height: 1.1; }
-
-    /* AI POV Card - VIRAL OPTIMIZED: Bolder, More Prominent */
-    .ai-point {
-      background: linear-gradient(145deg,
-        rgba(0,0,0,0.85) 0%,
-        rgba(0,0,0,0.75) 100%);
-      backdrop-filter: blur(28px);
-      border: 3px solid rgba(255,255,255,0.25);
-      border-left: 8px solid var(--brand);
-      border-radius: 24px;
-      padding: 32px 36px;
-      margin-bottom: 32px;
-      box-shadow: 0 16px 48px rgba(0,0,0,0.9),
-                  inset 0 2px 0 rgba(255,255,255,0.2),
-                  0 0 60px rgba(0,0,0,0.6);
-      position: relative;
-    }
-    .ai-point::before {
-      content: '';
-      position: absolute; top: 0; left: 0; right: 0; height: 3px;
-      background: linear-gradient(90deg, var(--brand), transparent);
-      opacity: 0.7;
-    }
-    .ai-label {
-      font-family: 'Montserrat', sans-serif;
-      font-size: 15px;
-      font-weight: 900;
-      color: var(--brand);
-      margin-bottom: 16px;
-      display: flex;
-      align-items: center;
-      gap: 10px;
-      text-transform: uppercase;
-      letter-spacing: 3px;
-      text-shadow: 0 2px 4px rgba(0,0,0,0.8);
-    }
-    .ai-label::before {
-      content: '●';
-      font-size: 12px;
-      color: var(--brand);
-      animation: glow 2s ease-in-out infinite;
-    }
-    @keyframes glow {
-      0%, 100% { opacity: 1; transform: scale(1); }
-      50% { opacity: 0.6; transform: scale(1.15); }
-    }
-    .ai-content {
-      font-family: 'Inter', sans-serif;
-      font-size: 28px;
-      font-weight: 700;
-      line-height: 1.4;
-      color: #ffffff;
-      letter-spacing: -0.3px;
-      text-shadow: 0 2px 4px rgba(0,0,0,0.8);
-    }
-
-    /* Metadata - Enhanced */
-    .metadata {
-      display: flex; align-items: center; gap: 20px;
-      margin-top: auto;
-    }
-
-    /* Footer - Enhanced with Verification */
-    .footer {
-      display: flex; justify-content: space-between; align-items: center; margin-top: 28px;
-      font-family: 'DM Sans', sans-serif; font-size: 14px; color: var(--fgSecondary);
-    }
-    .verified-badge {
-      display: inline-flex; align-items: center; gap: 6px;
-      background: rgba(29, 155, 240, 0.15);
-      padding: 6px 12px; border-radius: 20px;
-      border: 1px solid rgba(29, 155, 240, 0.3);
-      font-size: 13px; font-weight: 600;
-    }
-    .verified-icon {
-      color: #1d9bf0; font-size: 14px; font-weight: 900;
-    }
-
-    /* CTA Button - Enhanced with Animation */
-    .cta {
-      position: absolute; bottom: var(--pad); left: 0; right: 0;
-      display: flex; justify-content: center;
-    }
-    .cta-button {
-      background: linear-gradient(135deg, var(--brand), var(--accent));
-      color: #fff; padding: 18px 36px;
-      font-family: 'DM Sans', sans-serif; font-weight: 700; font-size: 19px;
-      border-radius: 50px;
-      box-shadow: 0 8px 24px rgba(0,0,0,0.5), 0 0 40px rgba(0,0,0,0.2);
-      display: inline-flex; align-items: center; gap: 10px;
-      position: relative; overflow: hidden;
-    }
-    .cta-button::before {
-      content: '';
-      position: absolute; top: 0; left: -100%;
-      width: 100%; height: 100%;
-      background: linear-gradient(90deg, transparent, rgba(255,255,255,0.2), transparent);
-      animation: shimmer 3s infinite;
-    }
-    @keyframes shimmer {
-      to { left: 100%; }
-    }
-    .cta-arrow {
-      font-size: 20px;
-      animation: bounce 2s ease-in-out infinite;
-    }
-    @keyframes bounce {
-      0%, 100% { transform: translateX(0); }
-      50% { transform: translateX(5px); }
-    }
-  </style>
-</head>
-<body>
-  <div class="bg-container">
-    <div class="bg-image"></div>
-    <div class="overlay"></div>
-  </div>
-
-  <div class="container">
-    <header class="header">
-      <div class="brand">
-        <div class="brand-text">theaipoint</div>
-        <div class="tagline">news + ai perspective</div>
-      </div>
-      {% if category == 'breaking' %}
-      <div class="breaking-badge">🚨 BREAKING</div>
-      {% endif %}
-    </header>
-
-    <main>
-      <h1 class="headline {{ headline_size }}">{{ title }}</h1>
-
-      <div class="ai-point">
-        <div class="ai-label">AI POINT</div>
-        <div class="ai-content">{{ pov }}</div>
-      </div>
-
-      <div class="metadata">
-        <div class="category-pill">
-          <span class="category-icon">{{ icon }}</span>
-          <span>{{ category_title }}</span>
-        </div>
-      </div>
-    </main>
-
-    <footer class="footer">
-      <span><strong>@theaipoint</strong> — AI news in 30 sec</span>
-      <div class="verified-badge">
-        <span class="verified-icon">✓</span>
-        <span>AI Verified</span>
-      </div>
-    </footer>
-
-    <div class="cta">
-      <div class="cta-button">
-        <span>{{ cta_text }}</span>
-        <span class="cta-arrow">→</span>
-      </div>
-    </div>
-  </div>
-</body>
-</html>
-"""
-        
-        # Use Jinja2 to render template
-        from jinja2 import Template
-        template = Template(html_template)
-        
-        html_content = template.render(
+        context = dict(
             title=title_clean,
             pov=pov_clean,
-            background_data_uri=background_data_uri,
+            background_image=background,
+            background_url=asset_url(background) if background else "",
             model_name=model_name,
             timestamp_ist=timestamp_ist,
             category=detected_category,
@@ -751,17 +643,176 @@ def make_post_image(
             icon=theme["icon"],
             theme=theme
         )
-        
-        # Render to image
-        asyncio.run(_render_html_to_image(html_content, output_path))
-        
-        logging.info(f"Successfully generated social media post: {output_path}")
-        return str(output_path)
+        return context, output_path
         
     except Exception as e:
         logging.error(f"Error generating post image: {e}")
         raise
 
+ENGINES = ("chromium", "pillow")
+
+def _resolve_engine(engine: Optional[str]) -> str:
+    engine = (engine or RENDER_ENGINE).lower()
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown render engine {engine!r} (expected one of {', '.join(ENGINES)})")
+    return engine
+
+def _variant_paths(output_path: pathlib.Path, aspects: List[Aspect]) -> Dict[str, pathlib.Path]:
+    """Output path per aspect: the feed keeps the post's name, others get a -story/-square suffix"""
+    return {
+        a.name: output_path if a.name == DEFAULT_ASPECT else output_path.with_name(f"{output_path.stem}-{a.name}{output_path.suffix}")
+        for a in aspects
+    }
+
+@lru_cache(maxsize=None)
+def _renderer_version(engine: str) -> str:
+    """Hash of what turns a context into pixels for `engine`; part of every render cache key"""
+    import hashlib
+    if engine == "pillow":
+        source = pathlib.Path(pillow_render.__file__).read_bytes()
+    else:
+        source = (TEMPLATES_DIR / POST_TEMPLATE_NAME).read_bytes() + post_font_css().encode()
+    return hashlib.sha256(source).hexdigest()[:16]
+
+def _render_cache_keys(context: Dict[str, Any], outputs: Dict[str, pathlib.Path], engine: str, profile: RenderProfile) -> Optional[Dict[str, str]]:
+    """Render cache key per aspect, or None with the cache disabled"""
+    if render_cache.get_render_cache() is None:
+        return None
+    version = _renderer_version(engine)
+    return {aspect: render_cache.render_key(version, engine, context, profile, aspect) for aspect in outputs}
+
+def _render_with_pillow(context: Dict[str, Any], outputs: Dict[str, pathlib.Path], profile: RenderProfile) -> None:
+    """Draw the post layout with Pillow (see pillow_render), no browser"""
+    for aspect, image in pillow_render.draw_posts(context, profile.scale, list(outputs)).items():
+        save_image(image, outputs[aspect], profile)
+    metrics.incr("render.pillow_posts")
+    logging.info(f"Successfully rendered image: {', '.join(str(p) for p in outputs.values())}")
+
+def _render_batch_chromium(jobs: List[Tuple[int, Dict[str, Any], Dict[str, pathlib.Path]]], concurrency: Optional[int],
+                           profile: RenderProfile) -> List[Optional[BaseException]]:
+    """Render jobs on the render server when it is up; the rest (or all) on the in-process renderer."""
+    errors: List[Optional[BaseException]] = [None] * len(jobs)
+    local = list(range(len(jobs)))
+    client = get_render_client()
+    if client is not None and client.available():
+        with ThreadPoolExecutor(max_workers=max(1, concurrency or RENDER_PAGES)) as pool:
+            rendered = list(pool.map(lambda job: client.render(job[1], job[2], profile), jobs))
+        local = [i for i, ok in enumerate(rendered) if not ok]
+    if local:
+        local_errors = get_render_service().render_many(
+            [(render_post_html(jobs[i][1]), jobs[i][2], post_assets(jobs[i][1])) for i in local],
+            concurrency=concurrency,
+            profile=profile
+        )
+        for i, error in zip(local, local_errors):
+            errors[i] = error
+    return errors
+
+def make_post_variants(*args, aspects: Optional[List[str]] = None, engine: Optional[str] = None, profile=None, **kwargs) -> Dict[str, str]:
+    """
+    Generate a post in several aspects (default: every one in ASPECTS) from
+    one background and one layout pass. Arguments as for make_post_image.
+    Returns aspect name -> image path.
+    """
+    engine = _resolve_engine(engine)
+    profile = get_profile(profile)
+    aspect_list = get_aspects(aspects or list(ASPECTS))
+    context, output_path = build_post_context(*args, **kwargs)
+    outputs = _variant_paths(output_path.with_suffix(profile.ext), aspect_list)
+    keys = _render_cache_keys(context, outputs, engine, profile)
+    if keys and render_cache.restore(keys, outputs):
+        logging.info(f"♻️ Reused cached render: {', '.join(str(p) for p in outputs.values())}")
+    else:
+        client = get_render_client()
+        if engine == "pillow":
+            _render_with_pillow(context, outputs, profile)
+        elif client is None or not client.render(context, outputs, profile):
+            _render_html_to_image(render_post_html(context), outputs, post_assets(context), profile)
+        if keys:
+            render_cache.store(keys, outputs)
+    logging.info(f"Successfully generated social media post: {output_path.stem} ({', '.join(outputs)})")
+    return {aspect: str(path) for aspect, path in outputs.items()}
+
+def make_post_image(*args, engine: Optional[str] = None, profile=None, **kwargs) -> str:
+    """
+    Generate a professional social media post image (arguments as for
+    build_post_context). `engine` is "chromium" or "pillow" (default
+    RENDER_ENGINE); `profile` a render profile or its name (default
+    RENDER_PROFILE). Returns the path to the generated image file.
+    """
+    return make_post_variants(*args, aspects=[DEFAULT_ASPECT], engine=engine, profile=profile, **kwargs)[DEFAULT_ASPECT]
+
+def make_post_images(posts: List[Dict[str, Any]], concurrency: Optional[int] = None, engine: Optional[str] = None, profile=None,
+                     aspects: Optional[List[str]] = None) -> List[Any]:
+    """
+    Render a whole batch of posts concurrently.
+
+    Each post is a dict of build_post_context arguments. Up to `concurrency`
+    posts render at once (on the Chromium page pool, or on worker threads
+    for the Pillow engine), so the batch takes about as long as its slowest
+    posts rather than their sum. Returns image paths in input order; None
+    for posts that failed. `engine` and `profile` as for make_post_image.
+    With `aspects`, each entry is instead a dict of aspect name -> path,
+    all variants of a post coming from a single render. Posts found in the
+    render cache (see render_cache) are restored without rendering.
+    """
+    engine = _resolve_engine(engine)
+    profile = get_profile(profile)
+    aspect_list = get_aspects(aspects)
+    started = time.monotonic()
+    jobs: List[Tuple[int, Dict[str, Any], Dict[str, pathlib.Path]]] = []
+    cache_keys: Dict[int, Dict[str, str]] = {}
+    done: List[Tuple[int, Dict[str, pathlib.Path]]] = []  # rendered or restored from the render cache
+    used_paths = set()
+    for idx, post in enumerate(posts):
+        try:
+            context, output_path = build_post_context(**post)
+            output_path = output_path.with_suffix(profile.ext)
+        except Exception as e:
+            logging.warning(f"⚠️ Could not build post {idx + 1} ({post.get('title', '')[:60]}): {e}")
+            continue
+        # Same slug + category would make two concurrent renders share a file
+        if output_path in used_paths:
+            output_path = output_path.with_name(f"{output_path.stem}-{idx + 1}{output_path.suffix}")
+        used_paths.add(output_path)
+        outputs = _variant_paths(output_path, aspect_list)
+        keys = _render_cache_keys(context, outputs, engine, profile)
+        if keys and render_cache.restore(keys, outputs):
+            done.append((idx, outputs))
+            continue
+        if keys:
+            cache_keys[idx] = keys
+        jobs.append((idx, context, outputs))
+
+    results: List[Any] = [None] * len(posts)
+    if not jobs:
+        errors = []
+    elif engine == "pillow":
+        def render_one(job) -> Optional[BaseException]:
+            try:
+                _render_with_pillow(job[1], job[2], profile)
+                return None
+            except Exception as e:
+                return e
+        # Pillow releases the GIL in its C loops, so threads overlap well
+        with ThreadPoolExecutor(max_workers=max(1, concurrency or RENDER_PAGES)) as pool:
+            errors = list(pool.map(render_one, jobs))
+    else:
+        errors = _render_batch_chromium(jobs, concurrency, profile)
+    for (idx, _, outputs), error in zip(jobs, errors):
+        if error is None:
+            if idx in cache_keys:
+                render_cache.store(cache_keys[idx], outputs)
+            done.append((idx, outputs))
+        else:
+            logging.warning(f"⚠️ Could not render post {idx + 1}: {type(error).__name__}: {error}")
+    reused = len(done) - sum(1 for e in errors if e is None)
+    for idx, outputs in done:
+        results[idx] = {a: str(p) for a, p in outputs.items()} if aspects else str(outputs[DEFAULT_ASPECT])
+    variants = f", {'/'.join(a.name for a in aspect_list)}" if aspects else ""
+    logging.info(f"🖼️ Rendered {sum(1 for r in results if r)}/{len(posts)} posts in {time.monotonic() - started:.1f}s ({engine}, {profile.name}{variants}, concurrency={concurrency or 'default'}, {reused} from cache)")
+    return results
+
 # Example usage
 if __name__ == "__main__":
     # Test with sample data
@@ -8,6 +8,8 @@ load_dotenv()
 
 from app.services.perplexity_service import transform_rss_with_perplexity
 from app.services.news_emailer import send_email
+from app.generate_image import refill_backgrounds
+from app.config import LLM_PROVIDER, IMAGE_PROVIDER, BG_MODE
 
 # Configure logging
 logging.basicConfig(
@@ -18,14 +20,15 @@ logging.basicConfig(
 def validate_environment():
     """Validate required environment variables at startup"""
     required_vars = {
-        "OPENAI_API_KEY": "OpenAI API for news processing",
         "EMAIL_USERNAME": "Email sender account",
         "EMAIL_PASSWORD": "Email password",
         "EMAIL_TO": "Email recipient(s)"
     }
+    if LLM_PROVIDER == "openai":
+        required_vars["OPENAI_API_KEY"] = "OpenAI API for news processing"
 
-    # At least one image generation API key required
-    has_image_api = os.getenv("NEBIUS_API_KEY") or os.getenv("GOOGLE_API_KEY")
+    # At least one image generation API key required (unless running on the fake backend or offline backgrounds)
+    has_image_api = BG_MODE == "gradient" or IMAGE_PROVIDER == "fake" or os.getenv("NEBIUS_API_KEY") or os.getenv("GOOGLE_API_KEY")
 
     missing = []
     for var, description in required_vars.items():
@@ -73,6 +76,9 @@ def run_job():
         logging.info(f"✅ Pipeline completed successfully - {len(news_content)} posts sent")
         logging.info("="*60)
 
+        # Step 3: Idle time until the next slot - top up the fallback background pool
+        refill_backgrounds()
+
     except KeyboardInterrupt:
         logging.info("⏹️ Pipeline stopped by user")
         sys.exit(0)
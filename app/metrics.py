@@ -0,0 +1,94 @@
+"""
+Tiny in-process metrics registry (counters + latency samples).
+
+Good enough to answer "how many retries / how slow / how often did X hit"
+for a single pipeline run without pulling in a metrics backend.
+
+    from app import metrics
+    metrics.incr("perplexity.retries")
+    metrics.observe("perplexity.latency_s", 1.42)
+    metrics.percentile("perplexity.latency_s", 95)
+"""
+import logging
+import threading
+from collections import defaultdict, deque
+from typing import Deque, Dict, Optional
+
+MAX_SAMPLES = 512  # per series; old samples roll off
+
+_lock = threading.Lock()
+_counters: Dict[str, float] = defaultdict(float)
+_samples: Dict[str, Deque[float]] = defaultdict(lambda: deque(maxlen=MAX_SAMPLES))
+
+
+def _key(name: str, labels: Dict[str, str]) -> str:
+    if not labels:
+        return name
+    return name + "{" + ",".join(f"{k}={labels[k]}" for k in sorted(labels)) + "}"
+
+
+def incr(name: str, value: float = 1, **labels) -> None:
+    """Increment a counter."""
+    with _lock:
+        _counters[_key(name, labels)] += value
+
+
+def observe(name: str, value: float, **labels) -> None:
+    """Record a sample (e.g. a latency in seconds)."""
+    with _lock:
+        _samples[_key(name, labels)].append(float(value))
+
+
+def count(name: str, **labels) -> float:
+    with _lock:
+        return _counters.get(_key(name, labels), 0.0)
+
+
+def sample_count(name: str, **labels) -> int:
+    """Number of samples currently held for a series."""
+    with _lock:
+        return len(_samples.get(_key(name, labels), ()))
+
+
+def percentile(name: str, q: float, default: Optional[float] = None, **labels) -> Optional[float]:
+    """q-th percentile (0-100) of recorded samples, or `default` if none."""
+    with _lock:
+        values = sorted(_samples.get(_key(name, labels), ()))
+    if not values:
+        return default
+    idx = min(len(values) - 1, max(0, int(round(q / 100.0 * (len(values) - 1)))))
+    return values[idx]
+
+
+def snapshot() -> Dict[str, Dict[str, float]]:
+    """Counters plus count/p50/p95/max for every sample series."""
+    with _lock:
+        counters = dict(_counters)
+        series = {k: sorted(v) for k, v in _samples.items() if v}
+    summaries = {}
+    for key, values in series.items():
+        n = len(values)
+        summaries[key] = {
+            "count": n,
+            "p50": values[(n - 1) // 2],
+            "p95": values[min(n - 1, int(round(0.95 * (n - 1))))],
+            "max": values[-1],
+        }
+    return {"counters": counters, "samples": summaries}
+
+
+def reset() -> None:
+    with _lock:
+        _counters.clear()
+        _samples.clear()
+
+
+def log_summary(prefix: str = "") -> None:
+    """Log every metric whose name starts with `prefix`."""
+    snap = snapshot()
+    for key, value in sorted(snap["counters"].items()):
+        if key.startswith(prefix):
+            logging.info(f"📊 {key} = {value:g}")
+    for key, s in sorted(snap["samples"].items()):
+        if key.startswith(prefix):
+            logging.info(f"📊 {key}: n={s['count']} p50={s['p50']:.3f} p95={s['p95']:.3f} max={s['max']:.3f}")
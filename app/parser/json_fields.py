@@ -0,0 +1,87 @@
+import json
+from typing import Dict, Iterable, Optional
+
+
+class JSONFieldExtractor:
+    """
+    Incrementally pull top-level string fields out of a streamed JSON object.
+
+    Feed raw completion deltas; each call returns the fields whose string
+    value was completed by that delta. Only top-level `"key": "string"`
+    pairs are reported (nested objects/arrays and non-string values are
+    skipped), which is all the post JSON needs. Anything before the first
+    '{' (e.g. a ```json fence) is ignored.
+
+        ex = JSONFieldExtractor()
+        for delta in stream:
+            for key, value in ex.feed(delta).items():
+                ...
+    """
+
+    def __init__(self, fields: Optional[Iterable[str]] = None):
+        self.fields = set(fields) if fields else None
+        self.values: Dict[str, str] = {}
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+        self._raw: list = []
+        self._key: Optional[str] = None
+        self._expect_value = False
+
+    def feed(self, delta: str) -> Dict[str, str]:
+        completed: Dict[str, str] = {}
+        for ch in delta:
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                    self._raw.append(ch)
+                elif ch == "\\":
+                    self._escape = True
+                    self._raw.append(ch)
+                elif ch == '"':
+                    self._in_string = False
+                    self._end_string(completed)
+                else:
+                    self._raw.append(ch)
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                self._raw = []
+            elif ch in "{[":
+                self._depth += 1
+                if self._depth > 1:
+                    self._expect_value = False
+            elif ch in "}]":
+                self._depth -= 1
+            elif self._depth == 1:
+                if ch == ":":
+                    self._expect_value = True
+                elif ch == ",":
+                    self._key = None
+                    self._expect_value = False
+                elif not ch.isspace():
+                    # number / true / false / null → not a string field
+                    self._expect_value = False
+        return completed
+
+    def _end_string(self, completed: Dict[str, str]) -> None:
+        if self._depth != 1:
+            return
+        try:
+            text = json.loads('"' + "".join(self._raw) + '"')
+        except ValueError:
+            text = "".join(self._raw)
+
+        if not self._expect_value:
+            self._key = text
+            return
+
+        key, self._key, self._expect_value = self._key, None, False
+        if key is None or (self.fields is not None and key not in self.fields):
+            return
+        self.values[key] = text
+        completed[key] = text
+
+    def has(self, *keys: str) -> bool:
+        return all(k in self.values for k in keys)
@@ -1,5 +1,5 @@
 import re, html, logging
-from typing import List
+from typing import Iterable, Iterator, List
 
 URL_RE = re.compile(r'https?://\S+')
 
@@ -18,44 +18,93 @@ def _clean_urls(urls):
             deduped.append(u)
     return deduped
 
+def _parse_article(article_text: str) -> dict:
+    """Parse one '---'-delimited article block into an item dict."""
+    item = {"images": []}
+    article_text = article_text.replace('\\n', '\n').strip()
+
+    # Title
+    m = re.search(r'📰(.*?)(?:\n🤖|\n🖼️|#️⃣|📌|$)', article_text, re.DOTALL)
+    if m:
+        item['title'] = html.escape(m.group(1).strip())
+
+    # pov
+    m = re.search(r'🤖(.*?)(?:\n🖼️|#️⃣|📌|$)', article_text, re.DOTALL)
+    if m:
+        item['pov'] = html.escape(m.group(1).strip())
+
+    # Images
+    m = re.search(r'🖼️\s*Stock Images:(.*?)(?:#️⃣|📌|$)', article_text, re.DOTALL | re.IGNORECASE)
+    if m:
+        item['images'] = _clean_urls(URL_RE.findall(m.group(1)))
+
+    # Hashtags
+    m = re.search(r'#️⃣\s*Hashtags:(.*?)(?:📌|$)', article_text, re.DOTALL | re.IGNORECASE)
+    if m:
+        item['hashtags'] = html.escape(m.group(1).strip())
+
+    # Source
+    m = re.search(r'📌\s*Source:(.*)$', article_text, re.DOTALL | re.IGNORECASE)
+    if m:
+        item['source'] = html.escape(m.group(1).strip())
+
+    return item
+
 def parse_news_content(raw_content: str) -> List[dict]:
     """
     Parses LLM output that uses '---' separators and sections:
     📰 Title, 🤖 pov, 🖼️ Stock Images:, #️⃣ Hashtags:, 📌 Source:
     """
     logging.info("Parsing news content...")
-    news_items = []
     articles = [a for a in raw_content.strip().split('---') if a.strip()]
+    return [_parse_article(article_text) for article_text in articles]
 
-    for article_text in articles:
-        item = {"images": []}
-        article_text = article_text.replace('\\n', '\n').strip()
+class NewsStreamParser:
+    """
+    Incremental version of parse_news_content for streamed completions.
 
-        # Title
-        m = re.search(r'📰(.*?)(?:\n🤖|\n🖼️|#️⃣|📌|$)', article_text, re.DOTALL)
-        if m:
-            item['title'] = html.escape(m.group(1).strip())
+    Feed text deltas as they arrive; each item is returned as soon as the
+    '---' that closes it has been seen. Call close() at end of stream to
+    flush the last item (the model does not always emit a trailing '---').
+    Concatenating all returned items gives the same result as
+    parse_news_content on the full text.
+    """
 
-        # pov
-        m = re.search(r'🤖(.*?)(?:\n🖼️|#️⃣|📌|$)', article_text, re.DOTALL)
-        if m:
-            item['pov'] = html.escape(m.group(1).strip())
+    SEPARATOR = '---'
 
-        # Images
-        m = re.search(r'🖼️\s*Stock Images:(.*?)(?:#️⃣|📌|$)', article_text, re.DOTALL | re.IGNORECASE)
-        if m:
-            item['images'] = _clean_urls(URL_RE.findall(m.group(1)))
+    def __init__(self):
+        self._buffer = ""
+        self._started = False
 
-        # Hashtags
-        m = re.search(r'#️⃣\s*Hashtags:(.*?)(?:📌|$)', article_text, re.DOTALL | re.IGNORECASE)
-        if m:
-            item['hashtags'] = html.escape(m.group(1).strip())
+    def feed(self, delta: str) -> List[dict]:
+        if not self._started:
+            # Mirror parse_news_content's strip() of the whole completion
+            delta = delta.lstrip()
+            if not delta:
+                return []
+            self._started = True
 
-        # Source
-        m = re.search(r'📌\s*Source:(.*)$', article_text, re.DOTALL | re.IGNORECASE)
-        if m:
-            item['source'] = html.escape(m.group(1).strip())
+        self._buffer += delta
+        items = []
+        while True:
+            idx = self._buffer.find(self.SEPARATOR)
+            if idx < 0:
+                break
+            article_text = self._buffer[:idx]
+            self._buffer = self._buffer[idx + len(self.SEPARATOR):]
+            if article_text.strip():
+                items.append(_parse_article(article_text))
+        return items
 
-        news_items.append(item)
+    def close(self) -> List[dict]:
+        article_text, self._buffer = self._buffer.rstrip(), ""
+        if article_text.strip():
+            return [_parse_article(article_text)]
+        return []
 
-    return news_items
\ No newline at end of file
+def iter_news_items(deltas: Iterable[str]) -> Iterator[dict]:
+    """Yield parsed items from an iterable of streamed text deltas."""
+    parser = NewsStreamParser()
+    for delta in deltas:
+        yield from parser.feed(delta)
+    yield from parser.close()
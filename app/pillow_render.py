@@ -0,0 +1,462 @@
+"""
+Browser-free post renderer (Pillow).
+
+Draws the same fixed layout as the post HTML template (header, headline in
+four size classes, AI POINT card, category pill, footer, CTA) straight from
+the template context and THEMES, so posts render in tens of milliseconds
+without a Chromium process. Selected with RENDER_ENGINE=pillow, or
+engine="pillow" on make_post_image / make_post_images.
+
+All coordinates are CSS pixels of the 1080x1350 template (see the CSS in
+app/templates/post_template.html); `scale` multiplies everything. Aspect
+variants (story, square) reuse the same drawn layers over a re-cropped
+background.
+"""
+import io
+import os
+import re
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image, ImageChops, ImageDraw, ImageFilter, ImageFont, ImageOps
+
+from app.fonts import sfnt_bytes, vendored_fonts
+from app.render_profiles import get_aspects
+
+W, H, PAD = 1080, 1350, 48
+WHITE = (255, 255, 255, 255)
+FG_SECONDARY = (156, 163, 175, 255)  # --fgSecondary
+VERIFIED_BLUE = (29, 155, 240, 255)
+
+# (dx, dy, blur, opacity) in CSS px, as in text-shadow / box-shadow
+Shadow = Tuple[float, float, float, float]
+SHADOW_BRAND: Sequence[Shadow] = [(0, 4, 12, 0.95), (0, 2, 4, 0.8)]
+SHADOW_HEADLINE: Sequence[Shadow] = [(0, 4, 8, 1.0), (0, 8, 24, 0.8), (0, 2, 4, 0.9)]
+SHADOW_TEXT: Sequence[Shadow] = [(0, 2, 4, 0.8)]
+SHADOW_CARD: Sequence[Shadow] = [(0, 16, 48, 0.9), (0, 0, 60, 0.6)]
+SHADOW_PILL: Sequence[Shadow] = [(0, 4, 12, 0.4)]
+SHADOW_CTA: Sequence[Shadow] = [(0, 8, 24, 0.5)]
+
+# Headline size class -> (font px, line-height)
+HEADLINE_SIZES = {"h-xl": (82, 1.0), "h-lg": (72, 1.05), "h-md": (62, 1.08), "h-sm": (52, 1.1)}
+
+SYSTEM_FONTS = {
+    "bold": [
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",
+        "/usr/share/fonts/truetype/liberation/LiberationSans-Bold.ttf",
+        "/Library/Fonts/Arial Bold.ttf",
+        "C:/Windows/Fonts/arialbd.ttf",
+    ],
+    "regular": [
+        "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf",
+        "/usr/share/fonts/truetype/liberation/LiberationSans-Regular.ttf",
+        "/Library/Fonts/Arial.ttf",
+        "C:/Windows/Fonts/arial.ttf",
+    ],
+}
+EMOJI_FONTS = [
+    "/usr/share/fonts/truetype/noto/NotoColorEmoji.ttf",
+    "/usr/share/fonts/noto/NotoColorEmoji.ttf",
+    "/System/Library/Fonts/Apple Color Emoji.ttc",
+]
+EMOJI_BITMAP_PX = 109  # NotoColorEmoji only has a 109px strike
+
+# Pictographs (optionally joined by ZWJ / followed by VS16); ✓ stays text
+EMOJI_RE = re.compile(
+    "((?:[\U0001F000-\U0001FAFF\u2600-\u26FF\u2700-\u2712\u2714-\u27BF\u2B50\u2B55\u231A\u231B\u23E9-\u23FA]"
+    "[\uFE0F\u200D]*)+)"
+)
+
+
+# --- fonts -----------------------------------------------------------------
+
+@lru_cache(maxsize=256)
+def _font(family: str, weight: int, px: int) -> ImageFont.FreeTypeFont:
+    """Vendored font (nearest weight), else a system sans, else Pillow's default."""
+    candidates = [(abs(w - weight), path) for fam, w, path in vendored_fonts() if fam == family]
+    for _, path in sorted(candidates):
+        try:
+            return ImageFont.truetype(path, px)
+        except OSError:  # FreeType without WOFF2 (brotli) support
+            try:
+                return ImageFont.truetype(io.BytesIO(sfnt_bytes(path)), px)
+            except (ImportError, OSError):
+                break
+    for path in SYSTEM_FONTS["bold" if weight >= 600 else "regular"]:
+        if os.path.exists(path):
+            return ImageFont.truetype(path, px)
+    return ImageFont.load_default(px)
+
+
+@lru_cache(maxsize=1)
+def _emoji_font() -> Optional[ImageFont.FreeTypeFont]:
+    for path in EMOJI_FONTS:
+        if os.path.exists(path):
+            try:
+                return ImageFont.truetype(path, EMOJI_BITMAP_PX)
+            except OSError:
+                continue
+    return None
+
+
+@lru_cache(maxsize=128)
+def _emoji_image(cluster: str, px: int) -> Optional[Image.Image]:
+    """Colour emoji scaled to `px` high, or None without an emoji font."""
+    font = _emoji_font()
+    if font is None:
+        return None
+    canvas = Image.new("RGBA", (int(font.getlength(cluster)) + 16, EMOJI_BITMAP_PX * 2), (0, 0, 0, 0))
+    ImageDraw.Draw(canvas).text((0, 0), cluster, font=font, embedded_color=True)
+    bbox = canvas.getbbox()
+    if not bbox:
+        return None
+    glyph = canvas.crop(bbox)
+    return glyph.resize((max(1, round(glyph.width * px / glyph.height)), px), Image.LANCZOS)
+
+
+# --- colours and fills -----------------------------------------------------
+
+def _rgba(color: str, alpha: float = 1.0) -> Tuple[int, int, int, int]:
+    """'#rrggbb' or 'rgba(r,g,b,a)' -> RGBA tuple."""
+    color = color.strip()
+    if color.startswith("#"):
+        r, g, b = (int(color[i:i + 2], 16) for i in (1, 3, 5))
+        return r, g, b, round(255 * alpha)
+    parts = [p.strip() for p in color[color.index("(") + 1:color.rindex(")")].split(",")]
+    a = float(parts[3]) if len(parts) > 3 else 1.0
+    return int(parts[0]), int(parts[1]), int(parts[2]), round(255 * a * alpha)
+
+
+def _diagonal_gradient(size: Tuple[int, int], start: Tuple[int, ...], end: Tuple[int, ...]) -> Image.Image:
+    """135deg linear-gradient(start, end) filling `size`."""
+    w, h = size
+    t = (np.linspace(0, 1, w)[None, :] + np.linspace(0, 1, h)[:, None]) / 2
+    rgba = np.array(start, dtype=np.float64) + (np.array(end, dtype=np.float64) - np.array(start, dtype=np.float64)) * t[..., None]
+    return Image.fromarray(rgba.round().astype(np.uint8), "RGBA")
+
+
+def _rounded_mask(size: Tuple[int, int], radius: float) -> Image.Image:
+    mask = Image.new("L", size, 0)
+    ImageDraw.Draw(mask).rounded_rectangle((0, 0, size[0] - 1, size[1] - 1), radius=radius, fill=255)
+    return mask
+
+
+def _soft_blur(mask: Image.Image, radius: float) -> Image.Image:
+    """Gaussian blur; wide radii are blurred at reduced resolution (same look, far cheaper)."""
+    factor = min(4, int(radius // 4))
+    if factor < 2:
+        return mask.filter(ImageFilter.GaussianBlur(radius))
+    small = mask.resize((max(1, mask.width // factor), max(1, mask.height // factor)), Image.BOX)
+    return small.filter(ImageFilter.GaussianBlur(radius / factor)).resize(mask.size, Image.BILINEAR)
+
+
+def _with_shadows(canvas: Image.Image, layer: Image.Image, shadows: Sequence[Shadow], scale: float) -> None:
+    """Composite `layer` onto `canvas` with CSS-style drop shadows of its alpha."""
+    bbox = layer.getbbox()  # alpha-only for RGBA
+    if not bbox:
+        return
+    # Work only on the region the layer and its shadows can reach
+    margin = max((int((blur * 1.5 + abs(dx) + abs(dy)) * scale) + 2 for dx, dy, blur, _ in shadows), default=0)
+    x0, y0 = max(0, bbox[0] - margin), max(0, bbox[1] - margin)
+    x1, y1 = min(canvas.width, bbox[2] + margin), min(canvas.height, bbox[3] + margin)
+    piece = layer.crop((x0, y0, x1, y1))
+    alpha = piece.getchannel("A")
+    for dx, dy, blur, opacity in shadows:
+        region = Image.new("L", piece.size, 0)
+        region.paste(alpha, (round(dx * scale), round(dy * scale)))
+        if blur:
+            region = _soft_blur(region, blur * scale / 2)
+        shadow = Image.new("RGBA", piece.size, (0, 0, 0, 255))
+        shadow.putalpha(region.point(lambda v, o=opacity: int(v * o)))
+        canvas.alpha_composite(shadow, (x0, y0))
+    canvas.alpha_composite(piece, (x0, y0))
+
+
+# --- text ------------------------------------------------------------------
+
+class _Text:
+    """One CSS text style: font, size, letter-spacing and line-height (CSS px)."""
+
+    def __init__(self, family: str, weight: int, size: float, scale: float,
+                 letter_spacing: float = 0.0, line_height: float = 1.2, upper: bool = False):
+        self.px = max(1, round(size * scale))
+        self.font = _font(family, weight, self.px)
+        self.spacing = letter_spacing * scale
+        self.line_px = line_height * size * scale
+        self.upper = upper
+
+    def _runs(self, text: str) -> List[Tuple[bool, str]]:
+        if self.upper:
+            text = text.upper()
+        return [(i % 2 == 1, part) for i, part in enumerate(EMOJI_RE.split(text)) if part]
+
+    def _advance(self, is_emoji: bool, chunk: str) -> float:
+        if is_emoji:
+            glyph = _emoji_image(chunk, self.px)
+            return glyph.width + self.spacing if glyph else 0.0
+        return self.font.getlength(chunk) + self.spacing * len(chunk)
+
+    def width(self, text: str) -> float:
+        return sum(self._advance(is_emoji, chunk) for is_emoji, chunk in self._runs(text))
+
+    def wrap(self, text: str, max_width: float) -> List[str]:
+        """Greedy word wrap on measured widths; over-long words are split."""
+        lines: List[str] = []
+        line = ""
+        for word in text.split():
+            candidate = f"{line} {word}" if line else word
+            if self.width(candidate) <= max_width:
+                line = candidate
+                continue
+            if line:
+                lines.append(line)
+            line = ""
+            for ch in word:
+                if line and self.width(line + ch) > max_width:
+                    lines.append(line)
+                    line = ""
+                line += ch
+        if line:
+            lines.append(line)
+        return lines or [""]
+
+    def draw(self, layer: Image.Image, x: float, top: float, text: str, fill: Tuple[int, ...]) -> float:
+        """Draw one line in a CSS line box starting at `top`; returns the end x."""
+        draw = ImageDraw.Draw(layer)
+        ascent, descent = self.font.getmetrics()
+        baseline = top + (self.line_px - (ascent + descent)) / 2 + ascent
+        for is_emoji, chunk in self._runs(text):
+            if is_emoji:
+                glyph = _emoji_image(chunk, self.px)
+                if glyph is not None:
+                    layer.alpha_composite(glyph, (round(x), round(baseline - self.px * 0.85)))
+                    x += glyph.width + self.spacing
+            elif self.spacing:
+                for ch in chunk:
+                    draw.text((x, baseline), ch, font=self.font, fill=fill, anchor="ls")
+                    x += self.font.getlength(ch) + self.spacing
+            else:
+                draw.text((x, baseline), chunk, font=self.font, fill=fill, anchor="ls")
+                x += self.font.getlength(chunk)
+        return x
+
+
+# --- layout ----------------------------------------------------------------
+
+def _decode(data: Optional[bytes]) -> Optional[Image.Image]:
+    try:
+        return Image.open(io.BytesIO(data)).convert("RGB")
+    except Exception:
+        return None
+
+
+def _background(source: Optional[Image.Image], size: Tuple[int, int]) -> Image.Image:
+    """
+    Cover-fit background with the template's brightness(0.75) contrast(1.1)
+    and the .overlay gradient (black, alpha .5 -> .25 at 30% -> .4 at 70%
+    -> .85) applied in one pass.
+    """
+    if source is None:
+        img = Image.new("RGB", size, (0, 0, 0))
+    else:
+        img = ImageOps.fit(source, size, Image.BILINEAR)
+    lut = [max(0, min(255, round((v * 0.75 - 127.5) * 1.1 + 127.5))) for v in range(256)]
+    alpha = np.interp(np.linspace(0, 1, size[1]), [0, 0.3, 0.7, 1.0], [0.5, 0.25, 0.4, 0.85])
+    # Black at alpha a over the image == multiply by (1 - a), row by row; stays 8-bit
+    keep = Image.fromarray(((1 - alpha) * 255).round().astype(np.uint8)[:, None], "L").resize(size, Image.NEAREST)
+    return ImageChops.multiply(img.point(lut * 3), Image.merge("RGB", (keep, keep, keep))).convert("RGBA")
+
+
+def _pill(layer: Image.Image, box: Tuple[float, float, float, float], radius: float,
+          fill=None, gradient: Optional[Tuple[Tuple[int, ...], Tuple[int, ...]]] = None,
+          outline=None, outline_px: int = 0) -> None:
+    x0, y0, x1, y1 = (round(v) for v in box)
+    size = (max(1, x1 - x0), max(1, y1 - y0))
+    mask = _rounded_mask(size, radius)
+    body = _diagonal_gradient(size, *gradient) if gradient else Image.new("RGBA", size, fill)
+    clipped = Image.new("RGBA", size, (0, 0, 0, 0))
+    clipped.paste(body, (0, 0), mask)
+    if outline and outline_px:
+        ImageDraw.Draw(clipped).rounded_rectangle((0, 0, size[0] - 1, size[1] - 1), radius=radius, outline=outline, width=outline_px)
+    layer.alpha_composite(clipped, (x0, y0))
+
+
+def _foreground(context: Dict[str, Any], s: float) -> Image.Image:
+    """
+    Everything from the header down to the footer, with shadows, on a
+    transparent feed-sized layer (top of the content at y=0 + PAD).
+    """
+    size = (round(W * s), round(H * s))
+    theme = context["theme"]
+    brand, accent = _rgba(theme["brand"]), _rgba(theme["accent"])
+    content_w = (W - 2 * PAD) * s
+    left = PAD * s
+
+    canvas = Image.new("RGBA", size, (0, 0, 0, 0))
+
+    def new_layer() -> Image.Image:
+        return Image.new("RGBA", size, (0, 0, 0, 0))
+
+    # Header: brand + tagline, breaking badge on the right
+    brand_text = _Text("Montserrat", 900, 42, s, letter_spacing=-1)
+    tagline = _Text("Inter", 800, 11, s, letter_spacing=3, upper=True)
+    header_top = PAD * s
+    header_h = brand_text.line_px + 4 * s + tagline.line_px
+    layer = new_layer()
+    brand_text.draw(layer, left, header_top, "theaipoint", WHITE)
+    _with_shadows(canvas, layer, SHADOW_BRAND, s)
+    tagline.draw(canvas, left, header_top + brand_text.line_px + 4 * s, "news + ai perspective", brand)
+
+    if context.get("category") == "breaking":
+        badge = _Text("Inter", 800, 14, s, letter_spacing=1.5, upper=True)
+        label = "🚨 BREAKING"
+        bw, bh = badge.width(label) + 36 * s, badge.line_px + 20 * s
+        bx, by = size[0] - left - bw, header_top + (header_h - bh) / 2
+        layer = new_layer()
+        _pill(layer, (bx, by, bx + bw, by + bh), 8 * s, gradient=(_rgba("#ff0000"), _rgba("#ff4444")))
+        badge.draw(layer, bx + 18 * s, by + 10 * s, label, WHITE)
+        _with_shadows(canvas, layer, [(0, 0, 20, 0.5), (0, 4, 12, 0.6)], s)
+
+    # Headline
+    font_px, line_height = HEADLINE_SIZES.get(context.get("headline_size"), HEADLINE_SIZES["h-sm"])
+    headline = _Text("Montserrat", 900, font_px, s, letter_spacing=-1.5, line_height=line_height)
+    y = header_top + header_h + 32 * s
+    layer = new_layer()
+    for line in headline.wrap(context.get("title", ""), content_w):
+        headline.draw(layer, left, y, line, WHITE)
+        y += headline.line_px
+    _with_shadows(canvas, layer, SHADOW_HEADLINE, s)
+    y += 32 * s
+
+    # AI POINT card: 3px border, 8px brand left border, padding 32/36, radius 24
+    label = _Text("Montserrat", 900, 15, s, letter_spacing=3, upper=True)
+    body = _Text("Inter", 700, 28, s, letter_spacing=-0.3, line_height=1.4)
+    inner_x = left + (8 + 36) * s
+    inner_w = content_w - (8 + 3 + 2 * 36) * s
+    lines = body.wrap(context.get("pov", ""), inner_w)
+    card_h = (3 + 32 + 32 + 3 + 16) * s + label.line_px + body.line_px * len(lines)
+    card = (left, y, left + content_w, y + card_h)
+
+    layer = new_layer()
+    _pill(layer, card, 24 * s, fill=(0, 0, 0, 204), outline=(255, 255, 255, 64), outline_px=max(1, round(3 * s)))
+    _with_shadows(canvas, layer, SHADOW_CARD, s)
+    x0, y0, x1, y1 = (round(v) for v in card)
+    card_mask = _rounded_mask((x1 - x0, y1 - y0), 24 * s)
+    accent_layer = Image.new("RGBA", card_mask.size, (0, 0, 0, 0))
+    ImageDraw.Draw(accent_layer).rectangle((0, 0, round(8 * s) - 1, card_mask.height), fill=brand)
+    # ::before: 3px brand -> transparent line along the top at 70% opacity
+    top_line = np.zeros((max(1, round(3 * s)), card_mask.width, 4), dtype=np.uint8)
+    top_line[..., :3] = brand[:3]
+    top_line[..., 3] = (np.linspace(0.7, 0, card_mask.width) * 255).astype(np.uint8)
+    accent_layer.alpha_composite(Image.fromarray(top_line, "RGBA"))
+    clipped = Image.new("RGBA", card_mask.size, (0, 0, 0, 0))
+    clipped.paste(accent_layer, (0, 0), card_mask)
+    canvas.alpha_composite(clipped, (x0, y0))
+
+    ty = y + (3 + 32) * s
+    dot = 7 * s
+    cy = ty + label.line_px / 2
+    ImageDraw.Draw(canvas).ellipse((inner_x, cy - dot / 2, inner_x + dot, cy + dot / 2), fill=brand)
+    layer = new_layer()
+    label.draw(layer, inner_x + dot + 10 * s, ty, "AI POINT", brand)
+    _with_shadows(canvas, layer, SHADOW_TEXT, s)
+    ty += label.line_px + 16 * s
+    layer = new_layer()
+    for line in lines:
+        body.draw(layer, inner_x, ty, line, WHITE)
+        ty += body.line_px
+    _with_shadows(canvas, layer, SHADOW_TEXT, s)
+    y += card_h + 32 * s
+
+    # Category pill: icon + title
+    pill_text = _Text("Inter", 700, 14, s, letter_spacing=0.5, upper=True)
+    icon = _Text("Inter", 700, 18, s)
+    icon_str = context.get("icon", "")
+    pill_label = context.get("category_title", "")
+    icon_w = icon.width(icon_str)
+    pill_h = 20 * s + max(pill_text.line_px, icon.line_px)
+    pill_w = 36 * s + icon_w + (8 * s if icon_w else 0) + pill_text.width(pill_label)
+    layer = new_layer()
+    _pill(layer, (left, y, left + pill_w, y + pill_h), 20 * s, gradient=(brand, accent))
+    x = icon.draw(layer, left + 18 * s, y + (pill_h - icon.line_px) / 2, icon_str, WHITE)
+    pill_text.draw(layer, x + (8 * s if icon_w else 0), y + (pill_h - pill_text.line_px) / 2, pill_label, WHITE)
+    _with_shadows(canvas, layer, SHADOW_PILL, s)
+    y += pill_h + 28 * s
+
+    # Footer: handle on the left, verified badge on the right
+    strong = _Text("Inter", 700, 14, s)
+    footer = _Text("Inter", 500, 14, s)
+    check = _Text("Inter", 900, 14, s)
+    verified = _Text("Inter", 600, 13, s)
+    badge_h = 12 * s + max(check.line_px, verified.line_px)
+    badge_w = 24 * s + check.width("✓") + 6 * s + verified.width("AI Verified")
+    x = strong.draw(canvas, left, y + (badge_h - strong.line_px) / 2, "@theaipoint", FG_SECONDARY)
+    footer.draw(canvas, x, y + (badge_h - footer.line_px) / 2, " — AI news in 30 sec", FG_SECONDARY)
+    bx = size[0] - left - badge_w
+    _pill(canvas, (bx, y, bx + badge_w, y + badge_h), 20 * s, fill=(29, 155, 240, 38), outline=(29, 155, 240, 77), outline_px=max(1, round(s)))
+    x = check.draw(canvas, bx + 12 * s, y + (badge_h - check.line_px) / 2, "✓", VERIFIED_BLUE)
+    verified.draw(canvas, x + 6 * s, y + (badge_h - verified.line_px) / 2, "AI Verified", FG_SECONDARY)
+
+    return canvas
+
+
+def _cta(context: Dict[str, Any], s: float) -> Tuple[Image.Image, int]:
+    """
+    The CTA button with its shadow on a transparent full-width band.
+    Returns (band, offset of the button's bottom edge from the band's top).
+    """
+    theme = context["theme"]
+    brand, accent = _rgba(theme["brand"]), _rgba(theme["accent"])
+    cta = _Text("Inter", 700, 19, s)
+    arrow = _Text("Inter", 700, 20, s)
+    cta_text = context.get("cta_text", "")
+    cta_h = 36 * s + max(cta.line_px, arrow.line_px)
+    cta_w = 72 * s + cta.width(cta_text) + 10 * s + arrow.width("→")
+    margin = round(PAD * s)  # room for the shadow
+    band = Image.new("RGBA", (round(W * s), round(cta_h) + 2 * margin), (0, 0, 0, 0))
+    layer = Image.new("RGBA", band.size, (0, 0, 0, 0))
+    cx, cy = (band.width - cta_w) / 2, margin
+    _pill(layer, (cx, cy, cx + cta_w, cy + cta_h), 50 * s, gradient=(brand, accent))
+    x = cta.draw(layer, cx + 36 * s, cy + (cta_h - cta.line_px) / 2, cta_text, WHITE)
+    arrow.draw(layer, x + 10 * s, cy + (cta_h - arrow.line_px) / 2, "→", WHITE)
+    _with_shadows(band, layer, SHADOW_CTA, s)
+    return band, margin + round(cta_h)
+
+
+def _paste(canvas: Image.Image, layer: Image.Image, y: int) -> None:
+    """alpha_composite `layer` at (0, y), clipped to the canvas."""
+    top = max(0, -y)
+    bottom = min(layer.height, canvas.height - y)
+    if bottom > top:
+        canvas.alpha_composite(layer, (0, y + top), (0, top, min(layer.width, canvas.width), bottom))
+
+
+def draw_posts(context: Dict[str, Any], scale: float = 1.0, aspects: Optional[Sequence[str]] = None) -> Dict[str, Image.Image]:
+    """
+    The post in each requested aspect (default: feed only), as RGBA images.
+    The background is decoded and the text layers are laid out and shadowed
+    once; each aspect only adds a cover crop of the background and two
+    composites.
+    """
+    s = scale
+    foreground = _foreground(context, s)
+    cta, cta_bottom = _cta(context, s)
+    source = _decode(context.get("background_image"))
+    images = {}
+    for aspect in get_aspects(aspects):
+        canvas = _background(source, (round(aspect.width * s), round(aspect.height * s)))
+        _paste(canvas, foreground, round(aspect.inset_top * s))
+        _paste(canvas, cta, canvas.height - round((PAD + aspect.inset_bottom) * s) - cta_bottom)
+        images[aspect.name] = canvas
+    return images
+
+
+def draw_post(context: Dict[str, Any], scale: float = 1.0, aspect: str = "feed") -> Image.Image:
+    """The post described by a build_post_context() context, as an RGBA image."""
+    return draw_posts(context, scale, [aspect])[aspect]
+
+
+def render_post(context: Dict[str, Any], output_path, scale: float = 1.0, quality: int = 95) -> None:
+    """Draw the post described by a build_post_context() context to a JPEG."""
+    draw_post(context, scale).convert("RGB").save(str(output_path), format="JPEG", quality=quality)
@@ -0,0 +1,79 @@
+"""
+Pluggable chat / image backends, selected by config.
+
+    LLM_PROVIDER=openai|fake
+    IMAGE_PROVIDER=nebius|gemini|fake
+    IMAGE_HEDGE_PROVIDER=gemini|nebius|fake   (optional backup, see hedged.py)
+
+Providers are created lazily on first use (nothing connects at import
+time) and cached per process.
+"""
+import threading
+from typing import Dict, Optional
+
+from app.config import (
+    LLM_PROVIDER, IMAGE_PROVIDER,
+    FAKE_SEED, FAKE_ERROR_RATE, FAKE_CHAT_LATENCY, FAKE_IMAGE_LATENCY,
+    IMAGE_HEDGE_PROVIDER, IMAGE_HEDGE_PERCENTILE, IMAGE_HEDGE_DELAY_S,
+    IMAGE_HEDGE_MIN_DELAY_S, IMAGE_HEDGE_MIN_SAMPLES,
+)
+from .base import ChatProvider, ImageProvider, ProviderError, DEFAULT_IMAGE_SIZE
+from .hedged import HedgedImageProvider
+
+__all__ = [
+    "ChatProvider", "ImageProvider", "ProviderError", "DEFAULT_IMAGE_SIZE", "HedgedImageProvider",
+    "get_chat_provider", "get_image_provider",
+]
+
+_lock = threading.Lock()
+_chat: Dict[str, ChatProvider] = {}
+_image: Dict[str, ImageProvider] = {}
+
+
+def _make_chat(name: str) -> ChatProvider:
+    if name == "openai":
+        from .openai_provider import OpenAIChatProvider
+        return OpenAIChatProvider()
+    if name == "fake":
+        from .fake import FakeChatProvider
+        return FakeChatProvider(latency=FAKE_CHAT_LATENCY, error_rate=FAKE_ERROR_RATE, seed=FAKE_SEED)
+    raise ValueError(f"Unknown LLM provider: {name!r}")
+
+
+def _make_image(name: str) -> ImageProvider:
+    if name == "nebius":
+        from .nebius import NebiusImageProvider
+        return NebiusImageProvider()
+    if name == "gemini":
+        from .gemini import GeminiImageProvider
+        return GeminiImageProvider()
+    if name == "fake":
+        from .fake import FakeImageProvider
+        return FakeImageProvider(latency=FAKE_IMAGE_LATENCY, error_rate=FAKE_ERROR_RATE, seed=FAKE_SEED)
+    raise ValueError(f"Unknown image provider: {name!r}")
+
+
+def get_chat_provider(name: Optional[str] = None) -> ChatProvider:
+    name = (name or LLM_PROVIDER).lower()
+    with _lock:
+        if name not in _chat:
+            _chat[name] = _make_chat(name)
+        return _chat[name]
+
+
+def get_image_provider(name: Optional[str] = None) -> ImageProvider:
+    name = (name or IMAGE_PROVIDER).lower()
+    with _lock:
+        if name not in _image:
+            provider = _make_image(name)
+            hedge = IMAGE_HEDGE_PROVIDER.lower()
+            if hedge and hedge != name:
+                provider = HedgedImageProvider(
+                    provider, _make_image(hedge),
+                    percentile=IMAGE_HEDGE_PERCENTILE,
+                    default_delay_s=IMAGE_HEDGE_DELAY_S,
+                    min_delay_s=IMAGE_HEDGE_MIN_DELAY_S,
+                    min_samples=IMAGE_HEDGE_MIN_SAMPLES,
+                )
+            _image[name] = provider
+        return _image[name]
@@ -0,0 +1,38 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import Dict, Iterator, List, Optional, Tuple
+
+Messages = List[Dict[str, str]]
+DEFAULT_IMAGE_SIZE: Tuple[int, int] = (1080, 1350)
+
+
+class ProviderError(RuntimeError):
+    """A provider call failed (network, quota, bad response, injected fault)."""
+
+
+class ChatProvider(ABC):
+    """Chat-completion backend (OpenAI, fake, ...)."""
+
+    name = "chat"
+
+    @abstractmethod
+    def complete(self, messages: Messages, model: str, max_tokens: int = 450, temperature: float = 0.7) -> str:
+        """Return the full completion text."""
+
+    @abstractmethod
+    def stream(self, messages: Messages, model: str, max_tokens: int = 450, temperature: float = 0.7) -> Iterator[str]:
+        """Yield completion text deltas as they are produced."""
+
+
+class ImageProvider(ABC):
+    """Text-to-image backend (Nebius Flux, Gemini, fake, ...)."""
+
+    name = "image"
+
+    @abstractmethod
+    def generate(self, prompt: str, size: Tuple[int, int] = DEFAULT_IMAGE_SIZE, seed: Optional[int] = None) -> bytes:
+        """Return encoded image bytes (PNG/JPEG/WebP as produced by the backend)."""
+
+    async def agenerate(self, prompt: str, size: Tuple[int, int] = DEFAULT_IMAGE_SIZE, seed: Optional[int] = None) -> bytes:
+        """Async variant; backends with a native async client override this."""
+        return await asyncio.to_thread(self.generate, prompt, size, seed)
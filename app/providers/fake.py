@@ -0,0 +1,139 @@
+"""
+Deterministic offline backends for load tests and benchmarks.
+
+Latency and failures are drawn from a RNG seeded by (FAKE_SEED, prompt), so
+the same prompt always behaves the same way and a benchmark run is
+repeatable while still exercising slow tails and errors.
+
+Latency specs (milliseconds):
+    "fixed:800"            always 800ms
+    "uniform:300,1200"     uniform between 300 and 1200ms
+    "lognormal:800,0.5"    lognormal with median 800ms and sigma 0.5
+"""
+import io
+import re
+import json
+import time
+import random
+import asyncio
+import hashlib
+from typing import Iterator, Optional, Tuple
+
+from PIL import Image, ImageOps
+
+from .base import DEFAULT_IMAGE_SIZE, ChatProvider, ImageProvider, Messages, ProviderError
+
+
+class LatencyModel:
+    def __init__(self, spec: str = "fixed:0"):
+        self.spec = spec
+        kind, _, params = spec.partition(":")
+        self.kind = kind.strip().lower()
+        self.params = [float(p) for p in params.split(",") if p.strip()] or [0.0]
+        if self.kind not in ("fixed", "uniform", "lognormal"):
+            raise ValueError(f"Unknown latency distribution: {spec!r}")
+
+    def sample(self, rng: random.Random) -> float:
+        """Seconds."""
+        p = self.params
+        if self.kind == "fixed":
+            ms = p[0]
+        elif self.kind == "uniform":
+            ms = rng.uniform(p[0], p[1] if len(p) > 1 else p[0])
+        else:
+            ms = p[0] * rng.lognormvariate(0.0, p[1] if len(p) > 1 else 0.5)
+        return max(0.0, ms) / 1000.0
+
+
+def _rng(seed: int, *parts: str) -> random.Random:
+    digest = hashlib.sha256("|".join((str(seed),) + parts).encode("utf-8")).digest()
+    return random.Random(int.from_bytes(digest[:8], "big"))
+
+
+class _FakeBase:
+    def __init__(self, latency: str = "fixed:0", error_rate: float = 0.0, seed: int = 42):
+        self.latency = LatencyModel(latency)
+        self.error_rate = error_rate
+        self.seed = seed
+
+    def _plan(self, prompt: str) -> Tuple[random.Random, float, bool]:
+        rng = _rng(self.seed, type(self).__name__, prompt)
+        delay = self.latency.sample(rng)
+        fail = rng.random() < self.error_rate
+        return rng, delay, fail
+
+
+class FakeChatProvider(_FakeBase, ChatProvider):
+    """Returns well-formed post JSON built from the NEWS payload in the prompt."""
+
+    name = "fake"
+    CHUNK_CHARS = 12
+
+    def _render(self, messages: Messages, rng: random.Random) -> str:
+        prompt = messages[-1]["content"] if messages else ""
+        news = {}
+        m = re.search(r"NEWS: (\{.*?\})\n", prompt)
+        if m:
+            try:
+                news = json.loads(m.group(1))
+            except ValueError:
+                pass
+        title = news.get("title") or "Fake headline"
+        category = rng.choice(["politics", "cricket", "bollywood", "economy", "tech", "world"])
+        return json.dumps({
+            "category": category,
+            "image_generation_prompt": f"{category} editorial background for: {title[:80]}, 4K photorealistic, NO faces/text",
+            "title": title[:120],
+            "pov": (news.get("description") or "Fake analysis for load testing.")[:200],
+            "hashtags": f"#TheAIPoint #{category.title()} #Fake #LoadTest",
+            "source": news.get("source", "fake"),
+            "news_sensitivity": "low",
+        }, ensure_ascii=False)
+
+    def complete(self, messages: Messages, model: str, max_tokens: int = 450, temperature: float = 0.7) -> str:
+        rng, delay, fail = self._plan(json.dumps(messages, ensure_ascii=False))
+        time.sleep(delay)
+        if fail:
+            raise ProviderError("fake chat: injected failure")
+        return self._render(messages, rng)
+
+    def stream(self, messages: Messages, model: str, max_tokens: int = 450, temperature: float = 0.7) -> Iterator[str]:
+        rng, delay, fail = self._plan(json.dumps(messages, ensure_ascii=False))
+        text = self._render(messages, rng)
+        chunks = [text[i:i + self.CHUNK_CHARS] for i in range(0, len(text), self.CHUNK_CHARS)]
+        # ~25% of the latency before the first token, the rest spread over the stream
+        time.sleep(delay * 0.25)
+        per_chunk = delay * 0.75 / max(1, len(chunks))
+        for idx, chunk in enumerate(chunks):
+            if fail and idx == len(chunks) // 2:
+                raise ProviderError("fake chat: injected failure mid-stream")
+            time.sleep(per_chunk)
+            yield chunk
+
+
+class FakeImageProvider(_FakeBase, ImageProvider):
+    """Returns a JPEG gradient whose colours are derived from the prompt."""
+
+    name = "fake"
+
+    def _render(self, rng: random.Random, size: Tuple[int, int]) -> bytes:
+        top = tuple(rng.randrange(20, 200) for _ in range(3))
+        bottom = tuple(rng.randrange(0, 80) for _ in range(3))
+        img = ImageOps.colorize(Image.linear_gradient("L").resize(size), top, bottom)
+        out = io.BytesIO()
+        img.save(out, format="JPEG", quality=85)
+        return out.getvalue()
+
+    def generate(self, prompt: str, size: Tuple[int, int] = DEFAULT_IMAGE_SIZE, seed: Optional[int] = None) -> bytes:
+        rng, delay, fail = self._plan(f"{prompt}|{seed}")
+        time.sleep(delay)
+        if fail:
+            raise ProviderError("fake image: injected failure")
+        return self._render(rng, size)
+
+    async def agenerate(self, prompt: str, size: Tuple[int, int] = DEFAULT_IMAGE_SIZE, seed: Optional[int] = None) -> bytes:
+        rng, delay, fail = self._plan(f"{prompt}|{seed}")
+        await asyncio.sleep(delay)
+        if fail:
+            raise ProviderError("fake image: injected failure")
+        return self._render(rng, size)
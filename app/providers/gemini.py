@@ -0,0 +1,54 @@
+import os
+from typing import Optional, Tuple
+
+from .base import DEFAULT_IMAGE_SIZE, ImageProvider
+
+# Google Gemini
+try:
+    from google import genai
+except ImportError:
+    genai = None
+
+GEMINI_IMAGE_MODEL = "gemini-2.5-flash-image-preview"
+
+
+class GeminiImageProvider(ImageProvider):
+    """Google Gemini image generation ("Nano Banana")."""
+
+    name = "gemini"
+
+    def __init__(self, api_key: Optional[str] = None, model: str = GEMINI_IMAGE_MODEL):
+        self.api_key = api_key or os.getenv("GOOGLE_API_KEY")
+        self.model = model
+        self._client = None
+
+    @property
+    def client(self):
+        if not (self.api_key and genai):
+            raise RuntimeError("Google GenAI not configured. Set GOOGLE_API_KEY.")
+        if self._client is None:
+            self._client = genai.Client(api_key=self.api_key)
+        return self._client
+
+    @staticmethod
+    def _image_bytes(response) -> bytes:
+        for part in response.candidates[0].content.parts:
+            if getattr(part, "inline_data", None):
+                return part.inline_data.data
+        raise RuntimeError("❌ No image returned from Gemini.")
+
+    def generate(self, prompt: str, size: Tuple[int, int] = DEFAULT_IMAGE_SIZE, seed: Optional[int] = None) -> bytes:
+        response = self.client.models.generate_content(
+            model=self.model,
+            contents=prompt,
+            config={"seed": seed} if seed is not None else None,
+        )
+        return self._image_bytes(response)
+
+    async def agenerate(self, prompt: str, size: Tuple[int, int] = DEFAULT_IMAGE_SIZE, seed: Optional[int] = None) -> bytes:
+        response = await self.client.aio.models.generate_content(
+            model=self.model,
+            contents=prompt,
+            config={"seed": seed} if seed is not None else None,
+        )
+        return self._image_bytes(response)
@@ -0,0 +1,109 @@
+"""
+Hedged image generation across two providers.
+
+The prompt goes to the primary first. If it has not answered within the
+hedge delay (a percentile of the primary's recent latency), the same prompt
+also goes to the secondary; the first successful answer wins and the other
+request is cancelled. A primary that fails outright fails over to the
+secondary immediately.
+
+Per-provider latency, wins and hedge counts go to app.metrics:
+
+    image.latency_s{provider=...}      successful calls (and cancelled losers)
+    image.wins{provider=...}           answers used
+    image.errors{provider=...}
+    image.hedge.fired / image.hedge.won{provider=...}
+"""
+import time
+import asyncio
+from typing import Dict, Optional, Tuple
+
+from app import metrics
+from .base import DEFAULT_IMAGE_SIZE, ImageProvider
+
+
+class HedgedImageProvider(ImageProvider):
+    """Primary with a delayed backup request to a secondary provider."""
+
+    def __init__(
+        self,
+        primary: ImageProvider,
+        secondary: ImageProvider,
+        percentile: float = 90,
+        default_delay_s: float = 8.0,
+        min_delay_s: float = 1.5,
+        min_samples: int = 5,
+    ):
+        self.primary = primary
+        self.secondary = secondary
+        self.percentile = percentile
+        self.default_delay_s = default_delay_s
+        self.min_delay_s = min_delay_s
+        self.min_samples = min_samples
+        # Seeds and cache keys follow the primary
+        self.name = primary.name
+
+    def hedge_delay(self) -> float:
+        """How long to wait on the primary before also asking the secondary."""
+        if metrics.sample_count("image.latency_s", provider=self.primary.name) < self.min_samples:
+            return self.default_delay_s
+        p = metrics.percentile("image.latency_s", self.percentile, provider=self.primary.name)
+        return max(self.min_delay_s, p)
+
+    async def _call(self, provider: ImageProvider, prompt: str, size: Tuple[int, int], seed: Optional[int]) -> bytes:
+        started = time.monotonic()
+        try:
+            image = await provider.agenerate(prompt, size=size, seed=seed)
+        except asyncio.CancelledError:
+            # A cancelled loser took at least this long; recording the lower
+            # bound keeps hedging from dragging its own percentile down
+            metrics.observe("image.latency_s", time.monotonic() - started, provider=provider.name)
+            raise
+        except Exception:
+            metrics.incr("image.errors", provider=provider.name)
+            raise
+        metrics.observe("image.latency_s", time.monotonic() - started, provider=provider.name)
+        return image
+
+    def generate(self, prompt: str, size: Tuple[int, int] = DEFAULT_IMAGE_SIZE, seed: Optional[int] = None) -> bytes:
+        return asyncio.run(self.agenerate(prompt, size=size, seed=seed))
+
+    async def agenerate(self, prompt: str, size: Tuple[int, int] = DEFAULT_IMAGE_SIZE, seed: Optional[int] = None) -> bytes:
+        hedge_at = time.monotonic() + self.hedge_delay()
+        pending: Dict[asyncio.Task, ImageProvider] = {
+            asyncio.create_task(self._call(self.primary, prompt, size, seed)): self.primary
+        }
+        hedged = False
+        last_error: Optional[BaseException] = None
+
+        def fire_secondary() -> None:
+            nonlocal hedged
+            hedged = True
+            pending[asyncio.create_task(self._call(self.secondary, prompt, size, seed))] = self.secondary
+
+        try:
+            while pending:
+                timeout = None if hedged else max(0.0, hedge_at - time.monotonic())
+                done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    metrics.incr("image.hedge.fired")
+                    fire_secondary()
+                    continue
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is not None:
+                        last_error = task.exception()
+                        continue
+                    metrics.incr("image.wins", provider=provider.name)
+                    if hedged:
+                        metrics.incr("image.hedge.won", provider=provider.name)
+                    return task.result()
+                if not hedged:
+                    metrics.incr("image.hedge.failover")
+                    fire_secondary()
+        finally:
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+        raise last_error
@@ -0,0 +1,66 @@
+import os
+import base64
+import asyncio
+from typing import Optional, Tuple
+
+from .base import DEFAULT_IMAGE_SIZE, ImageProvider
+
+NEBIUS_BASE_URL = "https://api.studio.nebius.com/v1/"
+FLUX_MODEL = "black-forest-labs/flux-schnell"
+
+
+class NebiusImageProvider(ImageProvider):
+    """Nebius Studio Flux Schnell (OpenAI-compatible images API)."""
+
+    name = "nebius"
+
+    def __init__(self, api_key: Optional[str] = None, model: str = FLUX_MODEL):
+        self.api_key = api_key or os.getenv("NEBIUS_API_KEY")
+        self.model = model
+        self._client = None
+        self._aclient = None
+        self._aclient_loop = None
+
+    def _check(self) -> None:
+        if not self.api_key:
+            raise RuntimeError("Nebius Studio not configured. Set NEBIUS_API_KEY.")
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(base_url=NEBIUS_BASE_URL, api_key=self.api_key)
+        return self._client
+
+    @property
+    def aclient(self):
+        # httpx async pools are bound to the event loop they were created on;
+        # each asyncio.run() batch gets its own client
+        loop = asyncio.get_running_loop()
+        if self._aclient is None or self._aclient_loop is not loop:
+            from openai import AsyncOpenAI
+            self._aclient = AsyncOpenAI(base_url=NEBIUS_BASE_URL, api_key=self.api_key)
+            self._aclient_loop = loop
+        return self._aclient
+
+    def _kwargs(self, prompt: str, size: Tuple[int, int], seed: Optional[int]) -> dict:
+        kwargs = dict(
+            model=self.model,
+            prompt=prompt,
+            response_format="b64_json",
+            size=f"{size[0]}x{size[1]}",
+        )
+        if seed is not None:
+            kwargs["extra_body"] = {"seed": seed}
+        return kwargs
+
+    def generate(self, prompt: str, size: Tuple[int, int] = DEFAULT_IMAGE_SIZE, seed: Optional[int] = None) -> bytes:
+        self._check()
+        response = self.client.images.generate(**self._kwargs(prompt, size, seed))
+        return base64.b64decode(response.data[0].b64_json)
+
+    async def agenerate(self, prompt: str, size: Tuple[int, int] = DEFAULT_IMAGE_SIZE, seed: Optional[int] = None) -> bytes:
+        # Native async so cancellation actually aborts the HTTP request
+        self._check()
+        response = await self.aclient.images.generate(**self._kwargs(prompt, size, seed))
+        return base64.b64decode(response.data[0].b64_json)
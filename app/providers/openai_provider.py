@@ -0,0 +1,43 @@
+import os
+from typing import Iterator
+
+from .base import ChatProvider, Messages
+
+
+class OpenAIChatProvider(ChatProvider):
+    """OpenAI chat completions. The client is created on first use, not at import."""
+
+    name = "openai"
+
+    def __init__(self, api_key: str = None):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self._client = None
+
+    @property
+    def client(self):
+        if self._client is None:
+            from openai import OpenAI
+            self._client = OpenAI(api_key=self.api_key)
+        return self._client
+
+    def complete(self, messages: Messages, model: str, max_tokens: int = 450, temperature: float = 0.7) -> str:
+        resp = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_completion_tokens=max_tokens,
+            temperature=temperature
+        )
+        return resp.choices[0].message.content or ""
+
+    def stream(self, messages: Messages, model: str, max_tokens: int = 450, temperature: float = 0.7) -> Iterator[str]:
+        stream = self.client.chat.completions.create(
+            model=model,
+            messages=messages,
+            max_completion_tokens=max_tokens,
+            temperature=temperature,
+            stream=True
+        )
+        for chunk in stream:
+            delta = chunk.choices[0].delta.content if chunk.choices else None
+            if delta:
+                yield delta
@@ -0,0 +1,76 @@
+"""
+Cache of finished post images.
+
+Re-runs after a failed email and re-sends in a later slot render posts that
+are pixel-for-pixel identical to ones already rendered. Each output image
+is cached under a key covering everything that reaches the pixels: the
+renderer version (template + fonts, or the Pillow engine), engine, render
+profile, aspect, the rendered text fields, the theme and the background
+bytes. A hit restores the file without touching the browser.
+
+The IST timestamp in the context is not drawn by the post template or the
+Pillow engine, so it is left out of the key, like model_name.
+"""
+import json
+import hashlib
+import logging
+import pathlib
+import threading
+from typing import Any, Dict, Optional
+
+from app import metrics
+from app.config import RENDER_CACHE_ENABLED, RENDER_CACHE_DIR, RENDER_CACHE_MAX_MB
+from app.disk_cache import DiskLRUCache, cache_key
+from app.render_profiles import ASPECTS, RenderProfile
+
+# Context fields that end up in the image (model_name and timestamp_ist do not)
+RENDERED_FIELDS = ("title", "pov", "category", "category_title", "cta_text", "headline_size", "icon", "theme")
+
+_cache: Optional[DiskLRUCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_render_cache() -> Optional[DiskLRUCache]:
+    global _cache
+    if not RENDER_CACHE_ENABLED:
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = DiskLRUCache(RENDER_CACHE_DIR, int(RENDER_CACHE_MAX_MB * 1024 * 1024), name="render_cache", suffix=".img")
+        return _cache
+
+
+def render_key(version: str, engine: str, context: Dict[str, Any], profile: RenderProfile, aspect: str) -> str:
+    fields = json.dumps({f: context.get(f) for f in RENDERED_FIELDS}, sort_keys=True, ensure_ascii=False)
+    background = hashlib.sha256(context.get("background_image") or b"").hexdigest()
+    return cache_key(version, engine, repr(profile), repr(ASPECTS[aspect]), fields, background)
+
+
+def restore(keys: Dict[str, str], outputs: Dict[str, pathlib.Path]) -> bool:
+    """Write every cached variant to its output path; False (nothing written) unless all are cached."""
+    cache = get_render_cache()
+    if cache is None:
+        return False
+    blobs = {}
+    for aspect, key in keys.items():
+        data = cache.get(key)
+        if data is None:
+            return False
+        blobs[aspect] = data
+    for aspect, data in blobs.items():
+        with open(outputs[aspect], "wb") as f:
+            f.write(data)
+    metrics.incr("render_cache.posts_restored")
+    return True
+
+
+def store(keys: Dict[str, str], outputs: Dict[str, pathlib.Path]) -> None:
+    cache = get_render_cache()
+    if cache is None:
+        return
+    for aspect, key in keys.items():
+        try:
+            with open(outputs[aspect], "rb") as f:
+                cache.put(key, f.read())
+        except OSError as e:
+            logging.warning(f"⚠️ render_cache: could not cache {outputs[aspect]}: {e}")
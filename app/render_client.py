@@ -0,0 +1,115 @@
+"""
+Client for the local render server (app/render_server.py).
+
+With RENDER_SERVER_URL set, Chromium posts are rendered by the long-lived
+server, which keeps Chromium, the fonts and the compiled template warm
+across scheduled runs. When the server is not reachable, or fails a post,
+the caller renders in-process instead; after a connection failure the
+server is not tried again for SERVER_RETRY_S.
+"""
+import time
+import base64
+import logging
+import pathlib
+import threading
+import dataclasses
+from typing import Any, Dict, Iterable, Optional, Tuple
+
+import requests
+
+from app import metrics
+from app.config import RENDER_SERVER_URL, RENDER_TIMEOUT_S
+from app.render_profiles import RenderProfile, get_aspects
+from app.render_service import asset_url
+
+SERVER_RETRY_S = 30.0
+CONNECT_TIMEOUT_S = 2.0
+
+
+def encode_request(context: Dict[str, Any], aspects: Iterable[str], profile: RenderProfile) -> Dict[str, Any]:
+    """JSON body of POST /render for a build_post_context() context."""
+    background = context.get("background_image")
+    return {
+        "context": {k: v for k, v in context.items() if k not in ("background_image", "background_url")},
+        "background": base64.b64encode(background).decode("ascii") if background else None,
+        "aspects": list(aspects),
+        "profile": dataclasses.asdict(profile),
+    }
+
+
+def decode_request(payload: Dict[str, Any]) -> Tuple[Dict[str, Any], list, RenderProfile]:
+    """Inverse of encode_request; raises ValueError/KeyError/TypeError on a bad body."""
+    context = dict(payload["context"])
+    background = base64.b64decode(payload["background"]) if payload.get("background") else None
+    context["background_image"] = background
+    context["background_url"] = asset_url(background) if background else ""
+    aspects = [a.name for a in get_aspects(payload["aspects"])]
+    return context, aspects, RenderProfile(**payload["profile"])
+
+
+class RenderClient:
+    def __init__(self, url: str = RENDER_SERVER_URL, timeout_s: float = RENDER_TIMEOUT_S + 15):
+        self.url = url.rstrip("/")
+        self.timeout_s = timeout_s
+        self._local = threading.local()  # one keep-alive session per thread
+        self._down_until = 0.0
+
+    def _session(self) -> requests.Session:
+        if not hasattr(self._local, "session"):
+            self._local.session = requests.Session()
+        return self._local.session
+
+    def _mark_down(self, error: Exception) -> None:
+        if time.monotonic() >= self._down_until:
+            logging.info(f"ℹ️ Render server {self.url} unavailable ({type(error).__name__}); rendering in-process")
+        self._down_until = time.monotonic() + SERVER_RETRY_S
+
+    def available(self) -> bool:
+        """True if the server answers its health check (skipped while marked down)."""
+        if time.monotonic() < self._down_until:
+            return False
+        try:
+            self._session().get(f"{self.url}/health", timeout=CONNECT_TIMEOUT_S).raise_for_status()
+            return True
+        except requests.RequestException as e:
+            self._mark_down(e)
+            return False
+
+    def render(self, context: Dict[str, Any], outputs: Dict[str, pathlib.Path], profile: RenderProfile) -> bool:
+        """Render a post on the server into `outputs`; False (nothing written) if it could not."""
+        if time.monotonic() < self._down_until:
+            return False
+        try:
+            response = self._session().post(
+                f"{self.url}/render", json=encode_request(context, outputs, profile),
+                timeout=(CONNECT_TIMEOUT_S, self.timeout_s)
+            )
+        except requests.RequestException as e:
+            self._mark_down(e)
+            metrics.incr("render_server.fallbacks", reason="unreachable")
+            return False
+        if response.status_code != 200:
+            error = response.text[:200]
+            logging.warning(f"⚠️ Render server failed a post ({response.status_code}: {error}); rendering in-process")
+            metrics.incr("render_server.fallbacks", reason="error")
+            return False
+        images = response.json()["images"]
+        for aspect, path in outputs.items():
+            pathlib.Path(path).write_bytes(base64.b64decode(images[aspect]))
+        metrics.incr("render_server.posts")
+        return True
+
+
+_client: Optional[RenderClient] = None
+_client_lock = threading.Lock()
+
+
+def get_render_client() -> Optional[RenderClient]:
+    """Process-wide client, or None when RENDER_SERVER_URL is not set."""
+    global _client
+    if not RENDER_SERVER_URL:
+        return None
+    with _client_lock:
+        if _client is None:
+            _client = RenderClient()
+        return _client
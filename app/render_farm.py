@@ -0,0 +1,289 @@
+"""
+Multi-process render farm.
+
+One process driving one Chromium caps throughput on large batches. The farm
+runs `workers` processes, each owning its own RenderService (and so its own
+Chromium); idle workers pull the next job from the parent's local queue.
+
+Workers write no files: each encoded image is put in a
+`multiprocessing.shared_memory` block and only its name and size travel
+back over the worker's pipe. The parent copies the bytes to the requested
+output path and unlinks the block.
+
+Health checks: every worker sends a heartbeat each `heartbeat_s` from a
+side thread. A worker that exits, misses HEALTH_MISSES heartbeats, or holds
+one job past the render timeout is killed and replaced by a fresh process.
+The job it held fails (as with a crashed page in RenderService); the rest of
+the batch carries on. Each worker has its own pipe, so killing one can never
+leave a lock held on a channel the others share.
+
+Workers are started with "spawn", not fork: the parent runs threads (render
+and background loops) that a fork would copy in an arbitrary state.
+"""
+import time
+import pickle
+import logging
+import pathlib
+import threading
+import multiprocessing
+from collections import deque
+from multiprocessing import shared_memory
+from multiprocessing.connection import Connection, wait
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from app import metrics
+from app.config import RENDER_TIMEOUT_S, RENDER_WORKERS, RENDER_WORKER_HEARTBEAT_S
+from app.render_profiles import DEFAULT_ASPECT, RenderProfile, get_profile
+
+HEALTH_MISSES = 3     # heartbeats a worker may miss before it is restarted
+STARTUP_S = 30.0      # for a new process to import and send its first heartbeat
+KILL_GRACE_S = 10.0   # past the render timeout; the worker's own timeout should fire first
+
+
+def _default_service():
+    from app.render_service import RenderService
+    return RenderService(pages=1)
+
+
+def _share(images: Dict[str, bytes]) -> Dict[str, Tuple[str, int]]:
+    """Copy each image into a new shared memory block; aspect -> (block name, size)."""
+    blocks = {}
+    for aspect, data in images.items():
+        shm = shared_memory.SharedMemory(create=True, size=max(1, len(data)))
+        shm.buf[:len(data)] = data
+        blocks[aspect] = (shm.name, len(data))
+        shm.close()  # the parent unlinks it once copied
+    return blocks
+
+
+def _take(name: str, size: int) -> bytes:
+    shm = shared_memory.SharedMemory(name=name)
+    try:
+        return bytes(shm.buf[:size])
+    finally:
+        shm.close()
+        shm.unlink()
+
+
+def _picklable(error: BaseException) -> BaseException:
+    try:
+        pickle.dumps(error)
+        return error
+    except Exception:
+        return RuntimeError(f"{type(error).__name__}: {error}")
+
+
+def _worker_main(conn: Connection, service_factory: Callable[[], Any], heartbeat_s: float) -> None:
+    """Worker process: render jobs received on `conn` until None or the pipe closes."""
+    send_lock = threading.Lock()
+    stop = threading.Event()
+
+    def send(message) -> None:
+        with send_lock:
+            conn.send(message)
+
+    def beat() -> None:
+        while True:
+            try:
+                send(("heartbeat",))
+            except OSError:
+                return
+            if stop.wait(heartbeat_s):
+                return
+
+    threading.Thread(target=beat, name="render-heartbeat", daemon=True).start()
+    service = service_factory()
+    try:
+        while True:
+            try:
+                job = conn.recv()
+            except EOFError:
+                break
+            if job is None:
+                break
+            job_id, html_content, aspects, assets, profile = job
+            try:
+                images = service.render(html_content, dict.fromkeys(aspects), assets, profile)
+                send(("done", job_id, _share(images)))
+            except Exception as e:
+                send(("error", job_id, _picklable(e)))
+    finally:
+        stop.set()
+        service.close()
+
+
+class _Worker:
+    """Parent-side handle: process, pipe, last sign of life and the job it holds."""
+
+    def __init__(self, worker_id: int, process, conn: Connection):
+        self.id = worker_id
+        self.process = process
+        self.conn = conn
+        self.last_seen = time.monotonic()
+        self.seen = False  # sent anything yet; jobs only go to workers that are up
+        self.job: Optional[int] = None
+        self.job_started = 0.0
+
+
+class RenderFarm:
+    """Same render()/render_many()/close() interface as RenderService, across processes."""
+
+    def __init__(self, workers: int = RENDER_WORKERS, timeout_s: float = RENDER_TIMEOUT_S,
+                 heartbeat_s: float = RENDER_WORKER_HEARTBEAT_S, grace_s: float = KILL_GRACE_S,
+                 service_factory: Callable[[], Any] = _default_service):
+        self.workers = max(1, workers)
+        self.timeout_s = timeout_s
+        self.heartbeat_s = heartbeat_s
+        self.grace_s = grace_s
+        self.service_factory = service_factory  # picklable; builds the service inside each worker
+        self._ctx = multiprocessing.get_context("spawn")
+        self._pool: Dict[int, _Worker] = {}
+        self._next_id = 0
+        self._lock = threading.Lock()  # one batch at a time
+
+    # --- workers ---------------------------------------------------------
+
+    def _spawn(self) -> None:
+        parent_conn, child_conn = self._ctx.Pipe()
+        process = self._ctx.Process(
+            target=_worker_main, args=(child_conn, self.service_factory, self.heartbeat_s),
+            name=f"render-worker-{self._next_id}", daemon=True
+        )
+        process.start()
+        child_conn.close()
+        self._pool[self._next_id] = _Worker(self._next_id, process, parent_conn)
+        self._next_id += 1
+
+    def _ensure_started(self) -> None:
+        if not self._pool:
+            for _ in range(self.workers):
+                self._spawn()
+            logging.info(f"🏭 Render farm started ({self.workers} worker processes)")
+
+    def _replace(self, worker: _Worker, reason: str) -> Optional[int]:
+        """Kill and replace a worker; returns the job it was holding."""
+        logging.warning(f"⚠️ Render worker {worker.id} {reason}; restarting it")
+        metrics.incr("render_farm.restarts", reason=reason.split()[0])
+        if worker.process.is_alive():
+            worker.process.kill()
+        worker.process.join(timeout=5)
+        worker.conn.close()
+        del self._pool[worker.id]
+        self._spawn()
+        return worker.job
+
+    def _unhealthy(self, worker: _Worker, now: float) -> Optional[str]:
+        if not worker.process.is_alive():
+            return f"exited (code {worker.process.exitcode})"
+        if now - worker.last_seen > (HEALTH_MISSES * self.heartbeat_s if worker.seen else STARTUP_S):
+            return "stopped responding"
+        if worker.job is not None and now - worker.job_started > self.timeout_s + self.grace_s:
+            return "timed out rendering"
+        return None
+
+    def close(self) -> None:
+        """Stop all workers (each closes its own Chromium)."""
+        with self._lock:
+            for worker in self._pool.values():
+                try:
+                    worker.conn.send(None)
+                except OSError:
+                    pass
+            for worker in self._pool.values():
+                worker.process.join(timeout=30)
+                if worker.process.is_alive():
+                    worker.process.kill()
+                    worker.process.join(timeout=5)
+                worker.conn.close()
+            self._pool.clear()
+
+    # --- rendering -------------------------------------------------------
+
+    def _run(self, jobs: Sequence[Tuple], concurrency: Optional[int],
+             profile: RenderProfile) -> List[Tuple[Optional[BaseException], Dict[str, bytes]]]:
+        outputs = [job[1] if isinstance(job[1], dict) else {DEFAULT_ASPECT: job[1]} for job in jobs]
+        results: List[Optional[Tuple[Optional[BaseException], Dict[str, bytes]]]] = [None] * len(jobs)
+        pending = deque(range(len(jobs)))
+        limit = max(1, concurrency or self.workers)
+        in_flight = 0
+
+        def finish(job_id: int, error: Optional[BaseException], images: Dict[str, bytes]) -> None:
+            nonlocal in_flight
+            results[job_id] = (error, images)
+            in_flight -= 1
+
+        with self._lock:
+            self._ensure_started()
+            while any(r is None for r in results):
+                # Hand the next jobs to idle workers
+                for worker in list(self._pool.values()):
+                    if not pending or in_flight >= limit:
+                        break
+                    if worker.job is not None or not worker.seen:
+                        continue
+                    job_id = pending.popleft()
+                    html_content, _, *assets = jobs[job_id]
+                    try:
+                        worker.conn.send((job_id, html_content, list(outputs[job_id]), assets[0] if assets else None, profile))
+                    except OSError:
+                        pending.appendleft(job_id)
+                        self._replace(worker, "exited (pipe closed)")
+                        continue
+                    worker.job, worker.job_started = job_id, time.monotonic()
+                    in_flight += 1
+
+                by_conn = {w.conn: w for w in self._pool.values()}
+                for conn in wait(list(by_conn), timeout=min(0.5, self.heartbeat_s)):
+                    worker = by_conn[conn]
+                    try:
+                        while conn.poll():
+                            message = conn.recv()
+                            worker.last_seen, worker.seen = time.monotonic(), True
+                            if message[0] == "done":
+                                job_id, blocks = message[1], message[2]
+                                worker.job = None
+                                try:
+                                    images = {aspect: _take(name, size) for aspect, (name, size) in blocks.items()}
+                                    for aspect, data in images.items():
+                                        if outputs[job_id][aspect]:
+                                            pathlib.Path(outputs[job_id][aspect]).write_bytes(data)
+                                except OSError as e:
+                                    finish(job_id, e, {})
+                                else:
+                                    finish(job_id, None, images)
+                            elif message[0] == "error":
+                                worker.job = None
+                                finish(message[1], message[2], {})
+                    except (EOFError, OSError):
+                        pass  # the process is gone; the health check below replaces it
+
+                now = time.monotonic()
+                for worker in list(self._pool.values()):
+                    reason = self._unhealthy(worker, now)
+                    if reason is None:
+                        continue
+                    job_id = self._replace(worker, reason)
+                    if job_id is not None:
+                        error = TimeoutError if reason.startswith("timed out") else RuntimeError
+                        finish(job_id, error(f"Render worker {reason}"), {})
+        metrics.incr("render.posts", sum(1 for error, _ in results if error is None))
+        return results
+
+    def render(self, html_content: str, output_path, assets: Optional[Dict[str, bytes]] = None,
+               profile: Optional[RenderProfile] = None) -> Dict[str, bytes]:
+        """Render one post on a worker (blocking; see RenderService.arender)."""
+        error, images = self._run([(html_content, output_path, assets)], 1, get_profile(profile))[0]
+        if error is not None:
+            raise error
+        return images
+
+    def render_many(self, jobs: Sequence[Tuple], concurrency: Optional[int] = None,
+                    profile: Optional[RenderProfile] = None) -> List[Optional[BaseException]]:
+        """
+        Render (html, output_path[, assets]) jobs across the workers, at most
+        `concurrency` at once (default one per worker). Returns None or the
+        exception for each job, in input order.
+        """
+        if not jobs:
+            return []
+        return [error for error, _ in self._run(jobs, concurrency, get_profile(profile))]
@@ -0,0 +1,143 @@
+"""
+Named output profiles for post images.
+
+A profile fixes the render scale (1 = the 1080x1350 layout), the output
+format and quality and, optionally, a byte budget: with `max_bytes` set the
+image is encoded at the highest quality (binary search between
+`min_quality` and `quality`) that fits the budget.
+
+    preview  540x675 JPEG for quick looks / email previews
+    social   1080x1350 JPEG, the size Instagram/X actually display (default)
+    print    3240x4050 JPEG q95, the old always-3x output
+
+Aspects are the placements a post is published to. All share one layout;
+only the canvas height and the safe-area insets differ, so every variant
+can be produced from a single layout pass.
+"""
+import io
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image
+
+from app import metrics
+from app.config import RENDER_PROFILE
+
+
+@dataclass(frozen=True)
+class RenderProfile:
+    name: str
+    scale: float = 1.0        # device scale factor over the 1080x1350 layout
+    format: str = "jpeg"      # jpeg | png | webp
+    quality: int = 90         # jpeg/webp; the upper bound when a budget is set
+    max_bytes: int = 0        # 0 = no size budget
+    min_quality: int = 60     # never go below this to meet the budget
+
+    @property
+    def ext(self) -> str:
+        return ".jpg" if self.format == "jpeg" else f".{self.format}"
+
+    @property
+    def lossy(self) -> bool:
+        return self.format in ("jpeg", "webp")
+
+
+@dataclass(frozen=True)
+class Aspect:
+    name: str
+    width: int                # CSS px
+    height: int
+    inset_top: int = 0        # extra space kept clear of platform UI
+    inset_bottom: int = 0
+
+
+ASPECTS: Dict[str, Aspect] = {
+    "feed": Aspect("feed", 1080, 1350),                                      # 4:5
+    "story": Aspect("story", 1080, 1920, inset_top=200, inset_bottom=220),   # 9:16
+    "square": Aspect("square", 1080, 1080),                                  # 1:1
+}
+DEFAULT_ASPECT = "feed"
+
+
+def get_aspects(aspects: Optional[Iterable[str]]) -> List[Aspect]:
+    """Aspect objects for names (None = just the feed layout), in order, deduplicated."""
+    names = list(dict.fromkeys(a.lower() for a in (aspects or [DEFAULT_ASPECT])))
+    unknown = [n for n in names if n not in ASPECTS]
+    if unknown:
+        raise ValueError(f"Unknown aspect(s) {', '.join(unknown)} (expected {', '.join(ASPECTS)})")
+    return [ASPECTS[n] for n in names]
+
+
+PROFILES: Dict[str, RenderProfile] = {
+    "preview": RenderProfile("preview", scale=0.5, quality=75, max_bytes=150_000),
+    "social": RenderProfile("social", scale=1.0, quality=92, max_bytes=1_000_000),
+    "print": RenderProfile("print", scale=3.0, quality=95),
+}
+
+
+def get_profile(profile=None) -> RenderProfile:
+    """A RenderProfile, a profile name, or None for RENDER_PROFILE."""
+    if isinstance(profile, RenderProfile):
+        return profile
+    name = (profile or RENDER_PROFILE).lower()
+    if name not in PROFILES:
+        raise ValueError(f"Unknown render profile {name!r} (expected one of {', '.join(PROFILES)})")
+    return PROFILES[name]
+
+
+def _encode(img: Image.Image, fmt: str, quality: int) -> bytes:
+    out = io.BytesIO()
+    if fmt == "jpeg":
+        img.convert("RGB").save(out, format="JPEG", quality=quality, optimize=True, progressive=True)
+    elif fmt == "webp":
+        img.save(out, format="WEBP", quality=quality, method=4)
+    else:
+        img.save(out, format="PNG", optimize=False, compress_level=6)
+    return out.getvalue()
+
+
+def encode_image(img: Image.Image, profile: RenderProfile, warn: bool = True) -> Tuple[bytes, Optional[int]]:
+    """
+    Encode `img` per the profile. Returns (bytes, quality used); quality is
+    None for PNG. If even `min_quality` is over budget, that encoding is
+    returned anyway (and logged, unless `warn` is False).
+    """
+    if not profile.lossy:
+        data = _encode(img, profile.format, 0)
+        if warn and profile.max_bytes and len(data) > profile.max_bytes:
+            logging.warning(f"⚠️ {profile.name}: PNG is {len(data) / 1e6:.2f}MB, over the {profile.max_bytes / 1e6:.2f}MB budget")
+        return data, None
+
+    data = _encode(img, profile.format, profile.quality)
+    if not profile.max_bytes or len(data) <= profile.max_bytes:
+        return data, profile.quality
+
+    # Highest quality that fits: binary search over [min_quality, quality)
+    best: Optional[Tuple[bytes, int]] = None
+    lo, hi = profile.min_quality, profile.quality - 1
+    attempts = 1
+    while lo <= hi:
+        mid = (lo + hi) // 2
+        candidate = _encode(img, profile.format, mid)
+        attempts += 1
+        if len(candidate) <= profile.max_bytes:
+            best, lo = (candidate, mid), mid + 1
+        else:
+            hi = mid - 1
+    metrics.observe("render.encode_attempts", attempts, profile=profile.name)
+    if best is None:
+        best = (_encode(img, profile.format, profile.min_quality), profile.min_quality)
+        if warn:
+            logging.warning(f"⚠️ {profile.name}: {len(best[0]) / 1e6:.2f}MB at quality {profile.min_quality}, over the {profile.max_bytes / 1e6:.2f}MB budget")
+    return best
+
+
+def save_image(img: Image.Image, output_path, profile: RenderProfile) -> int:
+    """Encode per the profile and write to `output_path`; returns the byte size."""
+    data, quality = encode_image(img, profile)
+    with open(output_path, "wb") as f:
+        f.write(data)
+    metrics.observe("render.bytes", len(data), profile=profile.name)
+    logging.debug(f"{profile.name}: {img.width}x{img.height} {profile.format} q={quality} {len(data) / 1024:.0f}KB")
+    return len(data)
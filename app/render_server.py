@@ -0,0 +1,127 @@
+"""
+Long-lived local render server.
+
+    python -m app.render_server
+
+scheduler.py runs one job per process, so in-process rendering pays the
+Playwright/Chromium launch on every scheduled run. This server keeps
+Chromium (render_service, or the render farm with RENDER_WORKERS), the
+vendored fonts and the compiled post template warm between runs. Runs with
+RENDER_SERVER_URL pointing here send it their posts (see render_client) and
+render in-process when it is not up.
+
+    GET  /health  -> {"status": "ok", "renders": n, "uptime_s": s}
+    POST /render  -> {"images": {aspect: base64 image}}; body from render_client.encode_request
+"""
+from dotenv import load_dotenv
+
+load_dotenv()
+
+import json
+import time
+import base64
+import logging
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+from app import metrics
+from app.config import RENDER_SERVER_HOST, RENDER_SERVER_PORT
+from app.fonts import post_font_css
+from app.generate_image import THEMES, get_post_template, post_assets, render_post_html
+from app.render_client import decode_request
+from app.render_profiles import RenderProfile, get_profile
+from app.render_service import get_render_service
+
+MAX_REQUEST_BYTES = 64 * 1024 * 1024
+
+
+def render_context(context: Dict[str, Any], aspects: List[str], profile: RenderProfile) -> Dict[str, bytes]:
+    """Render a post context on this process's warm renderer; aspect -> image bytes."""
+    return get_render_service().render(render_post_html(context), dict.fromkeys(aspects), post_assets(context), profile)
+
+
+def warm_up() -> None:
+    """Compile the template, load the fonts and launch Chromium with one throwaway render."""
+    started = time.monotonic()
+    get_post_template()
+    post_font_css()
+    theme = THEMES["default"]
+    context = dict(
+        title="Warm-up", pov="", background_image=None, background_url="", model_name="", timestamp_ist="",
+        category="default", category_title=theme["title"], cta_text="", headline_size="h-xl", icon=theme["icon"], theme=theme
+    )
+    try:
+        render_context(context, ["feed"], get_profile("preview"))
+        logging.info(f"🔥 Render server warm in {time.monotonic() - started:.1f}s")
+    except Exception as e:
+        logging.error(f"❌ Warm-up render failed, will retry on the first request: {e}")
+
+
+class RenderHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive for the clients' sessions
+
+    def _json(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self) -> None:
+        if self.path != "/health":
+            self._json(404, {"error": "not found"})
+            return
+        self._json(200, {"status": "ok", "renders": int(metrics.count("render.posts")),
+                         "uptime_s": round(time.monotonic() - self.server.started, 1)})
+
+    def do_POST(self) -> None:
+        if self.path != "/render":
+            self._json(404, {"error": "not found"})
+            return
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_REQUEST_BYTES:
+            self.close_connection = True
+            self._json(413, {"error": "request too large"})
+            return
+        try:
+            context, aspects, profile = decode_request(json.loads(self.rfile.read(length)))
+        except (ValueError, KeyError, TypeError) as e:
+            self._json(400, {"error": f"bad request: {e}"})
+            return
+        started = time.monotonic()
+        try:
+            images = render_context(context, aspects, profile)
+        except Exception as e:
+            logging.warning(f"⚠️ Render failed for {context.get('title', '')[:60]!r}: {type(e).__name__}: {e}")
+            self._json(500, {"error": f"{type(e).__name__}: {e}"})
+            return
+        metrics.observe("render_server.request_s", time.monotonic() - started)
+        self._json(200, {"images": {aspect: base64.b64encode(data).decode("ascii") for aspect, data in images.items()}})
+
+    def log_message(self, format: str, *args) -> None:
+        logging.debug(f"render_server: {format % args}")
+
+
+def serve(host: str = RENDER_SERVER_HOST, port: int = RENDER_SERVER_PORT, warm: bool = True) -> ThreadingHTTPServer:
+    """Start the server on a background thread and return it (port 0 picks a free one)."""
+    if warm:
+        warm_up()
+    server = ThreadingHTTPServer((host, port), RenderHandler)
+    server.daemon_threads = True
+    server.started = time.monotonic()
+    threading.Thread(target=server.serve_forever, name="render-server", daemon=True).start()
+    logging.info(f"🖥️ Render server listening on http://{server.server_address[0]}:{server.server_address[1]}")
+    return server
+
+
+if __name__ == "__main__":
+    server = serve()
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        logging.info("⏹️ Render server stopped")
+    finally:
+        server.shutdown()
+        get_render_service().close()
@@ -0,0 +1,368 @@
+"""
+Persistent Chromium for post rendering.
+
+Launching Playwright + Chromium costs far more than rendering one post, so
+the browser is started once per process and posts are rendered on a small
+pool of warm pages. Pages that crash or error are replaced, and every page
+is recycled after `recycle_after` renders to keep memory bounded; a browser
+that dies is relaunched on the next render.
+
+Playwright's async API is bound to the event loop it was started on, so the
+service owns one loop on a daemon thread. `render()` is a plain sync call
+(usable from make_post_image and worker threads); coroutines on the
+service loop can await `arender()` directly.
+
+Large binary inputs (post backgrounds) are not inlined into the HTML as data
+URIs: the HTML refers to them by a synthetic URL (`asset_url`) and each page
+answers those requests from memory via `page.route`, so the bytes never go
+through base64, Jinja or the HTML parser.
+
+One render can produce several aspect variants (feed/story/square): the
+page is loaded once and, per extra aspect, only the viewport and the
+layout's CSS variables change before the next screenshot.
+"""
+import io
+import atexit
+import asyncio
+import hashlib
+import logging
+import pathlib
+import functools
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+from PIL import Image
+
+from app import metrics
+from app.config import RENDER_PAGES, RENDER_RECYCLE_AFTER, RENDER_TIMEOUT_S, RENDER_WORKERS
+from app.custom_bg import image_type
+from app.render_profiles import DEFAULT_ASPECT, Aspect, RenderProfile, encode_image, get_aspects, get_profile
+
+CHROMIUM_ARGS = [
+    '--no-sandbox',
+    '--disable-dev-shm-usage',
+    '--font-render-hinting=none',  # Better font rendering
+    '--force-color-profile=srgb',  # Better color accuracy
+]
+VIEWPORT = {"width": 1080, "height": 1350}  # CSS px; resolution comes from the profile scale
+# Never resolves (.invalid is reserved); only ever answered by page.route
+ASSET_ORIGIN = "https://assets.render.invalid"
+
+# Resolves once web fonts are loaded, every <img> and CSS background image is
+# decoded, and a frame has been painted with them.
+READY_JS = """async () => {
+  await document.fonts.ready;
+  const urls = new Set();
+  for (const el of document.querySelectorAll("*")) {
+    const bg = getComputedStyle(el).backgroundImage;
+    for (const m of bg.matchAll(/url\\(["']?(.*?)["']?\\)/g)) urls.add(m[1]);
+  }
+  const decodes = Array.from(document.images, img => img.decode().catch(() => {}));
+  for (const src of urls) {
+    const img = new Image();
+    img.src = src;
+    decodes.push(img.decode().catch(() => {}));
+  }
+  await Promise.all(decodes);
+  await new Promise(resolve => requestAnimationFrame(() => requestAnimationFrame(resolve)));
+}"""
+
+
+def asset_url(data: bytes, kind: str = "bg") -> str:
+    """Synthetic, content-addressed URL for serving `data` to the renderer."""
+    _, ext = image_type(data)
+    return f"{ASSET_ORIGIN}/{kind}/{hashlib.sha256(data).hexdigest()[:24]}.{ext}"
+
+
+# Switches a loaded post to another aspect and waits for it to be painted
+ASPECT_JS = """([name, width, height, top, bottom]) => {
+  const root = document.documentElement.style;
+  root.setProperty("--w", width + "px");
+  root.setProperty("--h", height + "px");
+  root.setProperty("--inset-top", top + "px");
+  root.setProperty("--inset-bottom", bottom + "px");
+  document.body.dataset.aspect = name;
+  return new Promise(resolve => requestAnimationFrame(() => requestAnimationFrame(resolve)));
+}"""
+
+# A single output path (feed layout) or aspect name -> output path (None: bytes only)
+Outputs = Union[pathlib.Path, str, Dict[str, Optional[pathlib.Path]]]
+
+
+class _Slot:
+    """One pooled page and how many posts it has rendered."""
+
+    def __init__(self):
+        self.page = None
+        self.generation = -1  # browser generation the page belongs to
+        self.scale = 0.0  # device scale factor the page was opened with
+        self.viewport: Tuple[int, int] = (VIEWPORT["width"], VIEWPORT["height"])
+        self.renders = 0
+        self.crashed = False
+        self.assets: Dict[str, bytes] = {}  # url -> bytes for the render in progress
+
+
+class RenderService:
+    def __init__(self, pages: int = RENDER_PAGES, recycle_after: int = RENDER_RECYCLE_AFTER, timeout_s: float = RENDER_TIMEOUT_S):
+        self.pages = max(1, pages)
+        self.recycle_after = max(1, recycle_after)
+        self.timeout_s = timeout_s
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        # Owned by the service loop
+        self._playwright = None
+        self._browser = None
+        self._generation = 0
+        self._launch_lock: Optional[asyncio.Lock] = None
+        self._idle: Optional[asyncio.Queue] = None
+        self._slots: List[_Slot] = []
+
+    # --- lifecycle -------------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=loop.run_forever, name="render-service", daemon=True)
+                self._thread.start()
+                self._loop = loop
+                asyncio.run_coroutine_threadsafe(self._init_pool(), loop).result()
+        return self._loop
+
+    async def _init_pool(self) -> None:
+        self._launch_lock = asyncio.Lock()
+        self._idle = asyncio.Queue()
+        self._slots = [_Slot() for _ in range(self.pages)]
+        for slot in self._slots:
+            self._idle.put_nowait(slot)
+
+    async def _launch(self):
+        """Start Playwright (once) and launch Chromium."""
+        if self._playwright is None:
+            from playwright.async_api import async_playwright
+            self._playwright = await async_playwright().start()
+        return await self._playwright.chromium.launch(headless=True, args=CHROMIUM_ARGS)
+
+    async def _ensure_browser(self) -> None:
+        async with self._launch_lock:
+            if self._browser is not None and self._browser.is_connected():
+                return
+            if self._browser is not None:
+                logging.warning("⚠️ Chromium disconnected; relaunching")
+                metrics.incr("render.browser_relaunches")
+            self._browser = await self._launch()
+            self._generation += 1
+            logging.info(f"🌐 Chromium launched for rendering ({self.pages} pages, recycled every {self.recycle_after} renders)")
+
+    def close(self) -> None:
+        """Close pages, browser and Playwright, and stop the service loop."""
+        loop = self._loop
+        if loop is None:
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._aclose(), loop).result(timeout=30)
+        except Exception as e:
+            logging.warning(f"⚠️ Render service did not shut down cleanly: {e}")
+        loop.call_soon_threadsafe(loop.stop)
+        self._thread.join(timeout=5)
+        self._loop = None
+
+    async def _aclose(self) -> None:
+        for slot in self._slots:
+            await self._close_page(slot)
+        if self._browser is not None:
+            try:
+                await self._browser.close()
+            except Exception:
+                pass
+            self._browser = None
+        if self._playwright is not None:
+            await self._playwright.stop()
+            self._playwright = None
+
+    # --- page pool -------------------------------------------------------
+
+    async def _close_page(self, slot: _Slot) -> None:
+        page, slot.page = slot.page, None
+        slot.renders = 0
+        slot.crashed = False
+        slot.viewport = (VIEWPORT["width"], VIEWPORT["height"])
+        if page is not None:
+            try:
+                await page.close()
+            except Exception:
+                pass
+
+    async def _acquire(self, scale: float) -> _Slot:
+        slot = await self._idle.get()
+        try:
+            await self._ensure_browser()
+            if slot.page is not None and (slot.generation != self._generation or slot.page.is_closed() or slot.scale != scale):
+                await self._close_page(slot)
+            if slot.page is None:
+                # The scale factor is fixed per page, so a different profile gets a fresh page
+                slot.page = await self._browser.new_page(viewport=VIEWPORT, device_scale_factor=scale)
+                slot.generation = self._generation
+                slot.scale = scale
+                slot.page.on("crash", lambda _page, slot=slot: setattr(slot, "crashed", True))
+                await slot.page.route(f"{ASSET_ORIGIN}/**", functools.partial(self._serve_asset, slot))
+                metrics.incr("render.pages_opened")
+        except BaseException:
+            self._idle.put_nowait(slot)
+            raise
+        return slot
+
+    async def _release(self, slot: _Slot, healthy: bool) -> None:
+        slot.renders += 1
+        try:
+            if not healthy or slot.crashed:
+                metrics.incr("render.pages_replaced")
+                await self._close_page(slot)
+            elif slot.renders >= self.recycle_after:
+                metrics.incr("render.pages_recycled")
+                await self._close_page(slot)
+        finally:
+            self._idle.put_nowait(slot)
+
+    async def _serve_asset(self, slot: _Slot, route) -> None:
+        data = slot.assets.get(route.request.url)
+        if data is None:
+            metrics.incr("render.assets_missing")
+            logging.warning(f"⚠️ Render asset not provided: {route.request.url}")
+            await route.abort()
+            return
+        mime, _ = image_type(data)
+        await route.fulfill(status=200, body=data, headers={"Content-Type": mime, "Cache-Control": "no-store"})
+
+    # --- rendering -------------------------------------------------------
+
+    async def _set_viewport(self, slot: _Slot, aspect: Aspect) -> None:
+        if slot.viewport != (aspect.width, aspect.height):
+            await slot.page.set_viewport_size({"width": aspect.width, "height": aspect.height})
+            slot.viewport = (aspect.width, aspect.height)
+
+    async def arender(self, html_content: str, output_path: Outputs, assets: Optional[Dict[str, bytes]] = None,
+                      profile: Optional[RenderProfile] = None) -> Dict[str, bytes]:
+        """
+        Render on a pooled page. `output_path` is one path (feed layout) or a
+        dict of aspect name -> path, all shot from a single page load; a
+        None path is not written. `assets` maps asset_url() URLs used in the
+        HTML to their bytes; `profile` (default RENDER_PROFILE) sets scale,
+        format and size budget. Returns aspect name -> encoded image. Must
+        run on the service loop.
+        """
+        outputs = output_path if isinstance(output_path, dict) else {DEFAULT_ASPECT: output_path}
+        aspects = get_aspects(outputs)
+        profile = get_profile(profile)
+        slot = await self._acquire(profile.scale)
+        healthy = False
+        images: Dict[str, bytes] = {}
+        slot.assets = assets or {}
+        try:
+            page = slot.page
+            started = time.monotonic()
+            await self._set_viewport(slot, aspects[0])
+            # Everything is inline (fonts, background), so wait for readiness, not the network
+            await page.set_content(html_content, wait_until="load")
+            await page.evaluate(READY_JS)
+
+            for i, aspect in enumerate(aspects):
+                if aspect.name != DEFAULT_ASPECT:  # the template's own layout is the feed
+                    await self._set_viewport(slot, aspect)
+                    await page.evaluate(ASPECT_JS, [aspect.name, aspect.width, aspect.height, aspect.inset_top, aspect.inset_bottom])
+                images[aspect.name] = await self._screenshot(page, outputs[aspect.name], profile)
+                elapsed, started = time.monotonic() - started, time.monotonic()
+                metrics.observe("render.variant_s" if i else "render.first_s", elapsed, aspect=aspect.name)
+            healthy = True
+        finally:
+            slot.assets = {}
+            await self._release(slot, healthy)
+        return images
+
+    async def _screenshot(self, page, output_path: Optional[pathlib.Path], profile: RenderProfile) -> bytes:
+        """
+        Chromium encodes JPEG/PNG itself, which is cheapest. Only when that
+        misses the size budget, or for WebP, is a lossless shot re-encoded
+        with Pillow (quality by binary search, off the service loop).
+        """
+        if profile.format in ("jpeg", "png"):
+            data = await page.screenshot(
+                path=str(output_path) if output_path else None,
+                type=profile.format,
+                quality=profile.quality if profile.format == "jpeg" else None,
+                full_page=False,
+                omit_background=False
+            )
+            if not (profile.lossy and profile.max_bytes and len(data) > profile.max_bytes):
+                metrics.observe("render.bytes", len(data), profile=profile.name)
+                return data
+            metrics.incr("render.reencoded", profile=profile.name)
+        raw = await page.screenshot(type="png", full_page=False, omit_background=False)
+        data, _ = await asyncio.get_running_loop().run_in_executor(
+            None, lambda: encode_image(Image.open(io.BytesIO(raw)), profile)
+        )
+        if output_path:
+            with open(output_path, "wb") as f:
+                f.write(data)
+        metrics.observe("render.bytes", len(data), profile=profile.name)
+        return data
+
+    def render(self, html_content: str, output_path: Outputs, assets: Optional[Dict[str, bytes]] = None,
+               profile: Optional[RenderProfile] = None) -> Dict[str, bytes]:
+        """Render HTML (plus its assets) to the image(s) at `output_path` (blocking; see arender)."""
+        loop = self._ensure_loop()
+        future = asyncio.run_coroutine_threadsafe(self.arender(html_content, output_path, assets, profile), loop)
+        try:
+            images = future.result(timeout=self.timeout_s)
+        except TimeoutError:
+            future.cancel()
+            raise
+        metrics.incr("render.posts")
+        return images
+
+    def render_many(self, jobs: Sequence[Tuple], concurrency: Optional[int] = None,
+                    profile: Optional[RenderProfile] = None) -> List[Optional[BaseException]]:
+        """
+        Render (html, output_path[, assets]) jobs concurrently on the page pool (at most
+        `concurrency` at once, default one per page). Returns None or the
+        exception for each job, in input order; never raises for a single job.
+        """
+        if not jobs:
+            return []
+        loop = self._ensure_loop()
+
+        async def run() -> List[Optional[BaseException]]:
+            semaphore = asyncio.Semaphore(max(1, concurrency or self.pages))
+
+            async def one(html_content: str, output_path: Outputs, assets: Optional[Dict[str, bytes]] = None) -> None:
+                async with semaphore:
+                    await asyncio.wait_for(self.arender(html_content, output_path, assets, profile), timeout=self.timeout_s)
+
+            return await asyncio.gather(*(one(*job) for job in jobs), return_exceptions=True)
+
+        results = asyncio.run_coroutine_threadsafe(run(), loop).result()
+        metrics.incr("render.posts", sum(1 for r in results if r is None))
+        return [r if isinstance(r, BaseException) else None for r in results]
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_render_service():
+    """
+    Process-wide render service; Chromium starts on the first render. With
+    RENDER_WORKERS set, a RenderFarm of worker processes (same interface).
+    """
+    global _service
+    with _service_lock:
+        if _service is None:
+            if RENDER_WORKERS > 0:
+                from app.render_farm import RenderFarm
+                _service = RenderFarm()
+            else:
+                _service = RenderService()
+            atexit.register(_service.close)
+        return _service
@@ -0,0 +1,123 @@
+"""
+Keep digest emails under the provider's message size limit.
+
+Gmail rejects messages over 25 MB, and print-profile posts (3240x4050 JPEG
+q95) add up past that in a ten-post digest. send_email therefore:
+
+1. re-encodes the largest attachments to a fair share of the budget
+   (highest JPEG/WebP quality that fits, down to MIN_QUALITY), downscaling
+   in steps, but never below MIN_WIDTH, when quality alone is not enough;
+2. if the attachments still do not fit, splits them over several messages.
+
+Sizes are the encoded (base64) sizes the message will actually have.
+"""
+import os
+import logging
+import pathlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+from app import metrics
+from app.render_profiles import RenderProfile, encode_image
+from app.services.mail_transport import encoded_size, estimate_message_size
+
+START_QUALITY = 90   # re-encodes start here; q95 sources gain nothing from q95 again
+MIN_QUALITY = 70
+MIN_WIDTH = 1080     # the width posts are displayed at; never downscale below it
+DOWNSCALE_STEP = 0.85
+
+
+def _raw_capacity(encoded_bytes: int) -> int:
+    """Largest raw size whose base64 encoding fits in `encoded_bytes`."""
+    return max(0, encoded_bytes // 78 * 57)
+
+
+def _shrink(path: str, target: int) -> Tuple[str, Optional[str]]:
+    """
+    Re-encode (then downscale) the image at `path` to at most `target` raw
+    bytes, in place. Returns (path, action); the path changes only when a
+    PNG is turned into a JPEG, and action is None if nothing was saved.
+    """
+    size = os.path.getsize(path)
+    with Image.open(path) as img:
+        fmt = (img.format or "").lower()
+        img.load()
+    fmt = fmt if fmt in ("jpeg", "webp") else "jpeg"
+    profile = RenderProfile("email", format=fmt, quality=START_QUALITY, max_bytes=target, min_quality=MIN_QUALITY)
+    action = "re-encoded"
+    data, _ = encode_image(img, profile, warn=False)
+    while len(data) > target and round(img.width * DOWNSCALE_STEP) >= MIN_WIDTH:
+        img = img.resize((round(img.width * DOWNSCALE_STEP), round(img.height * DOWNSCALE_STEP)), Image.LANCZOS)
+        data, _ = encode_image(img, profile, warn=False)
+        action = "downscaled"
+    if len(data) >= size:
+        return path, None
+    new_path = path
+    if fmt == "jpeg" and pathlib.Path(path).suffix.lower() not in (".jpg", ".jpeg"):
+        new_path = str(pathlib.Path(path).with_suffix(".jpg"))
+    with open(new_path, "wb") as f:
+        f.write(data)
+    if new_path != path:
+        os.remove(path)
+    metrics.incr("email.attachments_shrunk", action=action)
+    return new_path, action
+
+
+def fit_attachments(attachments: Sequence[str], html_body: str, max_bytes: int) -> List[str]:
+    """
+    Shrink attachments so the whole message fits in `max_bytes`, where
+    possible. Files are rewritten in place; returns the (possibly renamed)
+    paths in the same order.
+    """
+    paths = list(attachments)
+    before = estimate_message_size(html_body, paths)
+    if before <= max_bytes or not paths:
+        return paths
+
+    # Fair share of the budget (water-filling): files under their share stay as they are
+    overhead = before - sum(encoded_size(os.path.getsize(p)) for p in paths)  # body, headers, boundaries
+    remaining = _raw_capacity(max_bytes - overhead)
+    order = sorted(range(len(paths)), key=lambda i: os.path.getsize(paths[i]))
+    targets = {}
+    for n, i in enumerate(order):
+        share = remaining // (len(order) - n)
+        size = os.path.getsize(paths[i])
+        if size <= share:
+            remaining -= size
+        else:
+            targets.update({j: share for j in order[n:]})
+            break
+
+    with ThreadPoolExecutor(max_workers=min(4, os.cpu_count() or 1)) as pool:
+        shrunk = dict(zip(targets, pool.map(lambda i: _shrink(paths[i], targets[i]), targets)))
+    actions = {}
+    for i, (path, action) in shrunk.items():
+        paths[i] = path
+        if action:
+            actions[action] = actions.get(action, 0) + 1
+
+    after = estimate_message_size(html_body, paths)
+    done = ", ".join(f"{action} {count}" for action, count in actions.items()) or "nothing smaller"
+    logging.info(f"📦 Attachments {before / 1e6:.1f} MB → {after / 1e6:.1f} MB encoded "
+                 f"(budget {max_bytes / 1e6:.1f} MB; {done})")
+    metrics.observe("email.size_before_bytes", before)
+    metrics.observe("email.size_after_bytes", after)
+    return paths
+
+
+def split_attachments(attachments: Sequence[str], html_body: str, max_bytes: int) -> List[List[str]]:
+    """
+    Group attachments, in order, into as few messages as fit `max_bytes`
+    each (every message carries the HTML body). An attachment too big for
+    any message goes alone, with a warning.
+    """
+    groups: List[List[str]] = [[]]
+    for path in attachments:
+        if groups[-1] and estimate_message_size(html_body, groups[-1] + [path]) > max_bytes:
+            groups.append([])
+        groups[-1].append(path)
+        if len(groups[-1]) == 1 and estimate_message_size(html_body, [path]) > max_bytes:
+            logging.warning(f"⚠️ {os.path.basename(path)} alone exceeds the {max_bytes / 1e6:.1f} MB email limit")
+    return groups
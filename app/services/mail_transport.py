@@ -0,0 +1,269 @@
+"""
+Streaming MIME assembly and a reusable SMTP session.
+
+The digest used to be built as a MIMEMultipart holding every attachment in
+memory, base64-encoded, and then flattened again by as_string() for every
+send attempt. Here the message is written once, part by part, into a
+spooled temp file (in memory up to EMAIL_SPOOL_MAX_MB, on disk beyond):
+attachments are read and base64-encoded in small chunks, so the Python heap
+never holds a whole image or the whole message. The same file is replayed
+to the socket line by line for each attempt.
+
+SMTPSession logs in once and reuses the connection for retries and for
+further messages; it reconnects only when the server drops the connection.
+"""
+import os
+import ssl
+import time
+import base64
+import logging
+import smtplib
+import mimetypes
+import tempfile
+import tracemalloc
+from contextlib import contextmanager
+from email import policy
+from email.header import Header
+from email.mime.text import MIMEText
+from email.utils import formatdate, make_msgid
+from typing import BinaryIO, Callable, Dict, Iterator, Optional, Sequence
+from uuid import uuid4
+
+from app import metrics
+from app.config import (
+    EMAIL_HOST, EMAIL_PORT, EMAIL_USERNAME, EMAIL_PASSWORD,
+    EMAIL_MAX_RETRIES, EMAIL_RETRY_DELAY_S, EMAIL_SPOOL_MAX_MB
+)
+
+CHUNK = 57 * 1024          # raw bytes per read: exactly 1024 base64 lines of 76 chars
+SEND_BUFFER = 64 * 1024    # bytes handed to the socket per write
+HEADER_ALLOWANCE = 1024    # top-level headers and boundaries, for size estimates
+
+
+def encoded_size(raw_bytes: int) -> int:
+    """Size of `raw_bytes` once base64-encoded by mime_chunks (76-char lines + CRLF)."""
+    lines, rest = divmod(raw_bytes, 57)
+    return lines * 78 + ((rest + 2) // 3 * 4 + 2 if rest else 0)
+
+
+def estimate_message_size(html_body: str, attachments: Sequence[str]) -> int:
+    """Upper estimate of the mime_chunks() message size, from the attachment file sizes."""
+    size = HEADER_ALLOWANCE + len(MIMEText(html_body, "html", "utf-8").as_bytes(policy=policy.SMTP))
+    for path in attachments:
+        size += len(_attachment_headers("=_" + "0" * 32, os.path.basename(path))) + encoded_size(os.path.getsize(path))
+    return size
+
+
+def _attachment_headers(boundary: str, filename: str) -> bytes:
+    ctype = mimetypes.guess_type(filename)[0] or "application/octet-stream"
+    return (
+        f"--{boundary}\r\n"
+        f"Content-Type: {ctype}\r\n"
+        f"Content-Transfer-Encoding: base64\r\n"
+        f"Content-Disposition: attachment; filename=\"{filename}\"\r\n\r\n"
+    ).encode("ascii", "replace")
+
+
+def mime_chunks(subject: str, sender: str, recipients: Sequence[str], html_body: str,
+                attachments: Sequence[str]) -> Iterator[bytes]:
+    """
+    Yield a multipart/mixed message (HTML body + file attachments) as CRLF
+    byte chunks. Attachment files are read lazily; unreadable ones are
+    logged and skipped.
+    """
+    boundary = f"=_{uuid4().hex}"
+    yield (
+        f"Subject: {Header(subject, 'utf-8').encode()}\r\n"
+        f"From: {sender}\r\n"
+        f"To: {', '.join(recipients)}\r\n"
+        f"Date: {formatdate(localtime=True)}\r\n"
+        f"Message-ID: {make_msgid()}\r\n"
+        f"MIME-Version: 1.0\r\n"
+        f"Content-Type: multipart/mixed; boundary=\"{boundary}\"\r\n\r\n"
+    ).encode("utf-8")
+    yield f"--{boundary}\r\n".encode()
+    yield MIMEText(html_body, "html", "utf-8").as_bytes(policy=policy.SMTP)
+    yield b"\r\n"
+
+    for path in attachments:
+        try:
+            f = open(path, "rb")
+        except OSError as e:
+            logging.warning(f"⚠️ Could not attach {path}: {e}")
+            continue
+        with f:
+            yield _attachment_headers(boundary, os.path.basename(path))
+            while True:
+                chunk = f.read(CHUNK)
+                if not chunk:
+                    break
+                yield base64.encodebytes(chunk).replace(b"\n", b"\r\n")
+    yield f"--{boundary}--\r\n".encode()
+
+
+def spool_message(*args, **kwargs) -> BinaryIO:
+    """Write mime_chunks(*args, **kwargs) into a spooled temp file, rewound; the caller closes it."""
+    spool = tempfile.SpooledTemporaryFile(max_size=int(EMAIL_SPOOL_MAX_MB * 1024 * 1024))
+    try:
+        for chunk in mime_chunks(*args, **kwargs):
+            spool.write(chunk)
+    except BaseException:
+        spool.close()
+        raise
+    spool.seek(0)
+    return spool
+
+
+@contextmanager
+def peak_memory() -> Iterator[Dict[str, int]]:
+    """Peak traced Python heap (bytes) while the block runs, in result["peak_bytes"]."""
+    result: Dict[str, int] = {}
+    started = not tracemalloc.is_tracing()
+    if started:
+        tracemalloc.start()
+    else:
+        tracemalloc.reset_peak()
+    base = tracemalloc.get_traced_memory()[0]
+    try:
+        yield result
+    finally:
+        result["peak_bytes"] = max(0, tracemalloc.get_traced_memory()[1] - base)
+        if started:
+            tracemalloc.stop()
+
+
+def _default_smtp() -> smtplib.SMTP:
+    return smtplib.SMTP_SSL(EMAIL_HOST, EMAIL_PORT, context=ssl.create_default_context())
+
+
+class SMTPSession:
+    """One logged-in SMTP connection, reused for retries and for several messages."""
+
+    def __init__(self, username: Optional[str] = EMAIL_USERNAME, password: Optional[str] = EMAIL_PASSWORD,
+                 retries: int = EMAIL_MAX_RETRIES, retry_delay_s: float = EMAIL_RETRY_DELAY_S,
+                 connect: Callable[[], smtplib.SMTP] = _default_smtp):
+        self.username = username
+        self.password = password
+        self.retries = max(1, retries)
+        self.retry_delay_s = retry_delay_s
+        self.connect = connect
+        self._server: Optional[smtplib.SMTP] = None
+
+    def __enter__(self) -> "SMTPSession":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def _ensure_connected(self) -> smtplib.SMTP:
+        if self._server is None:
+            server = self.connect()
+            try:
+                server.login(self.username, self.password)
+            except BaseException:
+                server.close()
+                raise
+            self._server = server
+            metrics.incr("email.connections")
+        return self._server
+
+    def _drop(self) -> None:
+        server, self._server = self._server, None
+        if server is not None:
+            try:
+                server.close()
+            except Exception:
+                pass
+
+    def _reset(self) -> None:
+        """RSET after a failed transaction; drop the connection if the server already closed it."""
+        if self._server is None:
+            return
+        try:
+            self._server.rset()
+        except Exception:
+            self._drop()
+
+    def close(self) -> None:
+        server, self._server = self._server, None
+        if server is not None:
+            try:
+                server.quit()
+            except Exception:
+                server.close()
+
+    def _transmit(self, server: smtplib.SMTP, sender: str, recipients: Sequence[str], message: BinaryIO) -> None:
+        """MAIL/RCPT/DATA with the message streamed from `message`, dot-stuffed line by line."""
+        server.ehlo_or_helo_if_needed()
+        code, reply = server.mail(sender)
+        if code != 250:
+            raise smtplib.SMTPSenderRefused(code, reply, sender)
+        refused = {}
+        for rcpt in recipients:
+            code, reply = server.rcpt(rcpt)
+            if code not in (250, 251):
+                refused[rcpt] = (code, reply)
+        if len(refused) == len(recipients):
+            raise smtplib.SMTPRecipientsRefused(refused)
+        if refused:
+            logging.warning(f"⚠️ Recipients refused: {', '.join(refused)}")
+        server.putcmd("data")
+        code, reply = server.getreply()
+        if code != 354:
+            raise smtplib.SMTPDataError(code, reply)
+        message.seek(0)
+        buffer = bytearray()
+        for line in message:
+            if line.startswith(b"."):
+                buffer += b"."
+            buffer += line
+            if len(buffer) >= SEND_BUFFER:
+                server.send(bytes(buffer))
+                buffer.clear()
+        if buffer and not buffer.endswith(b"\r\n"):
+            buffer += b"\r\n"
+        server.send(bytes(buffer) + b".\r\n")
+        code, reply = server.getreply()
+        if code != 250:
+            raise smtplib.SMTPDataError(code, reply)
+
+    def send(self, sender: str, recipients: Sequence[str], message: BinaryIO) -> None:
+        """
+        Send a spooled message, retrying up to `retries` times. Auth errors,
+        refused addresses and other permanent (5xx) replies are not retried;
+        a dropped connection is re-opened, transient errors are retried on
+        the same connection after RSET.
+        """
+        for attempt in range(1, self.retries + 1):
+            try:
+                logging.info(f"📤 Sending email (attempt {attempt}/{self.retries})...")
+                self._transmit(self._ensure_connected(), sender, recipients, message)
+                return
+            except smtplib.SMTPAuthenticationError as e:
+                logging.error(f"❌ Email authentication failed: {e}")
+                logging.error("   Check EMAIL_USERNAME and EMAIL_PASSWORD in .env")
+                raise
+            except (smtplib.SMTPSenderRefused, smtplib.SMTPRecipientsRefused):
+                self._reset()  # permanent; leave the connection ready for the next message
+                raise
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPConnectError) as e:
+                self._drop()
+                error = e
+            except smtplib.SMTPException as e:  # before OSError, its base class
+                if getattr(e, "smtp_code", 0) >= 500:
+                    # Permanent (e.g. 552 message too large): resending the same bytes cannot help
+                    logging.error(f"❌ Email rejected: {e}")
+                    self._reset()
+                    raise
+                self._reset()
+                error = e
+            except OSError as e:  # socket/TLS failure
+                self._drop()
+                error = e
+            metrics.incr("email.send_failures")
+            if attempt == self.retries:
+                logging.error(f"❌ Email send failed after {self.retries} attempts: {error}")
+                raise error
+            logging.warning(f"⚠️ Email send failed (attempt {attempt}): {error}")
+            logging.info(f"   Retrying in {self.retry_delay_s} seconds...")
+            time.sleep(self.retry_delay_s)
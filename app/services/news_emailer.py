@@ -1,18 +1,13 @@
-import os, ssl, smtplib, html, asyncio, logging, pathlib
+import os, html, asyncio, logging, pathlib
 from datetime import datetime
 from dateutil import tz
-from email.mime.text import MIMEText
-from email.mime.multipart import MIMEMultipart
-from email.mime.base import MIMEBase
-from email import encoders
 from playwright.async_api import async_playwright
-import traceback
 from app.parser.news_parser import parse_news_content
-from app.generate_image import make_post_image
-from app.config import (
-    EMAIL_HOST, EMAIL_PORT, EMAIL_USERNAME, EMAIL_PASSWORD,
-    EMAIL_FROM, EMAIL_TO
-)
+from app.generate_image import make_post_images, prepare_backgrounds
+from app.config import EMAIL_FROM, EMAIL_TO, EMAIL_MAX_MB, POST_ASPECTS
+from app.services.attachment_budget import fit_attachments, split_attachments
+from app.services.mail_transport import SMTPSession, peak_memory, spool_message
+from app import metrics
 import shutil
 
 HERE = pathlib.Path(__file__).resolve().parent
@@ -65,56 +60,56 @@ def generate_email_body(news_items, model_name=None):
 # -----------------------------
 # Send ONE email with all items + attachments
 # -----------------------------
-def send_email(news_items, model_name=None):
+def send_email(news_items, model_name=None, profile=None, aspects=None):
+    """
+    Render the post images for every item and mail the digest. `profile` is a
+    render profile name (default RENDER_PROFILE); `aspects` the placements to
+    attach per post (default POST_ASPECTS).
+    """
 
     # Generate unique subject with IST datetime
     now_utc = datetime.utcnow().replace(tzinfo=tz.UTC)
     ist_time = now_utc.astimezone(tz.gettz("Asia/Kolkata"))
     subject = f"AI News Digest - {ist_time.strftime('%d %b %Y, %I:%M %p IST')}"
 
-    # Generate post images for all items
-    attachments = []
+    # Always use Nebius Flux Schnell (user preference)
+    # Gemini code kept for future use if needed
+    is_nano = False
+
+    # Generate all backgrounds concurrently up front (fallback.jpeg per failed item)
+    backgrounds = prepare_backgrounds(news_items, is_nano_banana=is_nano)
+
+    # Build every post, then render them all concurrently on the shared browser
+    posts = []
     for idx, item in enumerate(news_items):
-        try:
-            title = item.get("title") or ""
-            pov   = item.get("pov") or ""
-            imgs  = item.get("images") or []
-            category = item.get("category") or "general"
-            article_image_url = item.get("article_image_url") or ""
-            flux_prompt = item.get("image_generation_prompt") or ""
-
-            # Fix: Handle hashtags as string or list
-            tags = item.get("hashtags") or ""
-            if isinstance(tags, list):
-                tags = " ".join(tags)
-            elif not isinstance(tags, str):
-                tags = ""
-
-            # Always use Nebius Flux Schnell (user preference)
-            # Gemini code kept for future use if needed
-            is_nano = False
-
-            img_path = make_post_image(
-                title=title,
-                pov=pov,
-                image_urls=imgs,
-                hashtags=tags,
-                model_name=model_name,
-                category=category,
-                is_nano_banana=is_nano,
-                article_image_url=article_image_url,
-                flux_prompt=flux_prompt
-            )
-
-            attachments.append(img_path)
-            logging.info(f"✅ [{idx+1}/{len(news_items)}] Generated image (Flux Schnell): {os.path.basename(img_path)}")
-
-        except Exception as e:
-            traceback.print_exc()
-            logging.warning(f"⚠️ Could not generate image for item {item.get('title')}: {e}")
-            # Continue to next item even if one fails
-
-    
+        # Fix: Handle hashtags as string or list
+        tags = item.get("hashtags") or ""
+        if isinstance(tags, list):
+            tags = " ".join(tags)
+        elif not isinstance(tags, str):
+            tags = ""
+
+        posts.append(dict(
+            title=item.get("title") or "",
+            pov=item.get("pov") or "",
+            image_urls=item.get("images") or [],
+            hashtags=tags,
+            model_name=model_name,
+            category=item.get("category") or "general",
+            is_nano_banana=is_nano,
+            article_image_url=item.get("article_image_url") or "",
+            flux_prompt=item.get("image_generation_prompt") or "",
+            background_image=backgrounds[idx]
+        ))
+
+    attachments = []
+    for idx, variants in enumerate(make_post_images(posts, profile=profile, aspects=aspects or POST_ASPECTS)):
+        if variants:
+            attachments.extend(variants.values())
+            logging.info(f"✅ [{idx+1}/{len(news_items)}] Generated image (Flux Schnell): {', '.join(os.path.basename(p) for p in variants.values())}")
+        else:
+            # Continue with the other items even if one fails
+            logging.warning(f"⚠️ Could not generate image for item {news_items[idx].get('title')}")
 
     # Load template
     try:
@@ -131,58 +126,26 @@ def send_email(news_items, model_name=None):
 
     final_html = html_template.replace("{{news_items}}", html_body) if html_template else html_body
 
-    # Build message
-    message = MIMEMultipart()
-    message["Subject"] = subject
-    message["From"] = EMAIL_FROM
-    message["To"] = ", ".join(EMAIL_TO)
-
-    message.attach(MIMEText(final_html, "html", "utf-8"))
-
-    # Attach all post images
-    for file_path in attachments:
-        try:
-            with open(file_path, "rb") as f:
-                part = MIMEBase("application", "octet-stream")
-                part.set_payload(f.read())
-            encoders.encode_base64(part)
-            part.add_header("Content-Disposition", f"attachment; filename={os.path.basename(file_path)}")
-            message.attach(part)
-        except Exception as e:
-            logging.warning(f"⚠️ Could not attach {file_path}: {e}")
-
-    # Send email with retry logic
-    context = ssl.create_default_context()
-    max_retries = 3
-    retry_delay = 5  # seconds
-
-    for attempt in range(1, max_retries + 1):
-        try:
-            logging.info(f"📤 Sending email (attempt {attempt}/{max_retries})...")
-            with smtplib.SMTP_SSL(EMAIL_HOST, EMAIL_PORT, context=context) as server:
-                server.login(EMAIL_USERNAME, EMAIL_PASSWORD)
-                server.sendmail(EMAIL_FROM, EMAIL_TO, message.as_string())
-            logging.info(f"📧 Email sent successfully with subject '{subject}' and {len(attachments)} attachments")
-            break  # Success - exit retry loop
-
-        except smtplib.SMTPAuthenticationError as e:
-            logging.error(f"❌ Email authentication failed: {e}")
-            logging.error("   Check EMAIL_USERNAME and EMAIL_PASSWORD in .env")
-            raise  # Don't retry auth errors
-
-        except smtplib.SMTPException as e:
-            if attempt < max_retries:
-                logging.warning(f"⚠️ Email send failed (attempt {attempt}): {e}")
-                logging.info(f"   Retrying in {retry_delay} seconds...")
-                import time
-                time.sleep(retry_delay)
-            else:
-                logging.error(f"❌ Email send failed after {max_retries} attempts: {e}")
-                raise
-
-        except Exception as e:
-            logging.error(f"❌ Unexpected email error: {e}")
-            raise
+    # Keep under the provider's size limit: shrink attachments, then split the digest if still needed
+    max_bytes = int(EMAIL_MAX_MB * 1024 * 1024)
+    attachments = fit_attachments(attachments, final_html, max_bytes)
+    batches = split_attachments(attachments, final_html, max_bytes)
+    if len(batches) > 1:
+        logging.info(f"✂️ Splitting the digest into {len(batches)} emails to stay under {EMAIL_MAX_MB:g} MB each")
+
+    # Build each message once, streaming attachments into a spooled file, and send them all
+    # over one SMTP session (reused by retries)
+    with SMTPSession() as session:
+        for part, batch in enumerate(batches, 1):
+            part_subject = subject if len(batches) == 1 else f"{subject} ({part}/{len(batches)})"
+            with peak_memory() as peak:
+                with spool_message(part_subject, EMAIL_FROM, EMAIL_TO, final_html, batch) as message:
+                    size = message.seek(0, os.SEEK_END)
+                    session.send(EMAIL_FROM, EMAIL_TO, message)
+            metrics.observe("email.message_bytes", size)
+            metrics.observe("email.peak_bytes", peak["peak_bytes"])
+            logging.info(f"📧 Email sent successfully with subject '{part_subject}' and {len(batch)} attachments "
+                         f"({size / 1e6:.1f} MB message, peak {peak['peak_bytes'] / 1e6:.1f} MB Python heap while sending)")
 
     # Cleanup: delete generated images
     folder = "app/output"
@@ -0,0 +1,384 @@
+import time
+import queue
+import json
+import random
+import asyncio
+import logging
+import threading
+from email.utils import parsedate_to_datetime
+from typing import Any, AsyncIterator, Awaitable, Dict, Iterator, Optional, TypeVar
+
+import httpx
+
+from app import metrics
+from app.config import (
+    PERPLEXITY_MODEL, PPLX_API_KEY, PERPLEXITY_URL,
+    PERPLEXITY_TIMEOUT_S, PERPLEXITY_DEADLINE_S, PERPLEXITY_MAX_ATTEMPTS,
+    PERPLEXITY_BREAKER_THRESHOLD, PERPLEXITY_BREAKER_COOLDOWN_S,
+)
+
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+BACKOFF_BASE_S = 1.0
+BACKOFF_CAP_S = 20.0
+SYSTEM_PROMPT = "Be precise, concise. India audience."
+
+T = TypeVar("T")
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised without touching the network while the breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Consecutive-failure breaker.
+
+    closed -> (threshold 5xx in a row) -> open -> (cooldown) -> half-open:
+    one trial request is let through and other callers are rejected until
+    it finishes; success closes, failure re-opens.
+    """
+
+    def __init__(self, threshold: int = PERPLEXITY_BREAKER_THRESHOLD, cooldown_s: float = PERPLEXITY_BREAKER_COOLDOWN_S):
+        self.threshold = threshold
+        self.cooldown_s = cooldown_s
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self.trial_in_flight = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.cooldown_s:
+            return "half-open"
+        return "open"
+
+    def before_call(self) -> bool:
+        """Raise CircuitOpenError if the call must not go out; True if it is the half-open trial."""
+        with self._lock:
+            state = self.state
+            if state == "open":
+                remaining = self.cooldown_s - (time.monotonic() - self.opened_at)
+                metrics.incr("perplexity.circuit_rejected")
+                raise CircuitOpenError(f"Perplexity circuit open; retry in {remaining:.0f}s")
+            if state == "half-open":
+                if self.trial_in_flight:
+                    metrics.incr("perplexity.circuit_rejected")
+                    raise CircuitOpenError("Perplexity circuit half-open; trial request in flight")
+                self.trial_in_flight = True
+                return True
+            return False
+
+    def release_trial(self) -> None:
+        """End a half-open trial that neither succeeded nor failed (e.g. a 4xx or a cancelled call)."""
+        with self._lock:
+            self.trial_in_flight = False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.trial_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            # A failed half-open trial re-opens immediately
+            if self.opened_at is not None or self.failures >= self.threshold:
+                if self.state != "open":
+                    logging.warning(f"⛔ Perplexity circuit opened after {self.failures} consecutive failures")
+                    metrics.incr("perplexity.circuit_opened")
+                self.opened_at = time.monotonic()
+            self.trial_in_flight = False
+
+
+# Shared across clients so fail-fast state survives between calls
+_breaker = CircuitBreaker()
+
+
+def _retry_after_seconds(resp: httpx.Response) -> Optional[float]:
+    """Parse Retry-After (delta-seconds or HTTP-date)."""
+    value = resp.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def _backoff_seconds(attempt: int) -> float:
+    """Full-jitter exponential backoff."""
+    return random.uniform(0, min(BACKOFF_CAP_S, BACKOFF_BASE_S * 2 ** attempt))
+
+
+class AsyncPerplexityClient:
+    """
+    Async Perplexity chat-completions client.
+
+    One pooled `httpx.AsyncClient` per instance (keep-alive connections are
+    reused across calls), Retry-After aware jittered retries bounded by an
+    overall deadline, and a shared circuit breaker for repeated 5xx.
+    call_perplexity uses one process-wide instance (get_perplexity_client).
+
+        async with AsyncPerplexityClient() as pplx:
+            data = await pplx.chat(prompt)
+    """
+
+    def __init__(
+        self,
+        api_key: Optional[str] = PPLX_API_KEY,
+        url: str = PERPLEXITY_URL,
+        timeout_s: float = PERPLEXITY_TIMEOUT_S,
+        deadline_s: float = PERPLEXITY_DEADLINE_S,
+        max_attempts: int = PERPLEXITY_MAX_ATTEMPTS,
+        breaker: Optional[CircuitBreaker] = None,
+        max_connections: int = 8,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.url = url
+        self.timeout_s = timeout_s
+        self.deadline_s = deadline_s
+        self.max_attempts = max_attempts
+        self.breaker = breaker or _breaker
+        self._http = httpx.AsyncClient(
+            headers={"Authorization": f"Bearer {api_key}", "Content-Type": "application/json"},
+            limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+            timeout=timeout_s,
+            transport=transport,
+        )
+
+    async def __aenter__(self) -> "AsyncPerplexityClient":
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        await self.aclose()
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    @staticmethod
+    def _body(prompt: str, model: str, system: str, stream: bool = False) -> Dict[str, Any]:
+        body = {
+            "model": model,
+            "messages": [
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt},
+            ],
+        }
+        if stream:
+            body["stream"] = True
+        return body
+
+    async def chat(self, prompt: str, model: str = PERPLEXITY_MODEL, system: str = SYSTEM_PROMPT,
+                   timeout_s: Optional[float] = None, max_attempts: Optional[int] = None) -> Dict[str, Any]:
+        """POST one chat completion and return the decoded JSON body."""
+        logging.info(f"👉 Calling Perplexity (model={model}, prompt={len(prompt)} chars)")
+        started = time.monotonic()
+        resp = await self._send(self._body(prompt, model, system), stream=False, timeout_s=timeout_s, max_attempts=max_attempts)
+        metrics.observe("perplexity.latency_s", time.monotonic() - started)
+        return resp.json()
+
+    async def stream_chat(self, prompt: str, model: str = PERPLEXITY_MODEL, system: str = SYSTEM_PROMPT,
+                          timeout_s: Optional[float] = None, max_attempts: Optional[int] = None) -> AsyncIterator[str]:
+        """
+        Stream a chat completion (SSE) and yield content deltas as they arrive.
+
+        Retries only cover opening the stream; once the first byte is in, a
+        broken stream is raised to the caller.
+        """
+        logging.info(f"👉 Streaming Perplexity (model={model}, prompt={len(prompt)} chars)")
+        started = time.monotonic()
+        first_token_at: Optional[float] = None
+        resp = await self._send(self._body(prompt, model, system, stream=True), stream=True,
+                                timeout_s=timeout_s, max_attempts=max_attempts)
+        try:
+            async for line in resp.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                payload = line[5:].strip()
+                if payload == "[DONE]":
+                    break
+                try:
+                    chunk = json.loads(payload)
+                    delta = chunk["choices"][0].get("delta", {}).get("content") or ""
+                except (ValueError, KeyError, IndexError):
+                    continue
+                if delta:
+                    if first_token_at is None:
+                        first_token_at = time.monotonic()
+                        metrics.observe("perplexity.ttft_s", first_token_at - started)
+                    yield delta
+        finally:
+            await resp.aclose()
+            metrics.observe("perplexity.latency_s", time.monotonic() - started)
+
+    async def _send(self, body: Dict[str, Any], stream: bool, timeout_s: Optional[float] = None,
+                    max_attempts: Optional[int] = None) -> httpx.Response:
+        """Send with retries/backoff/breaker; returns the first successful response."""
+        timeout_s = timeout_s or self.timeout_s
+        max_attempts = max_attempts or self.max_attempts
+        started = time.monotonic()
+        deadline = started + self.deadline_s
+        last_error: Optional[BaseException] = None
+
+        for attempt in range(1, max_attempts + 1):
+            trial = self.breaker.before_call()
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                if trial:
+                    self.breaker.release_trial()
+                break
+
+            metrics.incr("perplexity.attempts")
+            attempt_started = time.monotonic()
+            retry_after: Optional[float] = None
+            try:
+                request = self._http.build_request("POST", self.url, json=body, timeout=min(timeout_s, remaining))
+                resp = await self._http.send(request, stream=stream)
+                metrics.observe("perplexity.attempt_latency_s", time.monotonic() - attempt_started)
+                metrics.incr("perplexity.status", code=str(resp.status_code))
+
+                if resp.status_code < 400:
+                    self.breaker.record_success()
+                    return resp
+
+                if stream:
+                    await resp.aread()
+                    await resp.aclose()
+                if resp.status_code >= 500:
+                    self.breaker.record_failure()
+                if resp.status_code not in RETRYABLE_STATUS:
+                    resp.raise_for_status()
+
+                retry_after = _retry_after_seconds(resp)
+                last_error = httpx.HTTPStatusError(
+                    f"HTTP {resp.status_code}", request=resp.request, response=resp
+                )
+            except (httpx.TransportError, httpx.TimeoutException) as e:
+                self.breaker.record_failure()
+                last_error = e
+            finally:
+                if trial:
+                    self.breaker.release_trial()  # no-op once success/failure was recorded
+
+            if attempt == max_attempts:
+                break
+
+            delay = retry_after if retry_after is not None else _backoff_seconds(attempt)
+            if time.monotonic() + delay >= deadline:
+                logging.warning(f"   Retry in {delay:.1f}s would exceed the {self.deadline_s:.0f}s budget; giving up")
+                break
+
+            metrics.incr("perplexity.retries")
+            logging.warning(f"   Attempt {attempt}/{max_attempts} failed ({last_error}); retrying in {delay:.1f}s…")
+            await asyncio.sleep(delay)
+
+        metrics.incr("perplexity.failures")
+        metrics.observe("perplexity.latency_s", time.monotonic() - started)
+        raise last_error or TimeoutError(f"Perplexity call exceeded {self.deadline_s:.0f}s budget")
+
+
+# One client for the process, on its own event loop thread (like RenderService):
+# httpx connections belong to the loop they were opened on, so every call runs
+# there and keep-alive connections are reused across calls, not just retries.
+_client: Optional[AsyncPerplexityClient] = None
+_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_client_lock = threading.Lock()
+
+
+def get_perplexity_loop() -> asyncio.AbstractEventLoop:
+    global _client_loop
+    with _client_lock:
+        if _client_loop is None:
+            loop = asyncio.new_event_loop()
+            threading.Thread(target=loop.run_forever, name="perplexity-client", daemon=True).start()
+            _client_loop = loop
+        return _client_loop
+
+
+def get_perplexity_client() -> AsyncPerplexityClient:
+    """The shared client; use it on get_perplexity_loop() (see run_on_client_loop)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = AsyncPerplexityClient()
+        return _client
+
+
+def run_on_client_loop(coro: Awaitable[T]) -> T:
+    """Run `coro` on the shared client's loop and block for its result."""
+    return asyncio.run_coroutine_threadsafe(coro, get_perplexity_loop()).result()
+
+
+async def await_on_client_loop(coro: Awaitable[T]) -> T:
+    """Await `coro` on the shared client's loop from any event loop."""
+    loop = get_perplexity_loop()
+    if asyncio.get_running_loop() is loop:
+        return await coro
+    return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, loop))
+
+
+_DONE = object()
+
+
+def _pump(items: AsyncIterator[T], put) -> "asyncio.Future":
+    """Iterate `items` on the client loop, handing each item, then _DONE (or the error), to `put`."""
+    async def run() -> None:
+        try:
+            async for item in items:
+                put(item)
+        except BaseException as e:  # surfaced on the consumer side
+            put(e)
+            if isinstance(e, asyncio.CancelledError):
+                raise
+        finally:
+            put(_DONE)
+    return asyncio.run_coroutine_threadsafe(run(), get_perplexity_loop())
+
+
+def iter_on_client_loop(items: AsyncIterator[T]) -> Iterator[T]:
+    """Consume an async iterator on the shared client's loop from sync code."""
+    results: "queue.Queue" = queue.Queue()
+    future = _pump(items, results.put)
+    try:
+        while True:
+            item = results.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        future.cancel()  # consumer stopped early: close the stream
+
+
+async def aiter_on_client_loop(items: AsyncIterator[T]) -> AsyncIterator[T]:
+    """Consume an async iterator on the shared client's loop from any event loop."""
+    if asyncio.get_running_loop() is get_perplexity_loop():
+        async for item in items:
+            yield item
+        return
+    loop = asyncio.get_running_loop()
+    results: "asyncio.Queue" = asyncio.Queue()
+
+    def put(item) -> None:
+        if not loop.is_closed():  # the consumer's loop may be gone after an early exit
+            loop.call_soon_threadsafe(results.put_nowait, item)
+
+    future = _pump(items, put)
+    try:
+        while True:
+            item = await results.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        future.cancel()
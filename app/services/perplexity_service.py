@@ -1,19 +1,31 @@
-import requests
 import time
 import json
+import asyncio
 import logging
-from typing import Any, Dict, List, Union,Optional
-from app.config import PERPLEXITY_MODEL, PPLX_API_KEY
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Union,Optional
+from app import metrics
+from app.config import PERPLEXITY_MODEL, PPLX_API_KEY, PERPLEXITY_MAX_ATTEMPTS, PERPLEXITY_TIMEOUT_S, BG_MODE
+from app.services.perplexity_client import (
+    AsyncPerplexityClient, aiter_on_client_loop, await_on_client_loop, get_perplexity_client,
+    iter_on_client_loop, run_on_client_loop
+)
+from app.parser.news_parser import NewsStreamParser
+from app.parser.json_fields import JSONFieldExtractor
+from app.custom_bg import generate_bg_bytes
 from app.get_rss_feed_data import extract_articles_from_links,collect_latest_from_rss
-import os
-from openai import OpenAI
+from app.story_ranker import rank_stories, select_top_stories
+from app.providers import get_chat_provider
 
 def redact(api_key):
     if api_key:
         return f"{api_key[:4]}...{api_key[-4:]}"
     return "Not set"
 
-client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+# Streamed post JSON: start the background as soon as these are complete
+STREAM_WATCH_FIELDS = ("image_generation_prompt", "category")
+# Backgrounds started mid-stream run here while GPT keeps writing
+_bg_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="bg-prefetch")
 
 # Replace your old DEFAULT_FEEDS_MAP with this
 DEFAULT_FEEDS_MAP = {
@@ -64,7 +76,7 @@ DEFAULT_FEEDS_MAP = {
     ],
 }
 
-def transform_rss_with_perplexity() -> List[Dict[str, Any]]:
+def transform_rss_with_perplexity(prefetch_backgrounds: bool = True) -> List[Dict[str, Any]]:
     """
     SIMPLE news curation: Always return exactly 10 posts
 
@@ -75,6 +87,14 @@ def transform_rss_with_perplexity() -> List[Dict[str, Any]]:
       - 1 from Bollywood
       - 1 from cricket
       = 10 posts guaranteed
+
+    Each category is over-collected (OVERCOLLECT_FACTOR x its quota) and the
+    candidates are ranked locally (see app.story_ranker) so extraction and
+    LLM calls are only spent on the top 10.
+
+    With `prefetch_backgrounds`, GPT output is streamed and each item's
+    background image starts generating as soon as its image prompt is
+    complete; the pending Future is returned on the item as `bg_future`.
     """
     # SIMPLE STRATEGY - Fixed allocation for predictable output
     STORIES_PER_CATEGORY = {
@@ -88,10 +108,11 @@ def transform_rss_with_perplexity() -> List[Dict[str, Any]]:
     MAX_EXTRACT_URLS = 10  # Exactly 10 articles
     TARGET_POSTS = 10      # Always return 10 posts
     HOURS_WINDOW = 12      # Wider window to ensure we get content
+    OVERCOLLECT_FACTOR = 4 # RSS is cheap; extraction + LLM are not
 
     print(f"\n🔍 Starting news curation (fetching from {len(STORIES_PER_CATEGORY)} categories)...")
 
-    # 1) Fetch stories from each category based on priority
+    # 1) Over-collect candidates from each category
     all_items = []
     for category, count in STORIES_PER_CATEGORY.items():
         feeds = DEFAULT_FEEDS_MAP.get(category)
@@ -100,7 +121,7 @@ def transform_rss_with_perplexity() -> List[Dict[str, Any]]:
 
         category_items = collect_latest_from_rss(
             feeds_map={category: feeds},
-            max_per_feed=count,
+            max_per_feed=count * OVERCOLLECT_FACTOR,
             hours_window=HOURS_WINDOW,
             try_fetch_missing_ts=True,
             debug=False
@@ -110,12 +131,19 @@ def transform_rss_with_perplexity() -> List[Dict[str, Any]]:
 
     print(f"\n📰 Collected {len(all_items)} total stories")
 
-    # 2) Dedupe by URL and limit to MAX_EXTRACT_URLS
+    # 2) Rank locally (coverage, recency, salience, source) and keep the top K
+    ranked = rank_stories(all_items)
+    top_items = select_top_stories(ranked, MAX_EXTRACT_URLS, quotas=STORIES_PER_CATEGORY)
+    print(f"🏅 Ranked {len(ranked)} unique stories, keeping top {len(top_items)}")
+    for it in top_items:
+        print(f"  {it['score']:.2f} ({it['coverage']} outlets) {it.get('title', '')[:70]}")
+
+    # 3) Dedupe by URL and limit to MAX_EXTRACT_URLS
     # Also build a map for fallback when 403 blocked
     urls = []
     rss_items_map = {}
     seen_urls = set()
-    for it in all_items:
+    for it in top_items:
         u = it.get("url")
         if not u:
             continue
@@ -130,16 +158,43 @@ def transform_rss_with_perplexity() -> List[Dict[str, Any]]:
 
     print(f"🔗 Extracting {len(urls)} unique articles...")
 
-    # 3) Extract article contents with RSS fallback for 403 errors
+    # 4) Extract article contents with RSS fallback for 403 errors
     rss_items = extract_articles_from_links(urls, debug=False)
 
     print(f"📝 Extracted {len(rss_items)} articles, now scoring with AI...")
 
-    # 4) Transform ALL articles with AI (NO rejection, always get 10 posts)
+    # 5) Transform ALL articles with AI (NO rejection, always get 10 posts)
+    # Only AI backgrounds are slow enough to be worth starting mid-stream
+    transformed_news = transform_articles(rss_items, prefetch_backgrounds=prefetch_backgrounds and BG_MODE != "gradient")
+
+    print(f"\n🎯 FINAL SELECTION: {len(transformed_news)} posts ready")
+    return transformed_news
+
+
+def transform_articles(rss_items: List[Dict[str, Any]], prefetch_backgrounds: bool = True, pause_s: float = 0.8) -> List[Dict[str, Any]]:
+    """Run every extracted article through GPT; failed items fall back to the raw article."""
     transformed_news = []
     for idx, item in enumerate(rss_items, 1):
         try:
-            transformed = call_chatgpt_on_news(item)
+            bg_future: List[Future] = []
+
+            def start_background(fields, item=item, bg_future=bg_future):
+                bg_future.append(_bg_executor.submit(
+                    generate_bg_bytes,
+                    item.get("title", ""),
+                    "",
+                    category=fields.get("category") or "general",
+                    flux_prompt=fields.get("image_generation_prompt"),
+                ))
+
+            # Article mode renders the publisher's image; no AI background needed
+            prefetch = prefetch_backgrounds and not (BG_MODE == "article" and item.get("top_image_url"))
+            transformed = call_chatgpt_on_news(
+                item,
+                on_fields=start_background if prefetch else None,
+            )
+            if bg_future:
+                transformed["bg_future"] = bg_future[0]
 
             # Preserve article metadata
             transformed["article_image_url"] = item.get("top_image_url", "")
@@ -162,14 +217,21 @@ def transform_rss_with_perplexity() -> List[Dict[str, Any]]:
                 "article_url": item.get("url", ""),
             })
 
-        time.sleep(0.8)  # Polite pause
+        if pause_s:
+            time.sleep(pause_s)  # Polite pause
 
-    print(f"\n🎯 FINAL SELECTION: {len(transformed_news)} posts ready")
     return transformed_news
 
 
+def call_chatgpt_on_news(news_item, model="gpt-4o-mini", on_fields: Optional[Callable[[Dict[str, str]], None]] = None, watch_fields=STREAM_WATCH_FIELDS):
+    """
+    Transform one extracted article into post JSON with GPT.
 
-def call_chatgpt_on_news(news_item, model="gpt-4o-mini"):
+    If `on_fields` is given the completion is streamed and `on_fields` is
+    called once, mid-stream, as soon as every key in `watch_fields` has a
+    complete value, e.g. to start background image generation while the
+    rest of the JSON is still being written.
+    """
     # Compress news item to essential fields only (save tokens)
     compact_news = {
         "title": news_item.get("title", "")[:200],
@@ -230,21 +292,31 @@ EXAMPLES:
 ✅ "Cricket stadium floodlights, empty armband on blue jersey, melancholic, blue/saffron, spotlight, 4K, NO faces/text"
 ✅ "₹ symbol falling through red charts, financial skyline blurred, red/black, dramatic lighting, 4K, NO faces/text"
 
-JSON: {{"title":"...","pov":"...","hashtags":"#TheAIPoint #Specific #Relevant #Tags","image_generation_prompt":"...","source":"...","category":"politics|cricket|bollywood|economy|tech|world|disaster|positive","news_sensitivity":"low|medium|high"}}
+JSON (keep this key order): {{"category":"politics|cricket|bollywood|economy|tech|world|disaster|positive","image_generation_prompt":"...","title":"...","pov":"...","hashtags":"#TheAIPoint #Specific #Relevant #Tags","source":"...","news_sensitivity":"low|medium|high"}}
 
 Return ONLY valid JSON. NO rejection - transform every news."""
 
-    resp = client.chat.completions.create(
-        model=model,
-        messages=[
-            {"role": "system", "content": "You are TheAIPoint's AI editor. Transform ALL news into engaging social posts with unique insights and RELEVANT hashtags. Always output valid JSON. Never reject."},
-            {"role": "user", "content": prompt}
-        ],
-        max_completion_tokens=450,
-        temperature=0.7
-    )
-
-    content = resp.choices[0].message.content.strip()
+    messages = [
+        {"role": "system", "content": "You are TheAIPoint's AI editor. Transform ALL news into engaging social posts with unique insights and RELEVANT hashtags. Always output valid JSON. Never reject."},
+        {"role": "user", "content": prompt}
+    ]
+
+    provider = get_chat_provider()
+    if on_fields is None:
+        content = provider.complete(messages, model=model, max_tokens=450, temperature=0.7).strip()
+    else:
+        extractor = JSONFieldExtractor(watch_fields)
+        parts = []
+        fired = False
+        for delta in provider.stream(messages, model=model, max_tokens=450, temperature=0.7):
+            parts.append(delta)
+            if not fired and extractor.feed(delta) and extractor.has(*watch_fields):
+                fired = True
+                try:
+                    on_fields(dict(extractor.values))
+                except Exception as e:
+                    logging.warning(f"on_fields callback failed: {e}")
+        content = "".join(parts).strip()
     if content.startswith("```"):
         # strip code fences
         content = "\n".join(line for line in content.splitlines() if not line.strip().startswith("```"))
@@ -255,44 +327,65 @@ Return ONLY valid JSON. NO rejection - transform every news."""
         return {"is_valid_news": False, "error": "Invalid JSON", "raw": content}
 
 # Using Union for type hinting for compatibility with Python < 3.10
-def call_perplexity(prompt: str, model: str = PERPLEXITY_MODEL, retries: int = 3, timeout: int = 60) -> Union[dict, None]:
+def call_perplexity(prompt: str, model: str = PERPLEXITY_MODEL, retries: int = PERPLEXITY_MAX_ATTEMPTS,
+                    timeout: float = PERPLEXITY_TIMEOUT_S, stream: bool = False) -> Union[dict, Iterator[dict], None]:
+    """
+    Sync wrapper for non-async callers; runs on the shared client's loop, reusing its connections.
+
+    With stream=True the digest is read over SSE and an iterator of parsed
+    news items is returned; each item is yielded as soon as its closing
+    '---' arrives, so image generation for item 1 can start while later
+    items are still being written.
+    """
     if not PPLX_API_KEY or PPLX_API_KEY == "REPLACE_ME":
         logging.error("Missing PERPLEXITY_API_KEY (set as env var).")
         return None
 
-    url = "https://api.perplexity.ai/chat/completions"
-    headers = { "Authorization": f"Bearer {PPLX_API_KEY}", "Content-Type": "application/json" }
-    body = {
-        "model": model,
-        "messages": [
-            {"role": "system", "content": "Be precise, concise. India audience."},
-            {"role": "user", "content": prompt},
-        ],
-    }
-
-    logging.info("👉 Calling Perplexity…")
-    logging.info(f"   URL: {url}")
-    logging.info(f"   Model: {model}")
     logging.info(f"   Auth: {redact(PPLX_API_KEY)}")
-    logging.info(f"   Prompt: {(prompt[:180] + '…') if len(prompt) > 180 else prompt}")
+    if stream:
+        return iter_on_client_loop(_stream_items(get_perplexity_client(), prompt, model, retries, timeout))
+    return run_on_client_loop(acall_perplexity(prompt, model=model, retries=retries, timeout=timeout))
 
-    for attempt in range(1, retries + 1):
-        try:
-            resp = requests.post(url, headers=headers, json=body, timeout=timeout)
-            logging.info(f"   HTTP {resp.status_code}")
-            if resp.status_code >= 400:
-                if resp.status_code in (429, 500, 502, 503, 504) and attempt < retries:
-                    sleep_s = 2 ** (attempt - 1)
-                    logging.warning(f"   Transient error; retrying in {sleep_s}s…")
-                    time.sleep(sleep_s)
-                    continue
-                resp.raise_for_status()
-            return resp.json()
-        except Exception as e:
-            logging.error(f"   Attempt {attempt}/{retries} failed: {e}")
-            if attempt == retries:
-                raise
-    return None
+
+async def acall_perplexity(prompt: str, model: str = PERPLEXITY_MODEL, retries: int = PERPLEXITY_MAX_ATTEMPTS,
+                           timeout: float = PERPLEXITY_TIMEOUT_S, client: Optional[AsyncPerplexityClient] = None,
+                           stream: bool = False) -> Union[dict, AsyncIterator[dict]]:
+    """
+    One chat completion. Uses the shared client (see get_perplexity_client)
+    unless the caller passes its own, which is then used on the caller's loop.
+    With stream=True, returns an async iterator of parsed news items (see call_perplexity).
+    """
+    if stream:
+        if client is not None:
+            return _stream_items(client, prompt, model, retries, timeout)
+        return aiter_on_client_loop(_stream_items(get_perplexity_client(), prompt, model, retries, timeout))
+    try:
+        if client is not None:
+            return await client.chat(prompt, model=model, timeout_s=timeout, max_attempts=retries)
+        return await await_on_client_loop(
+            get_perplexity_client().chat(prompt, model=model, timeout_s=timeout, max_attempts=retries)
+        )
+    finally:
+        metrics.log_summary("perplexity.")
+
+
+async def _stream_items(client: AsyncPerplexityClient, prompt: str, model: str, retries: int,
+                        timeout: float) -> AsyncIterator[dict]:
+    """Parse the SSE digest incrementally, yielding each item once its closing '---' arrives."""
+    parser = NewsStreamParser()
+    idx = 0
+    try:
+        async for delta in client.stream_chat(prompt, model=model, timeout_s=timeout, max_attempts=retries):
+            for item in parser.feed(delta):
+                idx += 1
+                logging.info(f"   ⚡ Streamed item {idx}: {item.get('title', '')[:60]}")
+                yield item
+        for item in parser.close():
+            idx += 1
+            logging.info(f"   ⚡ Streamed item {idx}: {item.get('title', '')[:60]}")
+            yield item
+    finally:
+        metrics.log_summary("perplexity.")
 
 def extract_text(data: dict) -> str:
     try:
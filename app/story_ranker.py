@@ -0,0 +1,267 @@
+"""
+Local pre-LLM story ranker.
+
+Scores RSS candidates (as returned by `collect_latest_from_rss`) so the
+pipeline can over-collect cheaply and spend article extraction + LLM calls
+only on the best few. Pure Python/NumPy, no network.
+
+Features (each normalised to 0..1):
+  - coverage:  how many distinct outlets carry the same story
+  - recency:   exponential decay on `news_time`
+  - salience:  weighted keyword hits in title + excerpt
+  - source:    static outlet weight
+"""
+import re
+import math
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from urllib.parse import urlparse
+
+import numpy as np
+from dateutil import parser as dateutil_parser
+
+# Final score = weighted sum of features
+FEATURE_WEIGHTS: Dict[str, float] = {
+    "coverage": 0.35,
+    "recency": 0.25,
+    "salience": 0.25,
+    "source": 0.15,
+}
+
+RECENCY_HALF_LIFE_HOURS = 4.0
+SIMILARITY_THRESHOLD = 0.34   # Jaccard on title tokens → "same story"
+MAX_COVERAGE = 4              # 4+ outlets counts as fully covered
+
+# Outlet weights (matched on domain suffix). Unknown outlets get DEFAULT_SOURCE_WEIGHT.
+SOURCE_WEIGHTS: Dict[str, float] = {
+    "thehindu.com": 1.0,
+    "indianexpress.com": 1.0,
+    "hindustantimes.com": 0.95,
+    "timesofindia.indiatimes.com": 0.9,
+    "ndtv.com": 0.95,
+    "livemint.com": 0.9,
+    "economictimes.indiatimes.com": 0.9,
+    "business-standard.com": 0.9,
+    "moneycontrol.com": 0.8,
+    "aninews.in": 0.85,
+    "bbc.co.uk": 0.9,
+    "aljazeera.com": 0.8,
+    "espncricinfo.com": 0.9,
+    "cricbuzz.com": 0.85,
+    "bollywoodhungama.com": 0.7,
+    "filmfare.com": 0.7,
+    "pinkvilla.com": 0.6,
+}
+DEFAULT_SOURCE_WEIGHT = 0.6
+
+# High-impact terms for an Indian news audience → salience weight
+SALIENCE_KEYWORDS: Dict[str, float] = {
+    # judiciary / politics
+    "supreme court": 3.0, "high court": 2.0, "verdict": 2.0, "judgment": 2.0,
+    "parliament": 2.0, "lok sabha": 2.0, "rajya sabha": 1.5, "election": 2.0,
+    "modi": 1.5, "opposition": 1.5, "bill": 1.0, "ban": 1.5, "protest": 1.5,
+    "arrested": 2.0, "probe": 1.0, "cbi": 1.5, "ed": 1.0,
+    # economy
+    "rbi": 2.5, "repo rate": 2.5, "gst": 2.0, "budget": 2.0, "sensex": 1.5,
+    "nifty": 1.5, "rupee": 1.5, "inflation": 1.5, "ipo": 1.5, "tariff": 2.0,
+    "crore": 1.0, "lakh": 0.5, "₹": 1.0,
+    # sports / entertainment
+    "world cup": 2.5, "ipl": 2.0, "bcci": 1.5, "virat": 1.5, "rohit": 1.0,
+    "box office": 1.5, "shah rukh": 1.5, "salman": 1.0,
+    # breaking / disaster
+    "breaking": 2.0, "killed": 2.0, "dead": 1.5, "earthquake": 2.5, "flood": 2.0,
+    "cyclone": 2.0, "crash": 2.0, "blast": 2.5, "attack": 2.0, "war": 2.0,
+    # tech
+    "isro": 2.0, "ai": 1.0, "launch": 1.0, "openai": 1.0,
+}
+MAX_SALIENCE = 6.0
+
+# Whole-word keyword matches ("war" must not hit "award"); longest first so phrases win
+_SALIENCE_RE = re.compile("|".join(
+    (r"\b" if kw[0].isalnum() else "") + re.escape(kw) + (r"\b" if kw[-1].isalnum() else "")
+    for kw in sorted(SALIENCE_KEYWORDS, key=len, reverse=True)
+))
+
+_TOKEN_RE = re.compile(r"[a-z0-9₹]+")
+_STOPWORDS = frozenset(
+    "a an the of in on at to for from by with and or but is are was were be "
+    "been has have had as after over amid its it this that his her their he she "
+    "they we you new says said will may can not no into up out vs".split()
+)
+
+
+def _title_tokens(title: str) -> frozenset:
+    return frozenset(
+        t for t in _TOKEN_RE.findall((title or "").lower())
+        if len(t) > 1 and t not in _STOPWORDS
+    )
+
+
+def _domain(item: Dict[str, Any]) -> str:
+    netloc = urlparse(item.get("url") or "").netloc.lower()
+    return netloc[4:] if netloc.startswith("www.") else netloc
+
+
+def _source_weight(domain: str) -> float:
+    for suffix, weight in SOURCE_WEIGHTS.items():
+        if domain == suffix or domain.endswith("." + suffix):
+            return weight
+    return DEFAULT_SOURCE_WEIGHT
+
+
+def _age_hours(news_time: Optional[str], now: datetime) -> float:
+    if not news_time:
+        return float("inf")
+    try:
+        dt = dateutil_parser.isoparse(news_time)
+    except (ValueError, TypeError):
+        return float("inf")
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return max(0.0, (now - dt).total_seconds() / 3600.0)
+
+
+def _salience(text: str) -> float:
+    return sum(SALIENCE_KEYWORDS[kw] for kw in set(_SALIENCE_RE.findall(text.lower())))
+
+
+def _story_clusters(token_sets: List[frozenset]) -> np.ndarray:
+    """
+    Group near-duplicate titles. Returns a cluster label per item.
+
+    Pairwise Jaccard similarity is computed in one shot from a binary
+    item×vocab matrix, then items are merged with union-find.
+    """
+    n = len(token_sets)
+    labels = np.arange(n)
+    if n < 2:
+        return labels
+
+    vocab: Dict[str, int] = {}
+    rows, cols = [], []
+    for i, toks in enumerate(token_sets):
+        for t in toks:
+            rows.append(i)
+            cols.append(vocab.setdefault(t, len(vocab)))
+
+    x = np.zeros((n, max(len(vocab), 1)), dtype=np.float32)
+    x[rows, cols] = 1.0
+    inter = x @ x.T
+    sizes = x.sum(axis=1)
+    union = sizes[:, None] + sizes[None, :] - inter
+    with np.errstate(divide="ignore", invalid="ignore"):
+        sim = np.where(union > 0, inter / union, 0.0)
+
+    parent = list(range(n))
+
+    def find(i: int) -> int:
+        while parent[i] != i:
+            parent[i] = parent[parent[i]]
+            i = parent[i]
+        return i
+
+    for i, j in zip(*np.nonzero(np.triu(sim >= SIMILARITY_THRESHOLD, k=1))):
+        ri, rj = find(int(i)), find(int(j))
+        if ri != rj:
+            parent[rj] = ri
+
+    return np.array([find(i) for i in range(n)])
+
+
+def rank_stories(
+    items: List[Dict[str, Any]],
+    now: Optional[datetime] = None,
+    weights: Optional[Dict[str, float]] = None,
+) -> List[Dict[str, Any]]:
+    """
+    Score and de-duplicate RSS candidates, best first.
+
+    Items that describe the same story are collapsed into one (the copy from
+    the highest-weighted outlet wins) and its `coverage` reflects how many
+    distinct outlets ran it. Each returned item is a shallow copy with
+    `score`, `coverage` and `features` added.
+    """
+    if not items:
+        return []
+
+    now = now or datetime.now(timezone.utc)
+    weights = weights or FEATURE_WEIGHTS
+
+    domains = [_domain(it) for it in items]
+    token_sets = [_title_tokens(it.get("title", "")) for it in items]
+    labels = _story_clusters(token_sets)
+
+    # Coverage: distinct outlets per cluster
+    outlets_per_cluster: Dict[int, set] = {}
+    for label, domain in zip(labels.tolist(), domains):
+        outlets_per_cluster.setdefault(label, set()).add(domain or "?")
+    outlet_counts = np.array([len(outlets_per_cluster[l]) for l in labels.tolist()], dtype=np.float64)
+
+    ages = np.array([_age_hours(it.get("news_time"), now) for it in items], dtype=np.float64)
+    salience = np.array(
+        [_salience(f"{it.get('title', '')} {it.get('excerpt', '')}") for it in items],
+        dtype=np.float64,
+    )
+    source = np.array([_source_weight(d) for d in domains], dtype=np.float64)
+
+    features = {
+        "coverage": np.clip((outlet_counts - 1.0) / (MAX_COVERAGE - 1.0), 0.0, 1.0),
+        "recency": np.exp(-math.log(2) * ages / RECENCY_HALF_LIFE_HOURS),
+        "salience": np.clip(salience / MAX_SALIENCE, 0.0, 1.0),
+        "source": source,
+    }
+    scores = sum(weights.get(name, 0.0) * values for name, values in features.items())
+
+    # Keep one representative per story: highest source weight, then score
+    best: Dict[int, int] = {}
+    for i, label in enumerate(labels.tolist()):
+        j = best.get(label)
+        if j is None or (source[i], scores[i]) > (source[j], scores[j]):
+            best[label] = i
+
+    ranked = []
+    for i in sorted(best.values(), key=lambda k: scores[k], reverse=True):
+        item = dict(items[i])
+        item["score"] = round(float(scores[i]), 4)
+        item["coverage"] = int(outlet_counts[i])
+        item["features"] = {name: round(float(v[i]), 4) for name, v in features.items()}
+        ranked.append(item)
+    return ranked
+
+
+def select_top_stories(
+    ranked: List[Dict[str, Any]],
+    k: int,
+    quotas: Optional[Dict[str, int]] = None,
+    category_key: str = "interest",
+) -> List[Dict[str, Any]]:
+    """
+    Pick the top `k` ranked stories.
+
+    `quotas` (e.g. {"top_stories": 6, "world": 1}) caps how many stories a
+    category may take on the first pass so the mix stays diverse; any slots
+    left over are filled with the best remaining stories regardless of
+    category.
+    """
+    if not quotas:
+        return ranked[:k]
+
+    picked: List[Dict[str, Any]] = []
+    leftovers: List[Dict[str, Any]] = []
+    used: Dict[str, int] = {}
+    for item in ranked:
+        cat = item.get(category_key, "")
+        if len(picked) < k and used.get(cat, 0) < quotas.get(cat, 0):
+            used[cat] = used.get(cat, 0) + 1
+            picked.append(item)
+        else:
+            leftovers.append(item)
+
+    for item in leftovers:
+        if len(picked) >= k:
+            break
+        picked.append(item)
+
+    # Present in score order
+    picked.sort(key=lambda it: it.get("score", 0.0), reverse=True)
+    return picked
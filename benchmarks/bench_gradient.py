@@ -0,0 +1,111 @@
+"""
+Theme gradient backgrounds: the original per-pixel PIL implementation vs the
+NumPy-vectorized, memoized _create_enhanced_gradient.
+
+    python -m benchmarks.bench_gradient --repeat 3
+"""
+import io
+import os
+import sys
+import time
+import random
+import argparse
+from typing import List
+
+from PIL import Image, ImageDraw, ImageEnhance
+
+
+def reference_gradient(colors: List[str], size: tuple = (1080, 1350)) -> bytes:
+    """The pre-vectorization implementation, kept verbatim for comparison."""
+    from app.generate_image import _hex_to_rgb
+    w, h = size
+
+    img = Image.new("RGB", (w, h))
+    draw = ImageDraw.Draw(img)
+    color_stops = [_hex_to_rgb(c) for c in colors]
+    for y in range(h):
+        pos = y / h
+        if pos <= 0.5:
+            t = pos * 2
+            start_color = color_stops[0]
+            end_color = color_stops[1] if len(color_stops) > 1 else color_stops[0]
+        else:
+            t = (pos - 0.5) * 2
+            start_color = color_stops[1] if len(color_stops) > 1 else color_stops[0]
+            end_color = color_stops[2] if len(color_stops) > 2 else color_stops[-1]
+        r = int(start_color[0] + (end_color[0] - start_color[0]) * t)
+        g = int(start_color[1] + (end_color[1] - start_color[1]) * t)
+        b = int(start_color[2] + (end_color[2] - start_color[2]) * t)
+        draw.line([(0, y), (w, y)], fill=(r, g, b))
+
+    noise_overlay = Image.new("RGBA", (w, h), (0, 0, 0, 0))
+    noise_draw = ImageDraw.Draw(noise_overlay)
+    random.seed(42)
+    for _ in range(w * h // 100):
+        x = random.randint(0, w-1)
+        y = random.randint(0, h-1)
+        alpha = random.randint(5, 15)
+        noise_draw.point((x, y), fill=(255, 255, 255, alpha))
+    img = Image.alpha_composite(img.convert("RGBA"), noise_overlay)
+
+    vignette = Image.new("RGBA", (w, h), (0, 0, 0, 0))
+    vignette_draw = ImageDraw.Draw(vignette)
+    center_x, center_y = w // 2, h // 2
+    max_distance = ((w/2)**2 + (h/2)**2)**0.5
+    for y in range(0, h, 4):
+        for x in range(0, w, 4):
+            distance = ((x - center_x)**2 + (y - center_y)**2)**0.5
+            vignette_strength = min(1.0, (distance / max_distance) * 0.8)
+            alpha = int(vignette_strength * 60)
+            vignette_draw.rectangle([x, y, x+3, y+3], fill=(0, 0, 0, alpha))
+    img = Image.alpha_composite(img, vignette)
+
+    img = ImageEnhance.Contrast(img.convert("RGB")).enhance(1.1)
+    output = io.BytesIO()
+    img.save(output, format="JPEG", quality=92)
+    return output.getvalue()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=3)
+    args = ap.parse_args()
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    from app.generate_image import THEMES, _create_enhanced_gradient
+
+    themes = list(THEMES.values())
+    colors = themes[0]["gradient"]
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        reference = reference_gradient(colors)
+    ref_s = (time.perf_counter() - start) / args.repeat
+
+    _create_enhanced_gradient.cache_clear()
+    start = time.perf_counter()
+    fast = _create_enhanced_gradient(tuple(colors))
+    cold_s = time.perf_counter() - start
+
+    # Remaining themes: overlays already built, only the gradient itself is new
+    start = time.perf_counter()
+    for theme in themes[1:]:
+        _create_enhanced_gradient(tuple(theme["gradient"]))
+    warm_s = (time.perf_counter() - start) / max(1, len(themes) - 1)
+
+    start = time.perf_counter()
+    for _ in range(1000):
+        _create_enhanced_gradient(tuple(colors))
+    hit_s = (time.perf_counter() - start) / 1000
+
+    same = Image.open(io.BytesIO(reference)).tobytes() == Image.open(io.BytesIO(fast)).tobytes()
+    print(f"Gradient 1080x1350 ({len(themes)} themes)")
+    print(f"  reference         {ref_s * 1000:9.1f} ms/image")
+    print(f"  vectorized cold   {cold_s * 1000:9.1f} ms  ({ref_s / cold_s:.1f}x)")
+    print(f"  vectorized theme  {warm_s * 1000:9.1f} ms/image  ({ref_s / warm_s:.1f}x)")
+    print(f"  memoized hit      {hit_s * 1e6:9.2f} us")
+    print(f"  identical pixels: {same}")
+
+
+if __name__ == "__main__":
+    main()
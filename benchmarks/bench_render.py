@@ -0,0 +1,159 @@
+"""
+Post rendering: headless Chromium (render_service) vs the Pillow engine.
+
+Each engine runs in its own worker process so peak memory is measured
+cleanly; the parent samples the RSS of the worker and all of its children
+(Chromium's renderer/GPU processes) from /proc.
+
+    python -m benchmarks.bench_render --posts 6 --profile social
+    python -m benchmarks.bench_render --aspects feed,story,square
+    python -m benchmarks.bench_render --engines chromium,farm --workers 4 --posts 24
+
+The `farm` engine renders the batch on a RenderFarm of `--workers`
+processes; its ms/post is the batch time divided by the posts (throughput),
+after one warm-up post.
+"""
+import os
+import sys
+import json
+import time
+import argparse
+import subprocess
+from typing import Dict, List, Optional
+
+SAMPLE_POSTS = [
+    ("Breaking: AI chatbot solves climate change with revolutionary carbon capture method 🌍⚡", "breaking"),
+    ("RBI holds repo rate at 6.5% as inflation cools for a third straight month", "business"),
+    ("New open-weights model tops coding benchmarks while running on a single GPU", "tech"),
+    ("India clinch the series with a last-over six in Chennai", "sports"),
+    ("Monsoon arrives early over Kerala, IMD forecasts above-normal rainfall", "default"),
+    ("Parliament passes data protection amendments after marathon debate", "politics"),
+]
+POV = "This could reshape how the industry thinks about cost and access, and the next quarter will show whether it sticks."
+
+
+def _worker(engine: str, posts: int, profile_name: str, aspects: List[str], out_dir: str, workers: int = 2) -> None:
+    """Render `posts` posts with one engine; print timings as JSON."""
+    import pathlib
+    from app.generate_image import build_post_context, gradient_background, post_assets, render_post_html
+    from app.render_profiles import get_profile, save_image
+    from app import pillow_render
+
+    profile = get_profile(profile_name)
+    contexts = []
+    for i in range(posts):
+        title, category = SAMPLE_POSTS[i % len(SAMPLE_POSTS)]
+        context, _ = build_post_context(title, POV, category=category, background_image=gradient_background(category))
+        outputs = {a: pathlib.Path(out_dir) / f"{engine}-{profile.name}-{i}-{a}{profile.ext}" for a in aspects}
+        contexts.append((context, outputs))
+
+    if engine == "farm":
+        from app.render_farm import RenderFarm
+        farm = RenderFarm(workers=workers)
+        jobs = [(render_post_html(ctx), outputs, post_assets(ctx)) for ctx, outputs in contexts]
+        start = time.perf_counter()
+        farm.render_many(jobs[:1], profile=profile)
+        times = [time.perf_counter() - start]
+        start = time.perf_counter()
+        errors = farm.render_many(jobs[1:], profile=profile)
+        if any(errors):
+            raise next(e for e in errors if e)
+        times += [(time.perf_counter() - start) / max(1, len(jobs) - 1)] * (len(jobs) - 1)
+        farm.close()
+        print(json.dumps({"times": times, "bytes": os.path.getsize(next(iter(contexts[-1][1].values())))}))
+        return
+
+    if engine == "chromium":
+        from app.render_service import RenderService
+        service = RenderService(pages=1)
+        render = lambda ctx, outputs: service.render(render_post_html(ctx), outputs, post_assets(ctx), profile)
+    else:
+        def render(ctx, outputs):
+            for aspect, image in pillow_render.draw_posts(ctx, profile.scale, list(outputs)).items():
+                save_image(image, outputs[aspect], profile)
+
+    times = []
+    for context, path in contexts:
+        start = time.perf_counter()
+        render(context, path)
+        times.append(time.perf_counter() - start)
+    if engine == "chromium":
+        service.close()
+    print(json.dumps({"times": times, "bytes": os.path.getsize(next(iter(contexts[-1][1].values())))}))
+
+
+def _tree_rss(pid: int) -> int:
+    """RSS in bytes of `pid` and all its descendants (Linux /proc)."""
+    children: Dict[int, List[int]] = {}
+    for entry in os.listdir("/proc"):
+        if not entry.isdigit():
+            continue
+        try:
+            with open(f"/proc/{entry}/stat") as f:
+                ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+        except (OSError, IndexError, ValueError):
+            continue
+        children.setdefault(ppid, []).append(int(entry))
+    total, stack = 0, [pid]
+    page = os.sysconf("SC_PAGE_SIZE")
+    while stack:
+        p = stack.pop()
+        try:
+            with open(f"/proc/{p}/statm") as f:
+                total += int(f.read().split()[1]) * page
+        except (OSError, IndexError, ValueError):
+            pass
+        stack.extend(children.get(p, []))
+    return total
+
+
+def _run(engine: str, posts: int, profile: str, aspects: str, out_dir: str, workers: int) -> Optional[dict]:
+    cmd = [sys.executable, "-m", "benchmarks.bench_render", "--worker", engine, "--workers", str(workers),
+           "--posts", str(posts), "--profile", profile, "--aspects", aspects, "--out", out_dir]
+    proc = subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, text=True)
+    peak = 0
+    while proc.poll() is None:
+        peak = max(peak, _tree_rss(proc.pid))
+        time.sleep(0.02)
+    out, err = proc.communicate()
+    if proc.returncode != 0:
+        lines = [l for l in err.strip().splitlines() if "Error" in l] or err.strip().splitlines() or ["?"]
+        print(f"  {engine:<9} unavailable: {lines[-1][:120]}")
+        return None
+    result = json.loads(out.strip().splitlines()[-1])
+    result["peak_rss"] = peak
+    return result
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--posts", type=int, default=6)
+    ap.add_argument("--profile", default="social", help="render profile: preview | social | print")
+    ap.add_argument("--aspects", default="feed", help="variants per post, from one layout pass: feed,story,square")
+    ap.add_argument("--engines", default="chromium,pillow", help="chromium | pillow | farm")
+    ap.add_argument("--workers", type=int, default=2, help="render farm processes (farm engine)")
+    ap.add_argument("--out", default="/tmp/bench_render")
+    ap.add_argument("--worker", help=argparse.SUPPRESS)
+    args = ap.parse_args()
+    sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    os.makedirs(args.out, exist_ok=True)
+
+    if args.worker:
+        _worker(args.worker, args.posts, args.profile, args.aspects.split(","), args.out, args.workers)
+        return
+
+    print(f"Post render, {args.posts} posts, profile {args.profile}, aspects {args.aspects}, images in {args.out}")
+    for engine in args.engines.split(","):
+        result = _run(engine.strip(), args.posts, args.profile, args.aspects, args.out, args.workers)
+        if result is None:
+            continue
+        times = sorted(result["times"])
+        steady = times[:-1] or times  # drop the slowest (first-render / browser launch)
+        print(f"  {engine:<9} first {result['times'][0] * 1000:8.0f} ms   "
+              f"median {steady[len(steady) // 2] * 1000:7.0f} ms/post   "
+              f"peak RSS {result['peak_rss'] / 1e6:6.0f} MB   "
+              f"{result['bytes'] / 1024:.0f} KB/image")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,75 @@
+import io
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+from app.generate_image import _decode_cover, _download_photo_bytes, article_background
+
+
+def _jpeg(size=(2400, 1600)) -> bytes:
+    out = io.BytesIO()
+    Image.new("RGB", size, (200, 30, 30)).save(out, format="JPEG")
+    return out.getvalue()
+
+
+class _Response:
+    def __init__(self, body: bytes, content_type: str = "image/jpeg", status: int = 200, declare_length: bool = True):
+        self.body = body
+        self.status_code = status
+        self.ok = status < 400
+        self.headers = {"content-type": content_type}
+        if declare_length:
+            self.headers["content-length"] = str(len(body))
+        self.read = 0
+
+    def iter_content(self, chunk_size):
+        for i in range(0, len(self.body), chunk_size):
+            self.read += chunk_size
+            yield self.body[i:i + chunk_size]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+class TestArticleBackground(unittest.TestCase):
+
+    def test_download_checks_content_type_and_byte_cap(self):
+        body = b"x" * 300_000
+        with mock.patch("app.generate_image.requests.get", return_value=_Response(body, "text/html")):
+            self.assertIsNone(_download_photo_bytes("https://example.com/a.jpg"))
+        with mock.patch("app.generate_image.requests.get", return_value=_Response(body)):
+            self.assertIsNone(_download_photo_bytes("https://example.com/a.jpg", max_bytes=100_000))
+        # No content-length: stop streaming once over the cap
+        response = _Response(body, declare_length=False)
+        with mock.patch("app.generate_image.requests.get", return_value=response):
+            self.assertIsNone(_download_photo_bytes("https://example.com/a.jpg", max_bytes=100_000))
+        self.assertLess(response.read, len(body))
+        with mock.patch("app.generate_image.requests.get", return_value=_Response(body, "image/jpeg; charset=binary")):
+            self.assertEqual(_download_photo_bytes("https://example.com/a.jpg"), body)
+
+    def test_jpeg_is_draft_decoded_and_cover_cropped(self):
+        from PIL.JpegImagePlugin import JpegImageFile
+        drafts = []
+        real_draft = JpegImageFile.draft
+
+        def spy(img, mode, size):
+            result = real_draft(img, mode, size)
+            drafts.append(img.size)
+            return result
+
+        with mock.patch.object(JpegImageFile, "draft", spy):
+            img = _decode_cover(_jpeg((4400, 3000)))
+        self.assertEqual(img.size, (1080, 1350))
+        self.assertEqual(drafts, [(2200, 1500)])  # 1/2 scale still covers 1980x1350
+
+    def test_small_or_missing_images_fall_through(self):
+        self.assertIsNone(_decode_cover(_jpeg((300, 200))))
+        with mock.patch("app.generate_image._download_photo_bytes", return_value=b"not an image"):
+            self.assertIsNone(article_background("https://example.com/a.jpg"))
+        with mock.patch("app.generate_image._download_photo_bytes", return_value=_jpeg()):
+            data = article_background("https://example.com/a.jpg")
+        self.assertEqual(Image.open(io.BytesIO(data)).size, (1080, 1350))
@@ -0,0 +1,87 @@
+import io
+import os
+import shutil
+import tempfile
+import unittest
+
+from PIL import Image, ImageFilter
+
+from app import metrics
+from app.services.attachment_budget import MIN_WIDTH, fit_attachments, split_attachments
+from app.services.mail_transport import estimate_message_size, spool_message
+
+MB = 1024 * 1024
+HTML = "<p>digest</p>"
+
+
+class TestAttachmentBudget(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        # Photo-like noise: ~1 MB at q95, ~350 KB at q70
+        img = Image.merge("RGB", [Image.effect_noise((1400, 1750), 40) for _ in range(3)]).filter(ImageFilter.GaussianBlur(1))
+        buf = io.BytesIO()
+        img.save(buf, "JPEG", quality=95)
+        cls.jpeg = buf.getvalue()
+        buf = io.BytesIO()
+        img.save(buf, "PNG")
+        cls.png = buf.getvalue()
+
+    def setUp(self):
+        metrics.reset()
+        self.dir = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.dir)
+
+    def _posts(self, n=6, png=0):
+        paths = []
+        for i in range(n):
+            path = os.path.join(self.dir, f"post-{i}.png" if i < png else f"post-{i}.jpg")
+            with open(path, "wb") as f:
+                f.write(self.png if i < png else self.jpeg)
+            paths.append(path)
+        return paths
+
+    def test_under_budget_untouched(self):
+        paths = self._posts(2)
+        self.assertEqual(fit_attachments(paths, HTML, 24 * MB), paths)
+        with open(paths[0], "rb") as f:
+            self.assertEqual(f.read(), self.jpeg)
+
+    def test_reencoded_to_fit_with_sizes_logged(self):
+        paths = self._posts(6)
+        self.assertGreater(estimate_message_size(HTML, paths), 8 * MB)
+        with self.assertLogs(level="INFO") as logs:
+            fitted = fit_attachments(paths, HTML, 6 * MB)
+        self.assertEqual(fitted, paths)
+        self.assertLessEqual(estimate_message_size(HTML, fitted), 6 * MB)
+        self.assertEqual(metrics.count("email.attachments_shrunk", action="re-encoded"), 6)
+        self.assertTrue(any("MB →" in line and "budget 6.3 MB" in line for line in logs.output))
+        self.assertEqual(Image.open(fitted[0]).size, (1400, 1750))
+
+    def test_downscaled_not_below_min_width_then_split(self):
+        paths = self._posts(6, png=1)
+        fitted = fit_attachments(paths, HTML, int(2.2 * MB))
+        self.assertTrue(fitted[0].endswith("post-0.jpg") and not os.path.exists(paths[0]))
+        self.assertEqual(Image.open(fitted[0]).format, "JPEG")
+        widths = {Image.open(p).width for p in fitted}
+        self.assertTrue(all(MIN_WIDTH <= w < 1400 for w in widths))
+        self.assertGreater(metrics.count("email.attachments_shrunk", action="downscaled"), 0)
+
+        # Too small a budget even at the floor: several messages, each within it, order kept
+        groups = split_attachments(fitted, HTML, int(0.8 * MB))
+        self.assertGreater(len(groups), 1)
+        self.assertEqual([p for g in groups for p in g], fitted)
+        self.assertTrue(all(estimate_message_size(HTML, g) <= 0.8 * MB for g in groups))
+        self.assertEqual(split_attachments(fitted, HTML, 24 * MB), [fitted])
+
+    def test_estimate_matches_message(self):
+        paths = self._posts(3)
+        with spool_message("Subject", "me@example.com", ["you@example.com"], HTML, paths) as message:
+            size = message.seek(0, os.SEEK_END)
+        estimate = estimate_message_size(HTML, paths)
+        self.assertGreaterEqual(estimate, size)
+        self.assertLess(estimate - size, 1024)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+import time
+import random
+import unittest
+from unittest import mock
+
+from app.custom_bg import BgResult, generate_custom_bg_batch, image_type
+from app.providers.fake import FakeImageProvider
+
+
+class _SlowFor(FakeImageProvider):
+    """Hangs on prompts containing 'slow'; fails on prompts containing 'boom'."""
+
+    async def agenerate(self, prompt, size=(1080, 1350), seed=None):
+        import asyncio
+        if "slow" in prompt:
+            await asyncio.sleep(5)
+        if "boom" in prompt:
+            raise RuntimeError("boom")
+        return await super().agenerate(prompt, size=(8, 8), seed=seed)
+
+
+class TestBackgroundBatch(unittest.TestCase):
+
+    def setUp(self):
+        patcher = mock.patch("app.custom_bg._get_bg_cache", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_results_in_input_order_with_per_item_errors_and_timeouts(self):
+        provider = _SlowFor(latency="fixed:50")
+        requests = [
+            {"headline": "a", "flux_prompt": "fine one"},
+            {"headline": "b", "flux_prompt": "slow one"},
+            {"headline": "c", "flux_prompt": "boom"},
+            {"headline": "d", "category": "cricket"},
+        ]
+        with mock.patch("app.custom_bg.get_image_provider", return_value=provider):
+            start = time.monotonic()
+            results = generate_custom_bg_batch(requests, max_concurrency=4, timeout_s=0.5)
+            elapsed = time.monotonic() - start
+
+        self.assertEqual([r.ok for r in results], [True, False, False, True])
+        self.assertIn("timed out", results[1].error)
+        self.assertIn("boom", results[2].error)
+        self.assertLess(elapsed, 2)
+
+    def test_concurrency_is_bounded(self):
+        provider = FakeImageProvider(latency="fixed:200")
+        requests = [{"headline": str(i), "flux_prompt": f"p{i}"} for i in range(4)]
+        with mock.patch("app.custom_bg.get_image_provider", return_value=provider), \
+                mock.patch("app.custom_bg.BG_SIZE", (8, 8)):
+            start = time.monotonic()
+            results = generate_custom_bg_batch(requests, max_concurrency=2, timeout_s=5)
+            elapsed = time.monotonic() - start
+        self.assertTrue(all(r.ok for r in results))
+        # 4 calls of 200ms, 2 at a time → ~400ms, not ~200ms or ~800ms
+        self.assertGreater(elapsed, 0.35)
+        self.assertLess(elapsed, 0.75)
+
+
+class TestInMemoryBackground(unittest.TestCase):
+
+    def test_provider_bytes_returned_unchanged(self):
+        from app.generate_image import _process_background_image
+        jpeg = FakeImageProvider()._render(random.Random(0), (8, 8))
+        with mock.patch("app.generate_image.generate_custom_bg_batch", return_value=[BgResult(image=jpeg)]), \
+                mock.patch("app.generate_image.save_image_bytes") as save:
+            data = _process_background_image("t", "", [], {}, category="tech")
+        self.assertEqual(data, jpeg)
+        save.assert_not_called()
+
+    def test_image_type_sniffing(self):
+        self.assertEqual(image_type(b"\x89PNG\r\n\x1a\n...."), ("image/png", "png"))
+        self.assertEqual(image_type(b"RIFF\0\0\0\0WEBPVP8 "), ("image/webp", "webp"))
+        self.assertEqual(image_type(b"\xff\xd8\xff\xe0"), ("image/jpeg", "jpg"))
+
+
+if __name__ == '__main__':
+    unittest.main()
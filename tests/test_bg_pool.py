@@ -0,0 +1,79 @@
+import os
+import time
+import tempfile
+import unittest
+from unittest import mock
+
+from app import metrics
+from app.bg_pool import BackgroundPool
+from app.providers.fake import FakeImageProvider
+
+
+class TestBackgroundPool(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+        metrics.reset()
+        patcher = mock.patch("app.bg_pool.get_image_provider", return_value=FakeImageProvider())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        size_patch = mock.patch("app.bg_pool.BG_SIZE", (8, 8))
+        size_patch.start()
+        self.addCleanup(size_patch.stop)
+
+    def test_refill_tops_up_and_take_consumes_all_but_last(self):
+        pool = BackgroundPool(self.tmp.name, size=2)
+        self.assertEqual(pool.refill(["cricket", "default"]), 4)
+        self.assertEqual(pool.refill(["cricket", "default"]), 0)
+
+        first = pool.take("cricket")
+        second = pool.take("cricket")
+        third = pool.take("cricket")
+        self.assertTrue(first and second)
+        self.assertNotEqual(first, second)
+        self.assertEqual(second, third)  # last entry is kept, not consumed
+        self.assertEqual(pool.count("cricket"), 1)
+        self.assertEqual(metrics.count("bg_pool.hit", category="cricket"), 3)
+
+    def test_unknown_category_uses_default_then_misses(self):
+        pool = BackgroundPool(self.tmp.name, size=1)
+        self.assertIsNone(pool.take("tech"))
+        self.assertEqual(metrics.count("bg_pool.miss", category="tech"), 1)
+        pool.refill(["default"])
+        self.assertIsNotNone(pool.take("tech"))
+
+    def test_refill_replaces_stale_entries_and_respects_budget(self):
+        pool = BackgroundPool(self.tmp.name, size=2, max_age_s=3600)
+        os.makedirs(os.path.join(self.tmp.name, "tech"))
+        old = os.path.join(self.tmp.name, "tech", f"{int(time.time()) - 7200}_old.jpg")
+        with open(old, "wb") as f:
+            f.write(b"\xff\xd8old")
+        self.assertEqual(pool.refill(["tech"], budget_s=0), 0)
+        self.assertEqual(pool.refill(["tech"]), 2)
+        self.assertFalse(os.path.exists(old))
+        self.assertEqual(pool.count("tech"), 2)
+
+
+class TestDeadlineFallback(unittest.TestCase):
+
+    def test_items_missing_the_deadline_get_pooled_backgrounds(self):
+        from concurrent.futures import Future
+        from app.custom_bg import BgResult
+        from app.generate_image import prepare_backgrounds
+
+        never = Future()  # prefetch that never finishes
+        items = [
+            {"title": "a", "category": "cricket", "bg_future": never},
+            {"title": "b", "category": "tech"},
+        ]
+        pool = mock.Mock()
+        pool.take.side_effect = lambda cat: f"pool:{cat}".encode()
+        with mock.patch("app.generate_image.get_background_pool", return_value=pool), \
+                mock.patch("app.generate_image.generate_custom_bg_batch",
+                           return_value=[BgResult(error="timed out after 0s")]) as batch:
+            start = time.monotonic()
+            backgrounds = prepare_backgrounds(items, deadline_s=0.2)
+        self.assertLess(time.monotonic() - start, 1)
+        self.assertEqual(backgrounds, [b"pool:cricket", b"pool:tech"])
+        self.assertEqual(batch.call_args.kwargs["timeout_s"], 0.2)
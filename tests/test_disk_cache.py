@@ -0,0 +1,57 @@
+import os
+import time
+import tempfile
+import unittest
+from unittest import mock
+
+from app.disk_cache import DiskLRUCache
+from app.custom_bg import generate_bg_bytes
+from app.providers.fake import FakeImageProvider
+
+
+class TestDiskLRUCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def test_roundtrip_and_miss(self):
+        cache = DiskLRUCache(self.tmp.name, max_bytes=1000)
+        self.assertIsNone(cache.get("k"))
+        cache.put("k", b"hello")
+        self.assertEqual(cache.get("k"), b"hello")
+
+    def test_evicts_least_recently_used(self):
+        cache = DiskLRUCache(self.tmp.name, max_bytes=250)
+        for i, key in enumerate(("a", "b", "c")):
+            cache.put(key, bytes(80))
+            # distinct mtimes regardless of filesystem timestamp resolution
+            os.utime(cache._path(key), (1000 + i, 1000 + i))
+        cache.get("a")  # bump a → b is now the oldest
+        cache.put("d", bytes(80))
+        self.assertTrue(cache.contains("a"))
+        self.assertFalse(cache.contains("b"))
+        self.assertTrue(cache.contains("d"))
+
+
+class TestBackgroundCache(unittest.TestCase):
+
+    def test_same_prompt_is_served_from_cache_without_provider_call(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            cache = DiskLRUCache(tmp, max_bytes=10 * 1024 * 1024)
+            provider = FakeImageProvider(latency="fixed:0")
+            with mock.patch("app.custom_bg._get_bg_cache", return_value=cache), \
+                    mock.patch("app.custom_bg.get_image_provider", return_value=provider), \
+                    mock.patch("app.custom_bg.BG_CACHE_ENABLED", True), \
+                    mock.patch("app.custom_bg.BG_SIZE", (8, 8)), \
+                    mock.patch.object(provider, "generate", wraps=provider.generate) as generate:
+                first = generate_bg_bytes("Headline", flux_prompt="Stadium  lights, blue")
+                second = generate_bg_bytes("Other headline", flux_prompt="stadium lights, BLUE")
+                generate_bg_bytes("A", category="cricket")
+                generate_bg_bytes("A", category="cricket")
+            self.assertEqual(first, second)
+            self.assertEqual(generate.call_count, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
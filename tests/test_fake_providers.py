@@ -0,0 +1,41 @@
+import io
+import json
+import unittest
+
+from PIL import Image
+
+from app.providers.base import ProviderError
+from app.providers.fake import FakeChatProvider, FakeImageProvider, LatencyModel
+
+
+class TestFakeProviders(unittest.TestCase):
+
+    def test_chat_is_deterministic_and_stream_matches_complete(self):
+        provider = FakeChatProvider(latency="fixed:0", seed=7)
+        messages = [{"role": "user", "content": 'NEWS: {"title": "RBI holds rates"}\n\nOutput JSON only.'}]
+        full = provider.complete(messages, model="x")
+        self.assertEqual(full, provider.complete(messages, model="x"))
+        self.assertEqual("".join(provider.stream(messages, model="x")), full)
+        self.assertEqual(json.loads(full)["title"], "RBI holds rates")
+
+    def test_image_bytes_decode_at_requested_size(self):
+        data = FakeImageProvider(latency="fixed:0").generate("prompt", size=(108, 135))
+        self.assertEqual(Image.open(io.BytesIO(data)).size, (108, 135))
+
+    def test_error_rate_injects_failures(self):
+        provider = FakeImageProvider(latency="fixed:0", error_rate=1.0)
+        with self.assertRaises(ProviderError):
+            provider.generate("prompt", size=(8, 8))
+
+    def test_latency_specs(self):
+        import random
+        rng = random.Random(0)
+        self.assertEqual(LatencyModel("fixed:250").sample(rng), 0.25)
+        self.assertTrue(0.1 <= LatencyModel("uniform:100,200").sample(rng) <= 0.2)
+        self.assertGreater(LatencyModel("lognormal:800,0.5").sample(rng), 0)
+        with self.assertRaises(ValueError):
+            LatencyModel("gamma:1")
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,55 @@
+import io
+import os
+import sys
+import base64
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import ImageFont
+
+from app.fonts import FONT_FAMILIES, GOOGLE_FONTS_LINK, _latin_woff2_url, _subset, post_font_css, sfnt_bytes, vendored_fonts
+
+
+class TestFonts(unittest.TestCase):
+
+    def test_inline_font_faces_from_vendored_files(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            for name in ("Montserrat-900.woff2", "BebasNeue-400.woff2", "Unknown-400.woff2", "notes.txt"):
+                with open(os.path.join(tmp, name), "wb") as f:
+                    f.write(b"wOF2" + name.encode())
+            self.assertEqual([(f, w) for f, w, _ in vendored_fonts(tmp)], [("Bebas Neue", 400), ("Montserrat", 900)])
+            css = post_font_css(tmp)
+        self.assertTrue(css.startswith("<style>"))
+        self.assertEqual(css.count("@font-face"), 2)
+        self.assertIn("font-family: 'Bebas Neue'; font-style: normal; font-weight: 400", css)
+        self.assertIn(base64.b64encode(b"wOF2Montserrat-900.woff2").decode(), css)
+        self.assertNotIn("googleapis", css)
+
+    def test_falls_back_to_google_fonts_when_nothing_vendored(self):
+        with tempfile.TemporaryDirectory() as tmp:
+            self.assertEqual(post_font_css(os.path.join(tmp, "missing")), GOOGLE_FONTS_LINK)
+
+    def test_picks_latin_block_from_css2_response(self):
+        css = """
+/* latin-ext */
+@font-face { font-family: 'Inter'; src: url(https://fonts.gstatic.com/ext.woff2) format('woff2'); }
+/* latin */
+@font-face { font-family: 'Inter'; src: url(https://fonts.gstatic.com/latin.woff2) format('woff2'); }
+"""
+        self.assertEqual(_latin_woff2_url(css), "https://fonts.gstatic.com/latin.woff2")
+
+    def test_committed_fonts_cover_every_family_and_weight(self):
+        fonts = vendored_fonts()
+        expected = sorted((family, weight) for family, weights in FONT_FAMILIES.items() for weight in weights)
+        self.assertEqual(sorted((f, w) for f, w, _ in fonts), expected)
+        self.assertNotIn("googleapis", post_font_css())
+        # Loadable by Pillow even where FreeType cannot read WOFF2
+        for _, _, path in fonts:
+            self.assertGreater(ImageFont.truetype(io.BytesIO(sfnt_bytes(path)), 40).getlength("₹ 50"), 0)
+
+    def test_subsetting_fails_loudly_without_fonttools(self):
+        with mock.patch.dict(sys.modules, {"brotli": None}):
+            with self.assertRaises(RuntimeError):
+                _subset(b"")
+
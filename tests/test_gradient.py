@@ -0,0 +1,34 @@
+import io
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+from app.generate_image import THEMES, _create_enhanced_gradient, gradient_background, prepare_backgrounds
+from benchmarks.bench_gradient import reference_gradient
+
+
+def _pixels(data: bytes) -> bytes:
+    return Image.open(io.BytesIO(data)).tobytes()
+
+
+class TestGradient(unittest.TestCase):
+
+    def test_matches_reference_implementation(self):
+        for colors, size in [(THEMES["cricket"]["gradient"], (120, 150)), (["#ff0000"], (37, 41))]:
+            self.assertEqual(_pixels(_create_enhanced_gradient(tuple(colors), size)),
+                             _pixels(reference_gradient(colors, size)))
+
+    def test_memoized_per_colors_and_size(self):
+        first = gradient_background("tech", (64, 80))
+        self.assertIs(first, gradient_background("tech", (64, 80)))
+        self.assertIsNot(first, gradient_background("tech", (64, 96)))
+        self.assertIs(gradient_background("bollywood", (64, 80)), gradient_background("default", (64, 80)))
+
+    def test_gradient_mode_never_calls_provider(self):
+        with mock.patch("app.generate_image.BG_MODE", "gradient"), \
+                mock.patch("app.generate_image.generate_custom_bg_batch") as batch:
+            backgrounds = prepare_backgrounds([{"category": "economy"}, {}])
+        batch.assert_not_called()
+        self.assertEqual(backgrounds[0], gradient_background("economy"))
+        self.assertEqual(backgrounds[1], gradient_background("default"))
@@ -0,0 +1,82 @@
+import time
+import asyncio
+import unittest
+
+from app import metrics
+from app.providers import HedgedImageProvider, ProviderError
+from app.providers.base import ImageProvider
+
+
+class _Stub(ImageProvider):
+    def __init__(self, name, delay, fail=False):
+        self.name = name
+        self.delay = delay
+        self.fail = fail
+        self.cancelled = 0
+
+    def generate(self, prompt, size=(8, 8), seed=None):
+        raise NotImplementedError
+
+    async def agenerate(self, prompt, size=(8, 8), seed=None):
+        try:
+            await asyncio.sleep(self.delay)
+        except asyncio.CancelledError:
+            self.cancelled += 1
+            raise
+        if self.fail:
+            raise ProviderError(f"{self.name} failed")
+        return self.name.encode()
+
+
+class TestHedgedImageProvider(unittest.TestCase):
+
+    def setUp(self):
+        metrics.reset()
+
+    def test_fast_primary_never_hedges(self):
+        secondary = _Stub("gemini", 0.01)
+        hedged = HedgedImageProvider(_Stub("nebius", 0.01), secondary, default_delay_s=0.5)
+        self.assertEqual(hedged.generate("p"), b"nebius")
+        self.assertEqual(metrics.count("image.hedge.fired"), 0)
+        self.assertEqual(hedged.name, "nebius")
+
+    def test_slow_primary_is_hedged_and_cancelled(self):
+        primary = _Stub("nebius", 2.0)
+        hedged = HedgedImageProvider(primary, _Stub("gemini", 0.05), default_delay_s=0.05)
+        start = time.monotonic()
+        self.assertEqual(hedged.generate("p"), b"gemini")
+        self.assertLess(time.monotonic() - start, 0.5)
+        self.assertEqual(primary.cancelled, 1)
+        self.assertEqual(metrics.count("image.hedge.fired"), 1)
+        self.assertEqual(metrics.count("image.hedge.won", provider="gemini"), 1)
+
+    def test_primary_failure_fails_over_and_both_failing_raises(self):
+        hedged = HedgedImageProvider(_Stub("nebius", 0.01, fail=True), _Stub("gemini", 0.01), default_delay_s=5)
+        self.assertEqual(hedged.generate("p"), b"gemini")
+        self.assertEqual(metrics.count("image.hedge.failover"), 1)
+        broken = HedgedImageProvider(_Stub("nebius", 0.01, fail=True), _Stub("gemini", 0.01, fail=True))
+        with self.assertRaises(ProviderError):
+            broken.generate("p")
+
+    def test_delay_adapts_to_primary_latency_percentile(self):
+        hedged = HedgedImageProvider(_Stub("nebius", 0), _Stub("gemini", 0), percentile=90,
+                                     default_delay_s=8, min_delay_s=0.5, min_samples=5)
+        self.assertEqual(hedged.hedge_delay(), 8)
+        for s in (1.0, 2.0, 3.0, 4.0, 5.0, 6.0, 7.0, 8.0, 9.0, 10.0):
+            metrics.observe("image.latency_s", s, provider="nebius")
+        self.assertEqual(hedged.hedge_delay(), 9.0)
+        metrics.reset()
+        for _ in range(5):
+            metrics.observe("image.latency_s", 0.1, provider="nebius")
+        self.assertEqual(hedged.hedge_delay(), 0.5)
+
+    def test_caller_timeout_cancels_both(self):
+        primary, secondary = _Stub("nebius", 5), _Stub("gemini", 5)
+        hedged = HedgedImageProvider(primary, secondary, default_delay_s=0.01)
+
+        async def run():
+            with self.assertRaises(asyncio.TimeoutError):
+                await asyncio.wait_for(hedged.agenerate("p"), timeout=0.1)
+
+        asyncio.run(run())
+        self.assertEqual((primary.cancelled, secondary.cancelled), (1, 1))
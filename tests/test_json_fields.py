@@ -0,0 +1,41 @@
+import json
+import unittest
+
+from app.parser.json_fields import JSONFieldExtractor
+
+POST = {
+    "category": "economy",
+    "image_generation_prompt": "₹ symbol falling through red charts, \"dramatic\" lighting, 4K",
+    "title": "Shock: EMI jumps ₹2,400/month",
+    "meta": {"title": "nested, ignored"},
+    "tags": ["#a", "#b"],
+    "score": 7,
+    "pov": "Line one\nLine two",
+}
+
+
+class TestJSONFieldExtractor(unittest.TestCase):
+
+    def test_fields_complete_in_order_for_any_chunking(self):
+        text = "```json\n" + json.dumps(POST, ensure_ascii=False) + "\n```"
+        for size in (1, 3, 16, len(text)):
+            ex = JSONFieldExtractor()
+            seen = []
+            for i in range(0, len(text), size):
+                seen.extend(ex.feed(text[i:i + size]).keys())
+            self.assertEqual(seen, ["category", "image_generation_prompt", "title", "pov"])
+            self.assertEqual(ex.values["image_generation_prompt"], POST["image_generation_prompt"])
+            self.assertEqual(ex.values["pov"], POST["pov"])
+            self.assertEqual(ex.values["title"], POST["title"])
+
+    def test_field_available_before_object_closes(self):
+        text = json.dumps(POST, ensure_ascii=False)
+        cut = text.index('"title"')
+        ex = JSONFieldExtractor(fields=["image_generation_prompt", "category"])
+        ex.feed(text[:cut])
+        self.assertTrue(ex.has("image_generation_prompt", "category"))
+        self.assertNotIn("title", ex.values)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,162 @@
+import os
+import email
+import smtplib
+import tempfile
+import unittest
+from unittest import mock
+from email import policy
+
+from app import metrics
+from app.services.mail_transport import SMTPSession, peak_memory, spool_message
+
+
+class _FakeSMTP:
+    """Records the DATA stream; `script` lists failures for successive DATA commands."""
+
+    def __init__(self, server):
+        self.server = server
+        self.data = bytearray()
+        self.closed = False
+        self.hung_up = False
+
+    def login(self, username, password):
+        self.server.logins += 1
+
+    def ehlo_or_helo_if_needed(self):
+        pass
+
+    def mail(self, sender):
+        return 250, b"ok"
+
+    def rcpt(self, rcpt):
+        return (550, b"no such user") if rcpt.startswith("bad") else (250, b"ok")
+
+    def putcmd(self, cmd):
+        self.data.clear()
+        failure = self.server.script.pop(0) if self.server.script else None
+        if failure == "disconnect":
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        self.pending = failure
+
+    def getreply(self):
+        if self.pending == "busy":
+            self.pending = None
+            return 451, b"try again later"
+        if self.pending in ("too big", "too big, hang up"):
+            self.hung_up = self.pending == "too big, hang up"
+            self.pending = None
+            return 552, b"message exceeds size limit"
+        if not self.data:
+            return 354, b"go ahead"
+        self.server.messages.append(bytes(self.data))
+        return 250, b"queued"
+
+    def send(self, data):
+        self.data += data
+
+    def rset(self):
+        if self.hung_up:
+            raise smtplib.SMTPServerDisconnected("Connection unexpectedly closed")
+        self.server.resets += 1
+
+    def quit(self):
+        self.closed = True
+
+    def close(self):
+        self.closed = True
+
+
+class _FakeServer:
+    def __init__(self, script=()):
+        self.script = list(script)
+        self.connections = []
+        self.messages = []
+        self.logins = 0
+        self.resets = 0
+
+    def connect(self):
+        self.connections.append(_FakeSMTP(self))
+        return self.connections[-1]
+
+
+class TestMailTransport(unittest.TestCase):
+
+    def setUp(self):
+        metrics.reset()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.image = os.urandom(3 * 1024 * 1024 + 7)
+        self.path = os.path.join(tmp.name, "post.jpg")
+        with open(self.path, "wb") as f:
+            f.write(self.image)
+
+    def _message(self, *attachments):
+        return spool_message("Digest – 19 Oct", "me@example.com", ["you@example.com"],
+                             "<p>.hidden dot</p>", list(attachments) or [self.path])
+
+    def test_message_streams_attachments_without_holding_them(self):
+        with mock.patch("app.services.mail_transport.EMAIL_SPOOL_MAX_MB", 1), peak_memory() as peak:
+            message = self._message(self.path, self.path, "/missing.jpg")
+        self.addCleanup(message.close)
+        raw = message.read()
+        # ~8.4 MB message; the heap only ever held the 1 MB spool buffer (copied once on rollover) and a chunk
+        self.assertGreater(len(raw), 8 * 1024 * 1024)
+        self.assertLess(peak["peak_bytes"], 3 * 1024 * 1024)
+
+        parsed = email.message_from_bytes(raw, policy=policy.default)
+        self.assertEqual(parsed["Subject"], "Digest – 19 Oct")
+        parts = list(parsed.iter_attachments())
+        self.assertEqual([p.get_filename() for p in parts], ["post.jpg", "post.jpg"])
+        self.assertEqual(parts[0].get_content_type(), "image/jpeg")
+        self.assertEqual(parts[1].get_content(), self.image)
+        self.assertIn(".hidden dot", parsed.get_body(("html",)).get_content())
+        self.assertTrue(all(len(line) <= 78 for line in raw.split(b"\r\n")))
+
+    def test_one_connection_for_retries_and_messages(self):
+        server = _FakeServer(script=[None, "busy", None])
+        with SMTPSession(retry_delay_s=0, connect=server.connect) as session, self._message() as message:
+            session.send("me@example.com", ["you@example.com", "bad@example.com"], message)
+            session.send("me@example.com", ["you@example.com"], message)
+        self.assertEqual((len(server.connections), server.logins, server.resets), (1, 1, 1))
+        self.assertEqual(len(server.messages), 2)
+        self.assertTrue(server.connections[0].closed)
+        # Terminated with <CRLF>.<CRLF>; the retry replays the same spooled bytes
+        sent = server.messages[0]
+        self.assertTrue(sent.endswith(b"\r\n.\r\n"))
+        self.assertEqual(server.messages[0], server.messages[1])
+        message.close()
+
+    def test_dropped_connection_reopened_and_retries_bounded(self):
+        server = _FakeServer(script=["disconnect", None])
+        with SMTPSession(retry_delay_s=0, connect=server.connect) as session, self._message() as message:
+            session.send("me@example.com", ["you@example.com"], message)
+        self.assertEqual(len(server.connections), 2)
+        self.assertEqual(metrics.count("email.connections"), 2)
+
+        server = _FakeServer(script=["busy"] * 3)
+        with SMTPSession(retries=3, retry_delay_s=0, connect=server.connect) as session, self._message() as message:
+            with self.assertRaises(smtplib.SMTPDataError):
+                session.send("me@example.com", ["you@example.com"], message)
+            with self.assertRaises(smtplib.SMTPRecipientsRefused):
+                session.send("me@example.com", ["bad@example.com"], message)
+            # Permanent rejection: one attempt only, connection kept
+            server.script = ["too big", None]
+            with self.assertRaises(smtplib.SMTPDataError):
+                session.send("me@example.com", ["you@example.com"], message)
+            self.assertEqual(server.script, [None])
+        self.assertEqual(len(server.connections), 1)
+
+    def test_permanent_error_then_hang_up_keeps_the_error(self):
+        server = _FakeServer(script=["too big, hang up", None])
+        with SMTPSession(retry_delay_s=0, connect=server.connect) as session, self._message() as message:
+            with self.assertRaises(smtplib.SMTPDataError) as ctx:
+                session.send("me@example.com", ["you@example.com"], message)
+            self.assertEqual(ctx.exception.smtp_code, 552)
+            # The dead connection was dropped; the next message gets a fresh one
+            session.send("me@example.com", ["you@example.com"], message)
+        self.assertEqual(len(server.connections), 2)
+        self.assertEqual(len(server.messages), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
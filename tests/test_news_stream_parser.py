@@ -0,0 +1,60 @@
+import unittest
+
+from app.parser.news_parser import NewsStreamParser, iter_news_items, parse_news_content
+
+DIGEST = """
+---
+📰 RBI holds repo rate at 6.5% 🏦
+🤖 theaipoint: EMIs stay flat for now; inflation still above target.
+#️⃣ Hashtags:
+- #RBI #RepoRate #EMI #Inflation
+📌 Source: Verified from NDTV (LLM model: GPT-4)
+---
+📰 India beat Australia in Perth 🏏
+🤖 theaipoint: First win at Perth since 2008 reshapes the series.
+#️⃣ Hashtags:
+- #INDvAUS #TeamIndia #Cricket #Perth
+📌 Source: Verified from Cricbuzz (LLM model: GPT-4)
+---
+📰 ISRO schedules Gaganyaan test flight 🚀
+🤖 theaipoint: Uncrewed test clears the way for 2026 crewed mission.
+#️⃣ Hashtags:
+- #ISRO #Gaganyaan #Space #India
+📌 Source: Verified from India Today (LLM model: GPT-4)
+"""
+
+
+def _chunks(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class TestNewsStreamParser(unittest.TestCase):
+
+    def test_matches_batch_parser_for_any_chunking(self):
+        expected = parse_news_content(DIGEST)
+        self.assertEqual(len(expected), 3)
+        for size in (1, 2, 3, 7, 64, len(DIGEST)):
+            self.assertEqual(list(iter_news_items(_chunks(DIGEST, size))), expected, size)
+
+    def test_item_emitted_when_closing_separator_arrives(self):
+        parser = NewsStreamParser()
+        first, rest = DIGEST.split("📰 India beat", 1)
+        # Item 1 is complete once the second '---' has streamed in
+        items = parser.feed(first)
+        self.assertEqual(len(items), 1)
+        self.assertTrue(items[0]["title"].startswith("RBI holds repo rate"))
+        # Last item has no trailing separator; only close() flushes it
+        self.assertEqual(len(parser.feed("📰 India beat" + rest)), 1)
+        self.assertEqual(len(parser.close()), 1)
+
+    def test_separator_split_across_chunks(self):
+        parser = NewsStreamParser()
+        self.assertEqual(parser.feed("📰 One\n🤖 a\n-"), [])
+        self.assertEqual(parser.feed("-"), [])
+        items = parser.feed("-\n📰 Two")
+        self.assertEqual([i["title"] for i in items], ["One"])
+        self.assertEqual([i["title"] for i in parser.close()], ["Two"])
+
+
+if __name__ == '__main__':
+    unittest.main()
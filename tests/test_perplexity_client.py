@@ -0,0 +1,186 @@
+import json
+import asyncio
+import threading
+import unittest
+from unittest import mock
+
+import httpx
+
+from app.services import perplexity_client, perplexity_service
+from app.services.perplexity_client import AsyncPerplexityClient, CircuitBreaker, CircuitOpenError
+
+
+def _run(coro):
+    return asyncio.run(coro)
+
+
+class TestAsyncPerplexityClient(unittest.TestCase):
+
+    def _client(self, handler, **kwargs):
+        kwargs.setdefault("breaker", CircuitBreaker(threshold=3, cooldown_s=60))
+        return AsyncPerplexityClient(api_key="test", transport=httpx.MockTransport(handler), **kwargs)
+
+    def test_honors_retry_after(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            if len(calls) == 1:
+                return httpx.Response(429, headers={"Retry-After": "2"})
+            return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+        sleeps = []
+
+        async def fake_sleep(s):
+            sleeps.append(s)
+
+        async def go():
+            async with self._client(handler) as pplx:
+                return await pplx.chat("hi")
+
+        with mock.patch("asyncio.sleep", fake_sleep):
+            data = _run(go())
+        self.assertEqual(data["choices"][0]["message"]["content"], "ok")
+        self.assertEqual(sleeps, [2.0])
+
+    def test_gives_up_when_retry_after_exceeds_deadline(self):
+        def handler(request):
+            return httpx.Response(503, headers={"Retry-After": "30"})
+
+        async def go():
+            async with self._client(handler, deadline_s=5) as pplx:
+                return await pplx.chat("hi")
+
+        with self.assertRaises(httpx.HTTPStatusError):
+            _run(go())
+
+    def test_circuit_opens_after_repeated_5xx(self):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(500)
+
+        breaker = CircuitBreaker(threshold=2, cooldown_s=60)
+
+        async def noop_sleep(s):
+            pass
+
+        async def go():
+            async with self._client(handler, breaker=breaker, max_attempts=5) as pplx:
+                return await pplx.chat("hi")
+
+        with mock.patch("asyncio.sleep", noop_sleep):
+            with self.assertRaises(CircuitOpenError):
+                _run(go())
+            self.assertEqual(len(calls), 2)
+            with self.assertRaises(CircuitOpenError):
+                _run(go())
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(breaker.state, "open")
+
+    def test_half_open_lets_one_trial_through(self):
+        calls = []
+        release = asyncio.Event()
+
+        async def handler(request):
+            calls.append(request)
+            await release.wait()
+            return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+        breaker = CircuitBreaker(threshold=1, cooldown_s=60)
+        breaker.record_failure()
+        breaker.opened_at -= 61  # cooldown over: half-open
+
+        async def go():
+            async with self._client(handler, breaker=breaker) as pplx:
+                trial = asyncio.ensure_future(pplx.chat("trial"))
+                while not calls:
+                    await asyncio.sleep(0)
+                with self.assertRaises(CircuitOpenError):
+                    await pplx.chat("second")
+                release.set()
+                await trial
+                # Trial succeeded: closed again, everyone goes through
+                await pplx.chat("third")
+
+        _run(go())
+        self.assertEqual(len(calls), 2)
+        self.assertEqual(breaker.state, "closed")
+        self.assertFalse(breaker.trial_in_flight)
+
+    def test_stream_chat_yields_sse_deltas(self):
+        sse = (
+            'data: {"choices":[{"delta":{"content":"---\\n📰 "}}]}\n\n'
+            'data: {"choices":[{"delta":{"content":"Hello"}}]}\n\n'
+            ': keep-alive\n\n'
+            'data: [DONE]\n\n'
+        )
+
+        def handler(request):
+            return httpx.Response(200, content=sse.encode(), headers={"Content-Type": "text/event-stream"})
+
+        async def go():
+            async with self._client(handler) as pplx:
+                return [d async for d in pplx.stream_chat("hi")]
+
+        self.assertEqual(_run(go()), ["---\n📰 ", "Hello"])
+
+
+class TestSharedClient(unittest.TestCase):
+
+    def test_calls_reuse_one_client_on_one_loop(self):
+        loops = []
+
+        async def handler(request):
+            loops.append(asyncio.get_running_loop())
+            return httpx.Response(200, json={"choices": [{"message": {"content": "ok"}}]})
+
+        client = AsyncPerplexityClient(api_key="test", transport=httpx.MockTransport(handler),
+                                       breaker=CircuitBreaker(threshold=3, cooldown_s=60))
+        with mock.patch.object(perplexity_client, "_client", client), \
+                mock.patch.object(perplexity_service, "PPLX_API_KEY", "test"), \
+                mock.patch.object(AsyncPerplexityClient, "aclose") as aclose:
+            perplexity_service.call_perplexity("one")
+            perplexity_service.call_perplexity("two")
+            # From another event loop, the call still runs on the client's loop
+            data = _run(perplexity_service.acall_perplexity("three"))
+        self.assertEqual(data["choices"][0]["message"]["content"], "ok")
+        self.assertEqual(loops, [perplexity_client.get_perplexity_loop()] * 3)
+        aclose.assert_not_called()
+
+    def test_stream_yields_items_before_the_digest_ends(self):
+        first = "---\n📰 RBI holds repo rate 🏦\n🤖 theaipoint: EMIs stay flat.\n📌 Source: NDTV\n---\n"
+        second = "📰 ISRO schedules test flight 🚀\n🤖 theaipoint: Uncrewed test first.\n📌 Source: ISRO\n"
+        consumed = threading.Event()
+
+        def sse(text):
+            return f"data: {json.dumps({'choices': [{'delta': {'content': text}}]})}\n\n".encode()
+
+        async def body():
+            yield sse(first)
+            while not consumed.is_set():  # the second item waits until the first was consumed
+                await asyncio.sleep(0.01)
+            yield sse(second)
+            yield b"data: [DONE]\n\n"
+
+        def handler(request):
+            return httpx.Response(200, content=body(), headers={"Content-Type": "text/event-stream"})
+
+        client = AsyncPerplexityClient(api_key="test", transport=httpx.MockTransport(handler),
+                                       breaker=CircuitBreaker(threshold=3, cooldown_s=60))
+        with mock.patch.object(perplexity_client, "_client", client), \
+                mock.patch.object(perplexity_service, "PPLX_API_KEY", "test"):
+            items = perplexity_service.call_perplexity("digest", stream=True)
+            self.assertIn("RBI", next(items)["title"])
+            consumed.set()
+            self.assertEqual([i["title"] for i in items], ["ISRO schedules test flight 🚀"])
+
+            async def consume():
+                return [i["title"] async for i in await perplexity_service.acall_perplexity("digest", stream=True)]
+
+            self.assertEqual(len(_run(consume())), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
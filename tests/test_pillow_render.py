@@ -0,0 +1,136 @@
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+from PIL import Image
+
+from app import pillow_render
+from app.generate_image import THEMES, make_post_image, make_post_images, make_post_variants
+from app.render_profiles import RenderProfile
+
+
+def _context(category: str = "tech", title: str = "Chip exports rise 40% as new fabs come online", **extra):
+    buf = io.BytesIO()
+    Image.new("RGB", (200, 250), (200, 180, 40)).save(buf, "JPEG")
+    theme = THEMES[category]
+    context = dict(
+        title=title,
+        pov="Supply is finally catching up with demand, which should ease prices by next year.",
+        background_image=buf.getvalue(),
+        category=category,
+        category_title=theme["title"],
+        cta_text="Read more",
+        headline_size="h-md",
+        icon=theme["icon"],
+        theme=theme,
+    )
+    context.update(extra)
+    return context
+
+
+class TestPillowRender(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self.tmp.cleanup)
+
+    def _render(self, context, scale=0.5) -> Image.Image:
+        path = os.path.join(self.tmp.name, "post.jpg")
+        pillow_render.render_post(context, path, scale=scale)
+        return Image.open(path)
+
+    def test_output_size_follows_scale(self):
+        self.assertEqual(self._render(_context(), scale=0.5).size, (540, 675))
+        self.assertEqual(self._render(_context(), scale=1).size, (1080, 1350))
+
+    def test_overlay_darkens_background(self):
+        img = self._render(_context()).convert("RGB")
+        # Middle of an empty band (no text): brightness/contrast + ~.4 black overlay
+        r, g, b = img.getpixel((270, 560))
+        self.assertLess(r, 150)
+        self.assertGreater(r, b)
+
+    def test_wrap_respects_width(self):
+        text = pillow_render._Text("Montserrat", 900, 62, 1.0, letter_spacing=-1.5)
+        lines = text.wrap("Parliament passes sweeping data protection amendments after a marathon debate", 600)
+        self.assertGreater(len(lines), 1)
+        self.assertTrue(all(text.width(line) <= 600 for line in lines))
+        self.assertEqual(" ".join(lines), "Parliament passes sweeping data protection amendments after a marathon debate")
+
+    def test_wrap_splits_overlong_word(self):
+        text = pillow_render._Text("Inter", 700, 28, 1.0)
+        lines = text.wrap("x" * 200, 300)
+        self.assertGreater(len(lines), 1)
+        self.assertEqual("".join(lines), "x" * 200)
+
+    def test_emoji_without_emoji_font_is_skipped(self):
+        with mock.patch("app.pillow_render._emoji_font", return_value=None):
+            pillow_render._emoji_image.cache_clear()
+            self.addCleanup(pillow_render._emoji_image.cache_clear)
+            text = pillow_render._Text("Inter", 700, 28, 1.0)
+            self.assertEqual(text.width("AI 🚀"), text.width("AI "))
+            self._render(_context(title="Launch day 🚀🌍 for the new rocket"))
+
+    def test_aspect_variants(self):
+        images = pillow_render.draw_posts(_context(), 0.5, ["feed", "story", "square"])
+        self.assertEqual({k: v.size for k, v in images.items()},
+                         {"feed": (540, 675), "story": (540, 960), "square": (540, 540)})
+        # Story content starts below the top safe area: header row is empty there
+        story = images["story"].convert("L")
+        self.assertLess(max(story.crop((24, 24, 200, 60)).getdata()), 120)
+        self.assertGreater(max(story.crop((24, 124, 200, 160)).getdata()), 200)
+        with self.assertRaises(ValueError):
+            pillow_render.draw_posts(_context(), 0.5, ["banner"])
+
+    def test_breaking_badge_only_for_breaking(self):
+        # Badge area: right side of the header row
+        box = (430, 20, 516, 50)
+        plain = self._render(_context("tech")).convert("RGB").crop(box)
+        breaking = self._render(_context("breaking")).convert("RGB").crop(box)
+        red = lambda img: sum(1 for r, g, b in img.getdata() if r > 180 and g < 90)
+        self.assertEqual(red(plain), 0)
+        self.assertGreater(red(breaking), 100)
+
+
+class TestEngineSelection(unittest.TestCase):
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.out = tmp.name
+        patcher = mock.patch("app.render_cache.get_render_cache", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _build(self, *args, **kwargs):
+        import pathlib
+        return _context(), pathlib.Path(self.out) / f"{kwargs.get('title', args[0] if args else 'post')[:10]}.jpg"
+
+    def test_pillow_engine_skips_browser(self):
+        with mock.patch("app.generate_image.build_post_context", side_effect=self._build), \
+                mock.patch("app.generate_image.get_render_service") as service:
+            tiny = RenderProfile("tiny", scale=0.25, format="png")
+            path = make_post_image("Headline", "pov", engine="pillow", profile=tiny)
+            paths = make_post_images([{"title": "Same", "pov": "a"}, {"title": "Same", "pov": "b"}], engine="pillow", profile=tiny)
+        service.assert_not_called()
+        self.assertTrue(path.endswith(".png"))
+        self.assertEqual(Image.open(path).size, (270, 338))
+        self.assertEqual(len(set(paths)), 2)
+        self.assertTrue(all(os.path.exists(p) for p in paths))
+
+    def test_variants_named_per_aspect(self):
+        with mock.patch("app.generate_image.build_post_context", side_effect=self._build):
+            paths = make_post_variants("Headline", "pov", engine="pillow", profile=RenderProfile("tiny", scale=0.25))
+        self.assertEqual(set(paths), {"feed", "story", "square"})
+        self.assertTrue(paths["story"].endswith("Headline-story.jpg"))
+        self.assertEqual(Image.open(paths["square"]).size, (270, 270))
+
+    def test_unknown_engine_rejected(self):
+        with self.assertRaises(ValueError):
+            make_post_image("Headline", "pov", engine="webkit")
+
+
+if __name__ == "__main__":
+    unittest.main()
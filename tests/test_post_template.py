@@ -0,0 +1,37 @@
+import unittest
+
+from app.generate_image import THEMES, get_post_template, render_post_html, theme_css
+
+
+def _context(category: str = "tech", title: str = "Chip exports rise 40%"):
+    theme = THEMES[category]
+    return dict(
+        title=title, pov="pov", background_url="https://assets.render.invalid/bg/abc.jpg",
+        model_name="m", timestamp_ist="t", category=category, category_title=theme["title"],
+        cta_text="Read more", headline_size="h-md", icon=theme["icon"], theme=theme,
+    )
+
+
+class TestPostTemplate(unittest.TestCase):
+
+    def test_compiled_once(self):
+        self.assertIs(get_post_template(), get_post_template())
+        self.assertIs(theme_css("sports"), theme_css("sports"))
+
+    def test_theme_variables_per_category(self):
+        for category in ("breaking", "tech"):
+            html = render_post_html(_context(category))
+            self.assertIn(f"--brand: {THEMES[category]['brand']};", html)
+            self.assertIn(f"--accentDark: {THEMES[category]['accentDark']};", html)
+        self.assertEqual(theme_css("unknown"), theme_css("default"))
+
+    def test_text_escaped_markup_kept(self):
+        html = render_post_html(_context(title="AT&T <b>deal</b>"))
+        self.assertIn("AT&amp;T &lt;b&gt;deal&lt;/b&gt;", html)
+        self.assertIn('url("https://assets.render.invalid/bg/abc.jpg")', html)
+        self.assertNotIn("&lt;style", html)
+        self.assertNotIn("&lt;link", html)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import os
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+from app import generate_image, metrics
+from app.disk_cache import DiskLRUCache
+from app.render_profiles import RenderProfile
+
+TINY = RenderProfile("tiny", scale=0.25)
+
+
+class TestRenderCache(unittest.TestCase):
+
+    def setUp(self):
+        metrics.reset()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.out = pathlib.Path(tmp.name)
+        self.cache = DiskLRUCache(os.path.join(tmp.name, "cache"), 10 * 1024 * 1024, name="render_cache", suffix=".img")
+        patchers = [
+            mock.patch("app.render_cache.get_render_cache", return_value=self.cache),
+            mock.patch.object(generate_image, "OUTPUT_DIR", self.out),
+            mock.patch.object(generate_image, "_render_with_pillow", wraps=generate_image._render_with_pillow),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _post(self, title="Chip exports rise 40%", background_image=b"bg"):
+        return dict(title=title, pov="pov", category="tech", background_image=background_image)
+
+    def test_hit_skips_render_and_restores_bytes(self):
+        first = generate_image.make_post_variants(**self._post(), aspects=["feed", "story"], engine="pillow", profile=TINY)
+        rendered = {a: open(p, "rb").read() for a, p in first.items()}
+        for path in first.values():
+            os.remove(path)
+
+        second = generate_image.make_post_variants(**self._post(), aspects=["feed", "story"], engine="pillow", profile=TINY)
+        self.assertEqual(second, first)
+        self.assertEqual({a: open(p, "rb").read() for a, p in second.items()}, rendered)
+        self.assertEqual(generate_image._render_with_pillow.call_count, 1)
+        self.assertEqual(metrics.count("render_cache.posts_restored"), 1)
+
+    def test_changed_content_or_profile_misses(self):
+        generate_image.make_post_image(**self._post(), engine="pillow", profile=TINY)
+        generate_image.make_post_image(**self._post("Chip exports fall 40%"), engine="pillow", profile=TINY)
+        generate_image.make_post_image(**self._post(background_image=b"other"), engine="pillow", profile=TINY)
+        generate_image.make_post_image(**self._post(), engine="pillow", profile=RenderProfile("tiny", scale=0.25, quality=80))
+        self.assertEqual(generate_image._render_with_pillow.call_count, 4)
+        # A variant that was never rendered is a miss for the whole post
+        generate_image.make_post_variants(**self._post(), aspects=["feed", "square"], engine="pillow", profile=TINY)
+        self.assertEqual(generate_image._render_with_pillow.call_count, 5)
+
+    def test_batch_renders_only_misses_without_browser(self):
+        service = mock.Mock()
+
+        def render_many(jobs, concurrency, profile):
+            for _, outputs, _ in jobs:
+                for path in outputs.values():
+                    pathlib.Path(path).write_bytes(b"\xff\xd8 rendered")
+            return [None] * len(jobs)
+        service.render_many.side_effect = render_many
+
+        with mock.patch.object(generate_image, "get_render_service", return_value=service):
+            first = generate_image.make_post_images([self._post("One"), self._post("Two")], engine="chromium", profile=TINY)
+            service.render_many.reset_mock()
+            second = generate_image.make_post_images([self._post("One"), self._post("Two")], engine="chromium", profile=TINY)
+            service.render_many.assert_not_called()
+            third = generate_image.make_post_images([self._post("One"), self._post("Three")], engine="chromium", profile=TINY)
+        self.assertEqual(second, first)
+        self.assertEqual(len(service.render_many.call_args[0][0]), 1)
+        self.assertTrue(third[1].endswith("three-tech.jpg"))
+
+    def test_key_covers_only_rendered_fields(self):
+        context = dict(title="t", theme={}, timestamp_ist="19 Oct 2026")
+        key = generate_image.render_cache.render_key("v", "pillow", context, TINY, "feed")
+        # Fields the post does not show never split the cache
+        self.assertEqual(key, generate_image.render_cache.render_key("v", "pillow", dict(context, timestamp_ist="20 Oct 2026"), TINY, "feed"))
+        self.assertEqual(key, generate_image.render_cache.render_key("v", "pillow", dict(context, model_name="x"), TINY, "feed"))
+        self.assertNotEqual(key, generate_image.render_cache.render_key("v", "pillow", dict(context, title="u"), TINY, "feed"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import os
+import glob
+import time
+import signal
+import pathlib
+import tempfile
+import unittest
+
+from app import metrics
+from app.render_farm import RenderFarm
+
+
+class _FakeService:
+    """Stands in for RenderService inside a worker process; behaviour keyed by the HTML."""
+
+    def render(self, html_content, outputs, assets=None, profile=None):
+        if "crash" in html_content:
+            os._exit(3)
+        if "freeze" in html_content:
+            os.kill(os.getpid(), signal.SIGSTOP)
+        if "hang" in html_content:
+            time.sleep(60)
+        if "boom" in html_content:
+            raise ValueError("bad layout")
+        time.sleep(0.1)
+        background = (assets or {}).get("bg", b"")
+        return {aspect: f"{aspect}:{html_content}:{os.getpid()}:".encode() + background for aspect in outputs}
+
+    def close(self):
+        pass
+
+
+def _fake_service():
+    return _FakeService()
+
+
+def _blocks():
+    return set(glob.glob("/dev/shm/psm_*"))
+
+
+class TestRenderFarm(unittest.TestCase):
+
+    def setUp(self):
+        metrics.reset()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.out = tmp.name
+
+    def _farm(self, **kwargs):
+        farm = RenderFarm(**{"workers": 2, "timeout_s": 5, "heartbeat_s": 0.2, "service_factory": _fake_service, **kwargs})
+        self.addCleanup(farm.close)
+        return farm
+
+    def _path(self, name):
+        return os.path.join(self.out, name)
+
+    def test_jobs_spread_over_workers_and_returned_via_shared_memory(self):
+        farm = self._farm()
+        before = _blocks()
+        jobs = [(f"<p>{i}</p>", self._path(f"{i}.jpg"), {"bg": b"BG"}) for i in range(3)]
+        jobs.append(("<p>v</p>", {"feed": self._path("v.jpg"), "story": self._path("v-story.jpg")}))
+        self.assertEqual(farm.render_many(jobs), [None] * 4)
+
+        with open(self._path("1.jpg"), "rb") as f:
+            data = f.read()
+        self.assertTrue(data.startswith(b"feed:<p>1</p>:") and data.endswith(b"BG"))
+        with open(self._path("v-story.jpg"), "rb") as f:
+            self.assertTrue(f.read().startswith(b"story:<p>v</p>:"))
+        pids = {pathlib.Path(self._path(f"{i}.jpg")).read_bytes().split(b":")[2] for i in range(3)}
+        self.assertEqual(len(pids), 2)
+        self.assertEqual(_blocks() - before, set())  # every block unlinked
+
+        images = farm.render("<p>one</p>", None)
+        self.assertEqual(set(images), {"feed"})
+
+    def test_crash_fails_only_that_job_and_restarts_worker(self):
+        farm = self._farm()
+        jobs = [("<p>ok</p>", self._path("a.jpg")), ("<p>crash</p>", self._path("b.jpg")),
+                ("<p>boom</p>", self._path("c.jpg")), ("<p>ok</p>", self._path("d.jpg"))]
+        errors = farm.render_many(jobs)
+        self.assertIsNone(errors[0])
+        self.assertIsInstance(errors[1], RuntimeError)
+        self.assertIsInstance(errors[2], ValueError)
+        self.assertIsNone(errors[3])
+        self.assertEqual(metrics.count("render_farm.restarts", reason="exited"), 1)
+        self.assertEqual(farm.render_many([("<p>ok</p>", self._path(f"e{i}.jpg")) for i in range(2)]), [None, None])
+        self.assertEqual(sum(w.process.is_alive() for w in farm._pool.values()), 2)
+
+    def test_hung_and_unresponsive_workers_replaced(self):
+        farm = self._farm(timeout_s=0.5, grace_s=0, heartbeat_s=0.1)
+        started = time.monotonic()
+        errors = farm.render_many([("<p>hang</p>", self._path("h.jpg")), ("<p>freeze</p>", self._path("f.jpg")),
+                                   ("<p>ok</p>", self._path("ok.jpg"))])
+        self.assertLess(time.monotonic() - started, 10)
+        self.assertIsInstance(errors[0], TimeoutError)
+        self.assertIsInstance(errors[1], RuntimeError)
+        self.assertIsNone(errors[2])
+        self.assertEqual(metrics.count("render_farm.restarts", reason="timed"), 1)
+        self.assertEqual(metrics.count("render_farm.restarts", reason="stopped"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,54 @@
+import io
+import random
+import unittest
+
+from PIL import Image
+
+from app.render_profiles import PROFILES, RenderProfile, _encode, encode_image, get_profile
+
+
+def _noisy(size=(160, 200)) -> Image.Image:
+    rng = random.Random(7)
+    return Image.frombytes("RGB", size, bytes(rng.randrange(256) for _ in range(size[0] * size[1] * 3)))
+
+
+class TestRenderProfiles(unittest.TestCase):
+
+    def test_get_profile(self):
+        self.assertIs(get_profile("print"), PROFILES["print"])
+        self.assertIs(get_profile("SOCIAL"), PROFILES["social"])
+        custom = RenderProfile("custom", scale=2)
+        self.assertIs(get_profile(custom), custom)
+        self.assertIn(get_profile(None), PROFILES.values())
+        with self.assertRaises(ValueError):
+            get_profile("poster")
+
+    def test_under_budget_keeps_profile_quality(self):
+        img = Image.new("RGB", (100, 100), (10, 20, 30))
+        data, quality = encode_image(img, RenderProfile("p", quality=90, max_bytes=100_000))
+        self.assertEqual(quality, 90)
+        self.assertEqual(Image.open(io.BytesIO(data)).format, "JPEG")
+
+    def test_budget_picks_highest_quality_that_fits(self):
+        img = _noisy()
+        sizes = {q: len(_encode(img, "jpeg", q)) for q in range(50, 96)}
+        budget = (sizes[70] + sizes[71]) // 2
+        expected = max(q for q, n in sizes.items() if n <= budget)
+        data, quality = encode_image(img, RenderProfile("p", quality=95, min_quality=50, max_bytes=budget))
+        self.assertEqual(quality, expected)
+        self.assertLessEqual(len(data), budget)
+
+    def test_impossible_budget_falls_back_to_min_quality(self):
+        data, quality = encode_image(_noisy(), RenderProfile("p", quality=90, min_quality=60, max_bytes=100))
+        self.assertEqual(quality, 60)
+        self.assertGreater(len(data), 100)
+
+    def test_png_is_lossless(self):
+        img = _noisy((40, 40))
+        data, quality = encode_image(img, RenderProfile("p", format="png"))
+        self.assertIsNone(quality)
+        self.assertEqual(Image.open(io.BytesIO(data)).convert("RGB").tobytes(), img.tobytes())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,108 @@
+import os
+import socket
+import pathlib
+import tempfile
+import unittest
+from unittest import mock
+
+from app import generate_image, metrics, render_server
+from app.render_client import RenderClient, decode_request, encode_request
+from app.render_profiles import get_profile
+
+
+class _FakeService:
+    def __init__(self, fail=False):
+        self.fail = fail
+        self.calls = []
+
+    def render(self, html_content, outputs, assets=None, profile=None):
+        self.calls.append((html_content, dict(outputs), assets, profile))
+        if self.fail:
+            raise RuntimeError("Target page crashed")
+        return {aspect: f"{aspect}@{profile.name}".encode() for aspect in outputs}
+
+    def render_many(self, jobs, concurrency=None, profile=None):
+        for html_content, outputs, assets in jobs:
+            self.render(html_content, outputs, assets, profile)
+        return [None] * len(jobs)
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class TestRenderServer(unittest.TestCase):
+
+    def setUp(self):
+        metrics.reset()
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.out = tmp.name
+        self.remote = _FakeService()
+        self.local = _FakeService()
+        patchers = [
+            mock.patch.object(render_server, "get_render_service", side_effect=lambda: self.remote),
+            mock.patch.object(generate_image, "get_render_service", side_effect=lambda: self.local),
+            mock.patch.object(generate_image, "OUTPUT_DIR", pathlib.Path(self.out)),
+            mock.patch("app.render_cache.get_render_cache", return_value=None),
+        ]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.server = render_server.serve(port=0, warm=False)
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+        host, port = self.server.server_address
+        self.client = RenderClient(f"http://{host}:{port}", timeout_s=5)
+
+    def _use(self, client):
+        patcher = mock.patch.object(generate_image, "get_render_client", return_value=client)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_request_round_trip(self):
+        context, _ = generate_image.build_post_context("Title", "pov", category="tech", background_image=b"\x89PNG\r\n\x1a\nxx")
+        decoded, aspects, profile = decode_request(encode_request(context, ["feed", "story"], get_profile("preview")))
+        self.assertEqual(decoded, context)
+        self.assertEqual((aspects, profile), (["feed", "story"], get_profile("preview")))
+
+    def test_posts_rendered_on_server_with_its_template(self):
+        self._use(self.client)
+        self.assertTrue(self.client.available())
+        paths = generate_image.make_post_variants("Server headline", "pov", category="tech", background_image=b"BG",
+                                                  aspects=["feed", "story"], profile="preview")
+        with open(paths["story"], "rb") as f:
+            self.assertEqual(f.read(), b"story@preview")
+        self.assertEqual(self.local.calls, [])
+        html_content, outputs, assets, _ = self.remote.calls[0]
+        self.assertIn("Server headline", html_content)
+        self.assertEqual(list(assets.values()), [b"BG"])
+        self.assertEqual(outputs, {"feed": None, "story": None})
+
+        results = generate_image.make_post_images([{"title": f"Post {i}", "pov": "p", "category": "tech"} for i in range(3)])
+        self.assertTrue(all(r and os.path.exists(r) for r in results))
+        self.assertEqual(len(self.remote.calls), 4)
+        self.assertEqual(metrics.count("render_server.posts"), 4)
+
+    def test_falls_back_in_process_when_unreachable_or_failing(self):
+        down = RenderClient(f"http://127.0.0.1:{_free_port()}", timeout_s=5)
+        self._use(down)
+        generate_image.make_post_image("One", "pov", category="tech")
+        generate_image.make_post_image("Two", "pov", category="tech")
+        self.assertEqual(len(self.local.calls), 2)
+        # Marked down after the first failure: the second post did not try again
+        self.assertEqual(metrics.count("render_server.fallbacks", reason="unreachable"), 1)
+        self.assertIsNotNone(generate_image.make_post_images([{"title": "Three", "pov": "p"}])[0])
+        self.assertEqual(len(self.local.calls), 3)
+
+        self._use(self.client)
+        self.remote.fail = True
+        generate_image.make_post_image("Four", "pov", category="tech")
+        self.assertEqual(len(self.local.calls), 4)
+        self.assertEqual(metrics.count("render_server.fallbacks", reason="error"), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
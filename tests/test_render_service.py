@@ -0,0 +1,250 @@
+import io
+import re
+import time
+import asyncio
+import unittest
+from unittest import mock
+
+from app import metrics
+from app.render_service import ASSET_ORIGIN, RenderService, asset_url
+
+
+class _FakeRoute:
+    def __init__(self, url):
+        self.request = mock.Mock(url=url)
+        self.response = None
+
+    async def fulfill(self, status, body, headers):
+        self.response = (status, body, headers["Content-Type"])
+
+    async def abort(self):
+        self.response = "aborted"
+
+
+class _FakePage:
+    def __init__(self, browser):
+        self.browser = browser
+        self.closed = False
+        self.handlers = {}
+        self.routes = {}
+        self.served = []
+        self.loads = 0
+        self.viewports = []
+        self.aspects = []
+
+    def on(self, event, handler):
+        self.handlers[event] = handler
+
+    def is_closed(self):
+        return self.closed
+
+    async def route(self, pattern, handler):
+        self.routes[pattern] = handler
+
+    async def set_viewport_size(self, size):
+        self.viewports.append((size["width"], size["height"]))
+
+    async def set_content(self, html, wait_until=None):
+        self.loads += 1
+        # Like Chromium: request every asset URL the HTML references
+        for url in re.findall(re.escape(ASSET_ORIGIN) + r"/[^\"')]+", html):
+            route = _FakeRoute(url)
+            await self.routes[ASSET_ORIGIN + "/**"](route)
+            self.served.append(route.response)
+        if "crash" in html:
+            self.handlers["crash"](self)
+        if "boom" in html:
+            raise RuntimeError("Target page crashed")
+
+    async def evaluate(self, script, arg=None):
+        if arg is not None:  # ASPECT_JS
+            self.aspects.append(arg[0])
+            return
+        await asyncio.sleep(self.browser.render_delay)
+
+    async def screenshot(self, path=None, **kwargs):
+        self.browser.shots.append((id(self), path))
+        return self.browser.image
+
+    async def close(self):
+        self.closed = True
+
+
+class _FakeBrowser:
+    def __init__(self):
+        self.connected = True
+        self.pages = []
+        self.shots = []
+        self.render_delay = 0
+        self.image = b"\xff\xd8\xff" + b"\0" * 100
+        self.scales = []
+
+    def is_connected(self):
+        return self.connected
+
+    async def new_page(self, viewport=None, device_scale_factor=None):
+        self.scales.append(device_scale_factor)
+        page = _FakePage(self)
+        self.pages.append(page)
+        return page
+
+    async def close(self):
+        self.connected = False
+
+
+class _FakeRenderService(RenderService):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.browsers = []
+
+    async def _launch(self):
+        self.browsers.append(_FakeBrowser())
+        return self.browsers[-1]
+
+
+class TestRenderService(unittest.TestCase):
+
+    def setUp(self):
+        metrics.reset()
+        self.service = _FakeRenderService(pages=2, recycle_after=3, timeout_s=5)
+        self.addCleanup(self.service.close)
+        patcher = mock.patch("app.render_cache.get_render_cache", return_value=None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_browser_launched_once_and_pages_reused(self):
+        for i in range(4):
+            self.service.render("<p>ok</p>", f"out{i}.jpg")
+        self.assertEqual(len(self.service.browsers), 1)
+        browser = self.service.browsers[0]
+        self.assertEqual(len(browser.shots), 4)
+        self.assertLessEqual(len(browser.pages), 2)
+
+    def test_pages_recycled_after_n_renders(self):
+        service = _FakeRenderService(pages=1, recycle_after=3, timeout_s=5)
+        self.addCleanup(service.close)
+        for i in range(7):
+            service.render("<p>ok</p>", f"out{i}.jpg")
+        pages = service.browsers[0].pages
+        self.assertEqual(len(pages), 3)
+        self.assertTrue(pages[0].closed and pages[1].closed)
+        self.assertEqual(metrics.count("render.pages_recycled"), 2)
+
+    def test_crashed_page_replaced_and_error_raised(self):
+        with self.assertRaises(RuntimeError):
+            self.service.render("<p>boom</p>", "bad.jpg")
+        self.service.render("<p>crash</p>", "crashy.jpg")
+        self.service.render("<p>ok</p>", "good.jpg")
+        self.assertEqual(metrics.count("render.pages_replaced"), 2)
+        self.assertEqual(sum(not p.closed for p in self.service.browsers[0].pages), 1)
+
+    def test_dead_browser_is_relaunched(self):
+        self.service.render("<p>ok</p>", "a.jpg")
+        self.service.browsers[0].connected = False
+        self.service.render("<p>ok</p>", "b.jpg")
+        self.assertEqual(len(self.service.browsers), 2)
+        self.assertEqual(len(self.service.browsers[1].shots), 1)
+
+    def test_render_many_runs_concurrently_and_isolates_failures(self):
+        service = _FakeRenderService(pages=4, recycle_after=10, timeout_s=5)
+        self.addCleanup(service.close)
+        service.render("<p>warm</p>", "warm.jpg")
+        service.browsers[0].render_delay = 0.2
+        jobs = [("<p>ok</p>", f"p{i}.jpg") for i in range(4)] + [("<p>boom</p>", "bad.jpg")]
+        start = time.monotonic()
+        errors = service.render_many(jobs)
+        self.assertLess(time.monotonic() - start, 0.6)  # ~2 rounds of 0.2s, not 5
+        self.assertEqual([e is None for e in errors], [True, True, True, True, False])
+        self.assertIsInstance(errors[4], RuntimeError)
+
+    def test_assets_served_from_memory_per_render(self):
+        png = b"\x89PNG\r\n\x1a\n" + b"\0" * 64
+        url = asset_url(png)
+        self.assertTrue(url.startswith(ASSET_ORIGIN) and url.endswith(".png"))
+        self.assertEqual(url, asset_url(png))
+
+        self.service.render(f'<div style="background: url(\'{url}\')"></div>', "a.jpg", {url: png})
+        page = self.service.browsers[0].pages[0]
+        self.assertEqual(page.served, [(200, png, "image/png")])
+        # Assets belong to one render only
+        self.service.render(f'<img src="{url}">', "b.jpg")
+        served = [r for p in self.service.browsers[0].pages for r in p.served]
+        self.assertEqual(served[-1], "aborted")
+        self.assertEqual(metrics.count("render.assets_missing"), 1)
+
+    def test_profile_sets_scale_and_reencodes_over_budget(self):
+        import os
+        import tempfile
+        from PIL import Image
+        from app.render_profiles import RenderProfile
+
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        small = RenderProfile("small", scale=0.5, quality=90, max_bytes=30_000)
+        self.service.render("<p>ok</p>", os.path.join(tmp.name, "a.jpg"), profile=small)
+        browser = self.service.browsers[0]
+        self.assertEqual(browser.scales, [0.5])
+        self.assertEqual(metrics.count("render.reencoded", profile="small"), 0)
+
+        # Chromium's JPEG is over budget: one PNG shot, re-encoded to fit
+        noise = Image.effect_noise((200, 200), 80).convert("RGB")
+        buf = io.BytesIO()
+        noise.save(buf, "PNG")
+        browser.image = buf.getvalue()
+        path = os.path.join(tmp.name, "b.jpg")
+        self.service.render("<p>ok</p>", path, profile=small)
+        self.assertEqual(metrics.count("render.reencoded", profile="small"), 1)
+        self.assertLessEqual(os.path.getsize(path), 30_000)
+        self.assertEqual(Image.open(path).format, "JPEG")
+
+        # Another scale needs a fresh page
+        self.service.render("<p>ok</p>", os.path.join(tmp.name, "c.jpg"), profile=RenderProfile("big", scale=2))
+        self.assertEqual(browser.scales[-1], 2)
+
+    def test_aspect_variants_from_one_page_load(self):
+        outputs = {"feed": "p.jpg", "story": "p-story.jpg", "square": "p-square.jpg"}
+        self.service.render("<p>ok</p>", outputs)
+        browser = self.service.browsers[0]
+        page = browser.pages[0]
+        self.assertEqual(page.loads, 1)
+        self.assertEqual([path for _, path in browser.shots], ["p.jpg", "p-story.jpg", "p-square.jpg"])
+        self.assertEqual(page.viewports, [(1080, 1920), (1080, 1080)])
+        self.assertEqual(page.aspects, ["story", "square"])
+        self.assertEqual(metrics.sample_count("render.variant_s", aspect="story"), 1)
+
+        # The next render on that page starts from the feed viewport again
+        self.service.render("<p>ok</p>", "q.jpg")
+        self.service.render("<p>ok</p>", "r.jpg")
+        self.assertEqual(sum(p.viewports[-1:] == [(1080, 1350)] for p in browser.pages), 1)
+
+        with self.assertRaises(ValueError):
+            self.service.render("<p>ok</p>", {"banner": "b.jpg"})
+
+    def test_make_post_images_keeps_input_order_and_unique_paths(self):
+        from app import generate_image
+
+        service = _FakeRenderService(pages=2, recycle_after=10, timeout_s=5)
+        self.addCleanup(service.close)
+        posts = [
+            {"title": "Same headline", "pov": "a", "category": "tech", "background_image": b"x"},
+            {"title": "Broken", "pov": "b", "category": "tech", "background_image": b"x"},
+            {"title": "Same headline", "pov": "c", "category": "tech", "background_image": b"x"},
+        ]
+        real_build = generate_image.build_post_context
+
+        def build(**post):
+            if post["title"] == "Broken":
+                raise ValueError("bad post")
+            return real_build(**post)
+
+        with mock.patch.object(generate_image, "get_render_service", return_value=service), \
+                mock.patch.object(generate_image, "build_post_context", side_effect=build):
+            paths = generate_image.make_post_images(posts)
+        self.assertIsNone(paths[1])
+        self.assertTrue(paths[0].endswith("same-headline-tech.jpg"))
+        self.assertTrue(paths[2].endswith("same-headline-tech-3.jpg"))
+        self.assertEqual(len(service.browsers[0].shots), 2)
+        # The background went through page.route, not into the HTML
+        served = [r for p in service.browsers[0].pages for r in p.served]
+        self.assertEqual(len(served), 2)
+        self.assertTrue(all(r[1] == b"x" for r in served))
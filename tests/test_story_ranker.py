@@ -0,0 +1,75 @@
+import time
+import unittest
+from datetime import datetime, timedelta, timezone
+
+from app.story_ranker import _salience, rank_stories, select_top_stories
+
+NOW = datetime(2025, 9, 20, 12, 0, tzinfo=timezone.utc)
+
+
+def _item(title, url, hours_ago=1.0, interest="top_stories", excerpt=""):
+    return {
+        "interest": interest,
+        "title": title,
+        "excerpt": excerpt,
+        "news_time": (NOW - timedelta(hours=hours_ago)).isoformat(),
+        "url": url,
+        "source": "",
+    }
+
+
+class TestStoryRanker(unittest.TestCase):
+
+    def test_same_story_across_outlets_is_merged_and_boosted(self):
+        items = [
+            _item("Supreme Court strikes down electoral bonds scheme", "https://www.ndtv.com/a"),
+            _item("Electoral bonds scheme struck down by Supreme Court", "https://www.thehindu.com/b"),
+            _item("Supreme Court strikes down electoral bonds", "https://indianexpress.com/c"),
+            _item("Local bakery wins city award", "https://www.pinkvilla.com/d"),
+        ]
+        ranked = rank_stories(items, now=NOW)
+        self.assertEqual(len(ranked), 2)
+        self.assertIn("Supreme Court", ranked[0]["title"])
+        self.assertEqual(ranked[0]["coverage"], 3)
+        # Highest-weighted outlet is the representative
+        self.assertIn("thehindu.com", ranked[0]["url"])
+
+    def test_salience_matches_whole_words(self):
+        self.assertEqual(_salience("Local bakery wins city award"), 0)
+        self.assertEqual(_salience("Bank warning: urban billion-dollar deadline edited"), 0)
+        self.assertEqual(_salience("War: ED probe into ₹500 crore bill"), 2.0 + 1.0 + 1.0 + 1.0 + 1.0 + 1.0)
+        self.assertEqual(_salience("RBI holds repo rate; RBI says AI boom"), 2.5 + 2.5 + 1.0)
+
+    def test_recency_breaks_ties(self):
+        items = [
+            _item("Monsoon session of parliament begins", "https://www.ndtv.com/old", hours_ago=10),
+            _item("Cabinet clears new railway corridor", "https://www.ndtv.com/new", hours_ago=0.5),
+        ]
+        ranked = rank_stories(items, now=NOW)
+        self.assertEqual(ranked[0]["url"], "https://www.ndtv.com/new")
+
+    def test_select_top_respects_quotas_then_fills(self):
+        ranked = [
+            {"interest": "top_stories", "score": 0.9},
+            {"interest": "top_stories", "score": 0.8},
+            {"interest": "top_stories", "score": 0.7},
+            {"interest": "cricket", "score": 0.2},
+        ]
+        picked = select_top_stories(ranked, 3, quotas={"top_stories": 1, "cricket": 1})
+        self.assertEqual([p["score"] for p in picked], [0.9, 0.8, 0.2])
+
+    def test_hundreds_of_candidates_rank_quickly(self):
+        items = [
+            _item(f"k{i} q{i} topic{i % 37} city{i % 11}",
+                  f"https://site{i % 9}.com/{i}", hours_ago=i % 12)
+            for i in range(400)
+        ]
+        start = time.perf_counter()
+        ranked = rank_stories(items, now=NOW)
+        elapsed = time.perf_counter() - start
+        self.assertGreater(len(ranked), 300)
+        self.assertLess(elapsed, 0.5)
+
+
+if __name__ == '__main__':
+    unittest.main()